@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AchievementsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'achievements'
+
+    def ready(self):
+        # Evaluate achievement rules as quiz results, simulations and wallet credits arrive.
+        from . import signals  # noqa: F401
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("achievements", "0003_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="achievement",
+            name="reward_amount",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+    ]
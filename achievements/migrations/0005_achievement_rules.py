@@ -0,0 +1,119 @@
+# Generated by Django 4.2 on 2026-10-17 23:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("achievements", "0004_achievement_reward_amount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AchievementProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("awarded_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AchievementRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=200)),
+                ("description", models.TextField()),
+                (
+                    "trigger",
+                    models.CharField(
+                        choices=[
+                            ("quiz_result", "Quiz Result"),
+                            ("balance", "Wallet Balance"),
+                            ("simulation", "Investment Simulation"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("conditions", models.JSONField(default=dict)),
+                (
+                    "reward_type",
+                    models.CharField(
+                        choices=[
+                            ("Badge", "Badge"),
+                            ("Extra Virtual Money", "Extra Virtual Money"),
+                        ],
+                        default="Badge",
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "reward_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=10),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="achievementprogress",
+            name="rule",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="progress",
+                to="achievements.achievementrule",
+            ),
+        ),
+        migrations.AddField(
+            model_name="achievementprogress",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="achievement_progress",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="achievement",
+            name="rule",
+            field=models.ForeignKey(
+                blank=True,
+                default=None,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="achievements",
+                to="achievements.achievementrule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="achievementprogress",
+            constraint=models.UniqueConstraint(
+                fields=("user", "rule"), name="unique_achievement_progress"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="achievement",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("rule__isnull", False)),
+                fields=("user_id", "rule"),
+                name="unique_rule_achievement_per_user",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("achievements", "0005_achievement_rules"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="achievement",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["id"],
+                name="achievement_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="achievement",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user_id", "id"],
+                name="achievement_active_user_idx",
+            ),
+        ),
+    ]
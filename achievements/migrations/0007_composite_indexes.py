@@ -0,0 +1,48 @@
+# Generated by Django 4.2 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("achievements", "0006_active_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="achievement",
+            name="achievement_active_user_idx",
+        ),
+        migrations.AddIndex(
+            model_name="achievement",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user_id", "date_achieved", "id"],
+                name="achievement_active_user_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="achievement",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["date_achieved", "id"],
+                name="achievement_active_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="achievement",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["title", "id"],
+                name="achievement_active_title_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="achievementrule",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["title", "id"],
+                name="rule_active_title_idx",
+            ),
+        ),
+    ]
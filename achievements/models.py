@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from versioning.soft_delete import ACTIVE, SignalledActiveManager, SignalledSoftDeleteManager
+from versioning.versions import VersionedQuerySet
 
 
 
@@ -24,8 +26,28 @@ class Achievement(models.Model):
     date_achieved = models.DateField()
     description = models.TextField()
     reward_type = models.CharField(max_length=50)
+    reward_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     title = models.CharField(max_length=200)
     is_active = models.BooleanField(default=True)
+    rule = models.ForeignKey('AchievementRule', on_delete=models.SET_NULL, null=True, blank=True, default=None, related_name='achievements')
+    objects = SignalledActiveManager()
+    all_objects = SignalledSoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=ACTIVE, name='achievement_active_idx'),
+            # Also serves the dashboard's latest achievements of a user.
+            models.Index(fields=['user_id', 'date_achieved', 'id'], condition=ACTIVE, name='achievement_active_user_idx'),
+            models.Index(fields=['date_achieved', 'id'], condition=ACTIVE, name='achievement_active_date_idx'),
+            models.Index(fields=['title', 'id'], condition=ACTIVE, name='achievement_active_title_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'rule'],
+                condition=models.Q(rule__isnull=False),
+                name='unique_rule_achievement_per_user',
+            ),
+        ]
 
     def soft_delete(self):
        self.is_active = False
@@ -35,3 +57,61 @@ class Achievement(models.Model):
  
     def __str__(self):
         return f"Achievement {self.title}"
+
+
+class AchievementRule(models.Model):
+    """
+    A structured rule that awards an Achievement automatically. `trigger` says
+    which events can satisfy it and `conditions` holds its parameters, e.g.
+    {"min_score": 90, "count": 5} for a quiz_result rule, {"min_balance": 10000}
+    for a balance rule or {"risk_level": "High", "count": 1} for a simulation
+    rule. Rules are compiled and evaluated by achievements/rules.py.
+    """
+    QUIZ_RESULT = 'quiz_result'
+    BALANCE = 'balance'
+    SIMULATION = 'simulation'
+
+    TRIGGER_CHOICES = [
+        (QUIZ_RESULT, 'Quiz Result'),
+        (BALANCE, 'Wallet Balance'),
+        (SIMULATION, 'Investment Simulation'),
+    ]
+
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES)
+    conditions = models.JSONField(default=dict)
+    reward_type = models.CharField(max_length=50, choices=Achievement.REWARD_TYPE_CHOICES, default='Badge')
+    reward_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    is_active = models.BooleanField(default=True)
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], condition=ACTIVE, name='rule_active_title_idx'),
+        ]
+
+    def soft_delete(self):
+        self.is_active = False
+        self.save()
+
+    def __str__(self):
+        return f"Rule {self.title}"
+
+
+class AchievementProgress(models.Model):
+    """
+    Per-user progress towards a counting rule, and whether it was awarded.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='achievement_progress')
+    rule = models.ForeignKey(AchievementRule, on_delete=models.CASCADE, related_name='progress')
+    count = models.PositiveIntegerField(default=0)
+    awarded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rule'], name='unique_achievement_progress'),
+        ]
+
+    def __str__(self):
+        return f"Progress of User {self.user_id} on Rule {self.rule_id}: {self.count}"
@@ -0,0 +1,230 @@
+"""
+Incremental achievement rules engine.
+
+`AchievementRule` rows hold structured conditions. They are compiled once
+into plain-Python predicates and indexed by trigger, so an event only looks
+at the rules for its own trigger and, when none of them match, costs no
+queries at all. Progress towards counting rules ("score 90 or more five
+times") is kept per user in `AchievementProgress` and moved with `F()`
+updates, so nothing is ever recounted from history.
+
+Triggers and their conditions:
+
+- `quiz_result`: `min_score` (default 0), optional `quiz_id`, `count` (default 1).
+- `simulation`: optional `risk_level` (case-insensitive), optional
+  `min_amount`, `count` (default 1).
+- `balance`: `min_balance`, checked whenever the wallet is credited.
+"""
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Callable, NamedTuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Achievement, AchievementProgress, AchievementRule
+
+# Rules changed in another process are picked up after this many seconds.
+RULE_CACHE_TTL = 60
+
+
+class RuleError(ValueError):
+    """Raised when a rule's conditions cannot be compiled."""
+
+
+class CompiledRule(NamedTuple):
+    rule_id: int
+    trigger: str
+    matches: Callable[[object], bool]
+    target: int
+    criteria: str
+    title: str
+    description: str
+    reward_type: str
+    reward_amount: Decimal
+
+
+def _check_keys(conditions, allowed):
+    if not isinstance(conditions, dict):
+        raise RuleError("conditions must be an object")
+    unknown = set(conditions) - set(allowed)
+    if unknown:
+        raise RuleError(f"Unknown conditions: {', '.join(sorted(unknown))}")
+
+
+def _integer(conditions, key, default=None, minimum=0):
+    value = conditions.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise RuleError(f"{key} must be an integer of at least {minimum}")
+    return value
+
+
+def _decimal(conditions, key, default=None):
+    value = conditions.get(key, default)
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise RuleError(f"{key} must be a number")
+
+
+def _times(count):
+    return "once" if count == 1 else f"{count} times"
+
+
+def compile_quiz_result(conditions):
+    _check_keys(conditions, ('min_score', 'quiz_id', 'count'))
+    min_score = _integer(conditions, 'min_score', default=0)
+    quiz_id = _integer(conditions, 'quiz_id')
+    count = _integer(conditions, 'count', default=1, minimum=1)
+
+    def matches(result):
+        return result.score >= min_score and (quiz_id is None or result.quiz_id == quiz_id)
+
+    quiz = f"quiz {quiz_id}" if quiz_id is not None else "a quiz"
+    return matches, count, f"Score at least {min_score} on {quiz} {_times(count)}"
+
+
+def compile_simulation(conditions):
+    _check_keys(conditions, ('risk_level', 'min_amount', 'count'))
+    risk_level = conditions.get('risk_level')
+    if risk_level is not None and not isinstance(risk_level, str):
+        raise RuleError("risk_level must be a string")
+    risk_level = risk_level.lower() if risk_level else None
+    min_amount = _decimal(conditions, 'min_amount')
+    count = _integer(conditions, 'count', default=1, minimum=1)
+
+    def matches(simulation):
+        if min_amount is not None and simulation.amount_invested < min_amount:
+            return False
+        # Checked last: it may need to load the market.
+        return risk_level is None or simulation.market_id.risk_level.lower() == risk_level
+
+    market = f"a {conditions['risk_level']}-risk market" if risk_level else "any market"
+    return matches, count, f"Run a simulation in {market} {_times(count)}"
+
+
+def compile_balance(conditions):
+    _check_keys(conditions, ('min_balance',))
+    min_balance = _decimal(conditions, 'min_balance')
+    if min_balance is None:
+        raise RuleError("min_balance is required")
+
+    def matches(balance):
+        return balance >= min_balance
+
+    return matches, 1, f"Reach a wallet balance of {min_balance}"
+
+
+COMPILERS = {
+    AchievementRule.QUIZ_RESULT: compile_quiz_result,
+    AchievementRule.SIMULATION: compile_simulation,
+    AchievementRule.BALANCE: compile_balance,
+}
+
+
+def compile_rule(rule):
+    if rule.trigger not in COMPILERS:
+        raise RuleError(f"Unknown trigger {rule.trigger}")
+    matches, target, criteria = COMPILERS[rule.trigger](rule.conditions)
+    return CompiledRule(
+        rule_id=rule.pk,
+        trigger=rule.trigger,
+        matches=matches,
+        target=target,
+        criteria=criteria,
+        title=rule.title,
+        description=rule.description,
+        reward_type=rule.reward_type,
+        reward_amount=rule.reward_amount,
+    )
+
+
+class RuleIndex:
+    """Active rules compiled once per process and grouped by trigger."""
+
+    def __init__(self, ttl=RULE_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rules = None
+        self._loaded_at = 0.0
+
+    def for_trigger(self, trigger):
+        rules = self._rules
+        if rules is None or time.monotonic() - self._loaded_at > self.ttl:
+            rules = self._load()
+        return rules.get(trigger, ())
+
+    def invalidate(self):
+        self._rules = None
+
+    def _load(self):
+        with self._lock:
+            rules = {}
+            for rule in AchievementRule.objects.filter(is_active=True).order_by('id'):
+                rules.setdefault(rule.trigger, []).append(compile_rule(rule))
+            self._rules = {trigger: tuple(compiled) for trigger, compiled in rules.items()}
+            self._loaded_at = time.monotonic()
+            return self._rules
+
+
+rule_index = RuleIndex()
+
+
+def evaluate(trigger, user_id, subject):
+    """
+    Feed one event to the rules of `trigger`. `subject` is what the rules'
+    predicates inspect (a QuizResult, an InvestmentSimulation or a balance).
+    Returns the Achievements awarded.
+    """
+    if user_id is None:
+        return []
+    awarded = []
+    for rule in rule_index.for_trigger(trigger):
+        if rule.matches(subject):
+            achievement = advance(rule, user_id)
+            if achievement is not None:
+                awarded.append(achievement)
+    return awarded
+
+
+def advance(rule, user_id):
+    """Count one qualifying event and award the rule once its target is met."""
+    with transaction.atomic():
+        progress, _ = AchievementProgress.objects.get_or_create(user_id=user_id, rule_id=rule.rule_id)
+        if progress.awarded_at is not None:
+            return None
+        AchievementProgress.objects.filter(pk=progress.pk).update(count=F('count') + 1)
+        progress.refresh_from_db(fields=['count'])
+        if progress.count < rule.target:
+            return None
+        # Only one of several concurrent events may claim the award.
+        claimed = AchievementProgress.objects.filter(pk=progress.pk, awarded_at__isnull=True).update(
+            awarded_at=timezone.now()
+        )
+        if not claimed:
+            return None
+        return award(rule, user_id)
+
+
+def award(rule, user_id):
+    try:
+        with transaction.atomic():
+            return Achievement.objects.create(
+                user_id_id=user_id,
+                rule_id=rule.rule_id,
+                title=rule.title,
+                description=rule.description,
+                criteria=rule.criteria,
+                reward_type=rule.reward_type,
+                reward_amount=rule.reward_amount,
+                date_achieved=timezone.localdate(),
+            )
+    except IntegrityError:
+        # Already awarded before progress was tracked.
+        return None
@@ -0,0 +1,43 @@
+"""
+Signal receivers that feed events to the achievement rules engine.
+
+New quiz results and new simulations are evaluated against the rules of
+their trigger. Balance rules are evaluated on every wallet credit, which
+covers virtual money grants, quiz payouts, returns and rewards alike.
+Saving or deleting a rule drops this process's compiled rules.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from investment_simulation.models import InvestmentSimulation
+from quiz_results.models import QuizResult
+from virtualmoney.models import WalletLedgerEntry
+from virtualmoney.wallet import get_balance
+
+from .models import AchievementRule
+from .rules import evaluate, rule_index
+
+
+def quiz_result_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.is_active:
+        evaluate(AchievementRule.QUIZ_RESULT, instance.user_id, instance)
+
+
+def simulation_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.is_active:
+        evaluate(AchievementRule.SIMULATION, instance.user_id, instance)
+
+
+def wallet_credited(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.amount > 0 and rule_index.for_trigger(AchievementRule.BALANCE):
+        evaluate(AchievementRule.BALANCE, instance.user_id, get_balance(instance.user_id))
+
+
+def rule_changed(sender, **kwargs):
+    rule_index.invalidate()
+
+
+post_save.connect(quiz_result_saved, sender=QuizResult, dispatch_uid='achievement_rules_quiz_result')
+post_save.connect(simulation_saved, sender=InvestmentSimulation, dispatch_uid='achievement_rules_simulation')
+post_save.connect(wallet_credited, sender=WalletLedgerEntry, dispatch_uid='achievement_rules_wallet')
+post_save.connect(rule_changed, sender=AchievementRule, dispatch_uid='achievement_rules_changed')
+post_delete.connect(rule_changed, sender=AchievementRule, dispatch_uid='achievement_rules_deleted')
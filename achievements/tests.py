@@ -1,9 +1,17 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
-from achievements.models import Achievement
+from achievements.models import Achievement, AchievementProgress, AchievementRule
+from achievements.rules import evaluate, rule_index
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from virtualmoney.models import VirtualMoney
+from virtualmoney.wallet import get_balance
 from users.models import User  # Assuming there is a User model in the users app
 from datetime import date
+from decimal import Decimal
 
 
 class AchievementTests(APITestCase):
@@ -34,7 +42,16 @@ class AchievementTests(APITestCase):
         """
         response = self.client.get(self.achievement_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), Achievement.objects.count())
+        self.assertEqual(len(response.data['results']), Achievement.objects.count())
+
+    def test_soft_deleted_achievement_is_not_listed(self):
+        """
+        Test unhappy path: soft deleted Achievements are left out of the list.
+        """
+        self.achievement.soft_delete()
+        response = self.client.get(self.achievement_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
 
     def test_get_achievement_detail(self):
         """
@@ -71,3 +88,97 @@ class AchievementTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+
+
+class AchievementRuleTests(APITestCase):
+    def setUp(self):
+        rule_index.invalidate()
+        self.addCleanup(rule_index.invalidate)
+        self.user = User.objects.create_user(username="ruleuser", password="testpassword")
+        self.quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        self.rule_list_url = reverse('achievement-rule-list')
+
+    def create_rule(self, trigger, conditions, **kwargs):
+        return AchievementRule.objects.create(
+            title=kwargs.pop('title', 'Rule'),
+            description="Test description",
+            trigger=trigger,
+            conditions=conditions,
+            **kwargs
+        )
+
+    def awarded(self):
+        return Achievement.objects.filter(user_id=self.user, rule__isnull=False)
+
+    def test_quiz_rule_awards_after_count_is_reached(self):
+        rule = self.create_rule(AchievementRule.QUIZ_RESULT, {"min_score": 90, "count": 5})
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=50)
+        for _ in range(4):
+            QuizResult.objects.create(user=self.user, quiz=self.quiz, score=95)
+        self.assertFalse(self.awarded().exists())
+
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=90)
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=100)
+        achievement = self.awarded().get()
+        self.assertEqual(achievement.rule, rule)
+        self.assertEqual(achievement.criteria, "Score at least 90 on a quiz 5 times")
+        self.assertEqual(AchievementProgress.objects.get(user=self.user, rule=rule).count, 5)
+
+    def test_balance_rule_awards_and_pays_reward(self):
+        self.create_rule(
+            AchievementRule.BALANCE, {"min_balance": 10000},
+            reward_type='Extra Virtual Money', reward_amount=Decimal('500.00'),
+        )
+        VirtualMoney.objects.create(user=self.user, amount=9999.99)
+        self.assertFalse(self.awarded().exists())
+
+        VirtualMoney.objects.create(user=self.user, amount=0.01)
+        self.assertEqual(self.awarded().count(), 1)
+        self.assertEqual(get_balance(self.user.user_id), Decimal('10500.00'))
+
+    def test_simulation_rule_matches_risk_level(self):
+        self.create_rule(AchievementRule.SIMULATION, {"risk_level": "High"})
+        VirtualMoney.objects.create(user=self.user, amount=1000)
+        low = Market.objects.create(market_name="Bonds", risk_level="Low", description="Bonds")
+        high = Market.objects.create(market_name="Crypto", risk_level="high", description="Crypto")
+        InvestmentSimulation.record(low.market_id, self.user.user_id, 100, 5)
+        self.assertFalse(self.awarded().exists())
+
+        InvestmentSimulation.record(high.market_id, self.user.user_id, 100, -5)
+        InvestmentSimulation.record(high.market_id, self.user.user_id, 100, 5)
+        self.assertEqual(self.awarded().count(), 1)
+
+    def test_unmatched_event_runs_no_queries(self):
+        self.create_rule(AchievementRule.QUIZ_RESULT, {"min_score": 90})
+        rule_index.for_trigger(AchievementRule.QUIZ_RESULT)
+        result = QuizResult(user=self.user, quiz=self.quiz, score=10)
+        with self.assertNumQueries(0):
+            self.assertEqual(evaluate(AchievementRule.QUIZ_RESULT, self.user.user_id, result), [])
+
+    def test_inactive_rule_is_ignored(self):
+        rule = self.create_rule(AchievementRule.QUIZ_RESULT, {"min_score": 90})
+        rule.soft_delete()
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=95)
+        self.assertFalse(self.awarded().exists())
+
+    def test_create_rule(self):
+        data = {
+            "title": "Top scorer",
+            "description": "Score 90 or more five times",
+            "trigger": "quiz_result",
+            "conditions": {"min_score": 90, "count": 5},
+        }
+        response = self.client.post(self.rule_list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(AchievementRule.objects.count(), 1)
+
+    def test_create_rule_with_invalid_conditions(self):
+        data = {
+            "title": "Broken",
+            "description": "Unknown condition",
+            "trigger": "quiz_result",
+            "conditions": {"min_scor": 90},
+        }
+        response = self.client.post(self.rule_list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('conditions', response.data)
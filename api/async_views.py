@@ -0,0 +1,231 @@
+"""
+Async versions of the read-heavy endpoints, for ASGI deployments (see
+`Procfile.asgi`).
+
+DRF's APIView only runs synchronous handlers, so these are plain Django
+async class-based views. They use the async ORM (`aget`, `async for`,
+`aaggregate`) and return the same payloads as their sync counterparts in
+api/views.py: the same compiled serializers, keyset pagination, FilterSets,
+ETags and detail cache. Under an ASGI server a request that waits on the
+database no longer holds a worker, so one process can serve many
+requests at once. Django runs each request's queries in a thread of its
+own, so those waits overlap too. Responses are always JSON (orjson); there
+is no browsable or MessagePack rendering on these routes.
+
+Under WSGI these views still work, but each request pays for an event
+loop, so keep using the sync routes there.
+"""
+import asyncio
+import logging
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Avg, Count, Sum
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from users.models import User
+from virtualmoney.models import WalletBalance
+from .cache import acached_detail
+from .compiled import aserialize_many
+from .conditional import aetag_for
+from .pagination import KeysetPagination
+from .renderers import ORJSONRenderer
+from .serializers import (
+    AchievementSerializer, InvestmentSimulationSerializer, MarketSerializer, QuizResultSerializer, QuizSerializer,
+)
+from .views import MarketFilter
+
+logger = logging.getLogger(__name__)
+
+
+class JSONResponse(HttpResponse):
+    """An orjson-rendered response that keeps its payload as `.data`, like DRF's Response."""
+
+    def __init__(self, data, status=status.HTTP_200_OK):
+        super().__init__(ORJSONRenderer().render(data), content_type='application/json', status=status)
+        self.data = data
+
+
+class AsyncAPIView(View):
+    async def dispatch(self, request, *args, **kwargs):
+        # There is no DRF exception handler here; answer its exceptions
+        # (e.g. NotFound for a bad cursor) the way it would.
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.respond({'detail': exc.detail}, exc.status_code)
+
+    def respond(self, data, status=status.HTTP_200_OK):
+        return JSONResponse(data, status)
+
+
+class AsyncListView(AsyncAPIView):
+    """
+    Keyset-paginated list of `get_queryset()` (`queryset` unless
+    overridden), filtered by `filterset_class` when set, as
+    KeysetPaginationMixin does for the sync views.
+    """
+    queryset = None
+    serializer_class = None
+    filterset_class = None
+    pagination_class = KeysetPagination
+    ordering_fields = ()
+
+    def get_queryset(self):
+        if self.queryset is None:
+            raise ImproperlyConfigured(
+                f"{self.__class__.__name__} is missing a queryset. Define "
+                f"{self.__class__.__name__}.queryset or override get_queryset()."
+            )
+        return self.queryset.all()
+
+    async def list(self, request):
+        queryset = self.get_queryset()
+        if self.filterset_class is not None:
+            queryset = self.filterset_class(request.GET, queryset=queryset).qs
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, Request(request), view=self)
+        data = await aserialize_many(self.serializer_class, page)
+        return self.respond({'next': paginator.get_next_link(), 'results': data})
+
+
+"""
+AsyncMarketListView:
+   - GET: Retrieves all active markets, like MarketListView.
+"""
+class AsyncMarketListView(AsyncListView):
+   queryset = Market.objects.all()
+   serializer_class = MarketSerializer
+   filterset_class = MarketFilter
+   ordering_fields = ['market_name', 'risk_level']
+
+   @aetag_for(Market)
+   async def get(self, request):
+       logger.info("Fetching all active markets (async)")
+       return await self.list(request)
+
+
+class AsyncMarketDetailView(AsyncAPIView):
+   @acached_detail(Market, 'market_id')
+   async def get(self, request, market_id):
+       logger.info(f"Fetching market with ID: {market_id} (async)")
+       try:
+           market = await Market.objects.aget(market_id=market_id)
+       except Market.DoesNotExist:
+           logger.error(f"Market with ID {market_id} not found or inactive")
+           return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+       return self.respond(MarketSerializer(market).data)
+
+
+class AsyncQuizListView(AsyncListView):
+    """
+    Retrieve all active quizzes, like QuizView.
+    """
+    queryset = Quiz.objects.all()
+    serializer_class = QuizSerializer
+
+    @aetag_for(Quiz)
+    async def get(self, request):
+        logger.info("Retrieving all active quizzes (async)")
+        return await self.list(request)
+
+
+class AsyncQuizDetailView(AsyncAPIView):
+    """
+    Retrieve a specific active quiz by ID, like QuizDetailView.
+    """
+    @acached_detail(Quiz, 'id')
+    async def get(self, request, id):
+        logger.info(f"Received request to fetch quiz with quiz_id: {id} (async)")
+        try:
+            quiz = await Quiz.objects.aget(id=id)
+        except Quiz.DoesNotExist:
+            logger.warning(f"Quiz with quiz_id {id} not found or inactive")
+            return self.respond({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+        return self.respond(QuizSerializer(quiz).data)
+
+
+class AsyncAchievementListView(AsyncListView):
+   """
+   List all active Achievement instances, like AchievementView.
+   """
+   queryset = Achievement.objects.all()
+   serializer_class = AchievementSerializer
+   ordering_fields = ['date_achieved', 'title']
+
+   @aetag_for(Achievement)
+   async def get(self, request):
+       logger.info('GET request received for Achievement list (async)')
+       return await self.list(request)
+
+
+class AsyncAchievementDetailView(AsyncAPIView):
+   """
+   Retrieve a specific Achievement instance by ID, like AchievementDetailView.
+   """
+   @acached_detail(Achievement, 'id')
+   async def get(self, request, id):
+       try:
+           achievement = await Achievement.objects.aget(id=id)
+       except Achievement.DoesNotExist:
+           return self.respond({"error": "Achievement not found"}, status=status.HTTP_404_NOT_FOUND)
+       return self.respond(AchievementSerializer(achievement).data)
+
+
+class AsyncUserDashboardView(AsyncAPIView):
+   """
+   Everything a user's home screen shows in one response: profile, wallet
+   balance, and totals plus the latest rows of their quiz results,
+   investment simulations and achievements. Amounts are strings with two
+   decimals, as the serializers render them.
+   """
+   RECENT = 5
+   money = serializers.DecimalField(max_digits=12, decimal_places=2)
+   timestamp = serializers.DateTimeField()
+
+   async def get(self, request, user_id):
+       try:
+           user = await User.objects.aget(user_id=user_id)
+       except User.DoesNotExist:
+           logger.error(f"User with ID {user_id} not found.")
+           return self.respond({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+       results = QuizResult.objects.filter(user_id=user_id)
+       simulations = InvestmentSimulation.objects.filter(user_id=user_id)
+       achievements = Achievement.objects.filter(user_id=user_id)
+       (
+           wallet, result_totals, simulation_totals, achievement_totals,
+           recent_results, recent_simulations, recent_achievements,
+       ) = await asyncio.gather(
+           WalletBalance.objects.filter(user_id=user_id).values_list('balance', flat=True).afirst(),
+           results.aaggregate(count=Count('id'), average_score=Avg('score'), money_earned=Sum('money_earned')),
+           simulations.aaggregate(count=Count('id'), amount_invested=Sum('amount_invested'), profit_loss=Sum('profit_loss')),
+           achievements.aaggregate(count=Count('id')),
+           aserialize_many(QuizResultSerializer, results.order_by('-id')[:self.RECENT]),
+           aserialize_many(InvestmentSimulationSerializer, simulations.order_by('-id')[:self.RECENT]),
+           aserialize_many(AchievementSerializer, achievements.order_by('-date_achieved', '-id')[:self.RECENT]),
+       )
+       logger.info(f"Built dashboard for user {user.username}.")
+       for totals, field in ((result_totals, 'money_earned'), (simulation_totals, 'amount_invested'),
+                             (simulation_totals, 'profit_loss')):
+           totals[field] = self.money.to_representation(totals[field] or 0)
+       return self.respond({
+           'user': {
+               'user_id': user.user_id,
+               'username': user.username,
+               'avatar': user.avatar,
+               'location': user.location,
+               'created_at': self.timestamp.to_representation(user.created_at),
+           },
+           'balance': self.money.to_representation(wallet or 0),
+           'quiz_results': {**result_totals, 'recent': recent_results},
+           'simulations': {**simulation_totals, 'recent': recent_simulations},
+           'achievements': {**achievement_totals, 'recent': recent_achievements},
+       })
@@ -0,0 +1,174 @@
+"""
+Several API calls in one round trip.
+
+`POST /api/batch/` takes a list of sub-requests against the routes of
+api/urls.py and runs each one in-process: the path is resolved with the
+api URLconf and the view is called directly, skipping the middleware. The
+caller is authenticated once, for the batch, and every sub-request runs
+as that user. Sub-requests that run one after another share the batch's
+database connection.
+
+Sub-requests run in order, and each one commits on its own as a separate
+call would; a failing sub-request does not stop the ones after it. With
+`"parallel": true` each run of consecutive GET sub-requests goes to a
+thread pool of BATCH_MAX_WORKERS threads instead, each thread with a
+database connection of its own. Inside a transaction (ATOMIC_REQUESTS,
+tests) they still run one at a time, since other connections cannot see
+its writes.
+
+Sub-requests get only the request headers given with them (`headers`,
+e.g. If-None-Match or Accept). The response lists, in order, each
+sub-request's `id` (its index unless given), `status`, `headers` and
+`body`. Streaming responses (the exports)
+cannot be batched. Request metrics count the batch as one request.
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import connection, connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .serializers import BatchRequestSerializer
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_WORKERS = getattr(settings, 'BATCH_MAX_WORKERS', 4)
+API_PREFIX = '/api/'
+
+# Request data copied from the batch to every sub-request.
+FORWARDED_META = (
+    'SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'HTTP_HOST', 'HTTP_USER_AGENT', 'HTTP_ACCEPT_LANGUAGE',
+    'HTTP_X_FORWARDED_HOST', 'HTTP_X_FORWARDED_PORT', 'HTTP_X_FORWARDED_PROTO',
+)
+# Sub-request headers that are set by the batch, never by the caller.
+RESERVED_HEADERS = {'authorization', 'cookie', 'host', 'content-type', 'content-length'}
+# Response headers that mean nothing inside the batch payload.
+OMITTED_HEADERS = {'content-type', 'content-length', 'vary', 'allow'}
+
+
+class SubRequest(HttpRequest):
+    """An HttpRequest built from one entry of a batch, as the handler would build it."""
+
+    def __init__(self, parent, method, path, body=None, headers=None):
+        super().__init__()
+        url = urlsplit(path)
+        self._scheme = parent.scheme
+        self.method = method
+        self.path = self.path_info = url.path
+        self.GET = QueryDict(url.query)
+        self.META = {name: parent.META[name] for name in FORWARDED_META if name in parent.META}
+        self.META.update(REQUEST_METHOD=method, PATH_INFO=url.path, SCRIPT_NAME='', QUERY_STRING=url.query)
+        for name, value in (headers or {}).items():
+            if name.lower() not in RESERVED_HEADERS:
+                self.META['HTTP_' + name.upper().replace('-', '_')] = value
+        payload = b'' if body is None else json.dumps(body).encode()
+        if payload:
+            self.META.update(CONTENT_TYPE='application/json', CONTENT_LENGTH=str(len(payload)))
+        self._stream = io.BytesIO(payload)
+        self._read_started = False
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def error(ident, status_code, message):
+    return {'id': ident, 'status': status_code, 'headers': {}, 'body': {'error': message}}
+
+
+def response_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    if not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset, errors='replace')
+
+
+def run_sub_request(request, index, entry):
+    """Resolve and run one validated entry of a batch; returns its result."""
+    ident = entry.get('id', index)
+    url = urlsplit(entry['path'])
+    try:
+        match = resolve('/' + url.path[len(API_PREFIX):], urlconf='api.urls')
+    except Resolver404:
+        return error(ident, status.HTTP_404_NOT_FOUND, f"No API route matches {url.path}")
+    if match.url_name == 'batch':
+        return error(ident, status.HTTP_400_BAD_REQUEST, "Batches cannot be nested")
+
+    sub_request = SubRequest(request, entry['method'], entry['path'], entry.get('body'), entry['headers'])
+    sub_request.resolver_match = match
+    sub_request.user = request.user
+    if request.user.is_authenticated:
+        # Seen by DRF's Request: the sub-request skips authentication.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    try:
+        if iscoroutinefunction(match.func):
+            response = async_to_sync(match.func)(sub_request, *match.args, **match.kwargs)
+        else:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception(f"Batch sub-request {entry['method']} {entry['path']} failed")
+        return error(ident, status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error")
+    if response.streaming:
+        response.close()
+        return error(ident, status.HTTP_400_BAD_REQUEST, "Streaming responses cannot be batched")
+    return {
+        'id': ident,
+        'status': response.status_code,
+        'headers': {name: value for name, value in response.items() if name.lower() not in OMITTED_HEADERS},
+        'body': response_body(response),
+    }
+
+
+def run_in_thread(request, index, entry):
+    try:
+        return run_sub_request(request, index, entry)
+    finally:
+        # The pool's threads open connections of their own; don't leak them.
+        connections.close_all()
+
+
+def run_batch(request, entries, parallel=False):
+    """Results of `entries`, in order; see the module docstring."""
+    results = []
+    index = 0
+    while index < len(entries):
+        end = index + 1
+        if parallel and not connection.in_atomic_block:
+            while end < len(entries) and entries[index]['method'] == entries[end]['method'] == 'GET':
+                end += 1
+        if end - index == 1:
+            results.append(run_sub_request(request, index, entries[index]))
+        else:
+            with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, end - index)) as pool:
+                results.extend(pool.map(run_in_thread, [request] * (end - index), range(index, end), entries[index:end]))
+        index = end
+    return results
+
+
+"""
+BatchView:
+   - POST: Runs up to BatchRequestSerializer.MAX_REQUESTS sub-requests against
+     the API in one round trip and returns all their responses.
+"""
+class BatchView(APIView):
+   def post(self, request):
+       serializer = BatchRequestSerializer(data=request.data)
+       if not serializer.is_valid():
+           logger.error(f"Batch rejected: {serializer.errors}")
+           return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+       entries = serializer.validated_data['requests']
+       logger.info(f"Running a batch of {len(entries)} sub-requests")
+       results = run_batch(request, entries, serializer.validated_data['parallel'])
+       return Response({'responses': results})
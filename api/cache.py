@@ -0,0 +1,271 @@
+"""
+Two-tier cache for serialized detail payloads.
+
+Tier one is a bounded LRU in each process, tier two the `shared` Django
+cache, which every worker can see. Each cached object has a version, kept
+in the shared cache next to its entry: a token for the row, replaced
+whenever that row is saved or deleted, and a token for its table, replaced
+by bulk queryset writes that cannot say which rows they touched. Entries in
+both tiers are stamped with the version they were built at and are only
+served while it is current, so a write retires that object's entries in
+every worker, and only those. A missing token (never written, or evicted)
+is replaced by a fresh one, so it can never bring an old entry back.
+
+`cached_detail` reads the version, and the shared entry when this process
+does not hold one, in a single `get_many`; the same version tags the
+response's ETag. A hit in either tier, or a 304, costs that one round trip.
+
+Receivers in api/signals.py replace the tokens as soon as the write
+happens, so the writing transaction cannot read its own stale entries, and
+again when it commits, retiring whatever another request stored from the
+old row in between. Nothing ever clears the shared alias, which other
+features use too.
+
+Each process counts its hits, misses and evictions; see
+`detail_cache.stats()`.
+"""
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+from versioning.versions import table_label
+
+from .conditional import etag_from_versions
+
+MISSING = object()
+
+
+def new_token():
+    return secrets.token_hex(8)
+
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache:
+    def __init__(self, alias='shared', max_entries=1000, timeout=300):
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LRUCache(max_entries)
+        self.shared_hits = self.shared_misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def key(self, model, pk):
+        return f"detail:{table_label(model)}:{pk}"
+
+    def version_keys(self, model, pk):
+        label = table_label(model)
+        return [f"detail-generation:{label}", f"detail-version:{label}:{pk}"]
+
+    def _version(self, values, version_keys):
+        """The version in `values`, with a fresh token for any missing part."""
+        version = []
+        for key in version_keys:
+            token = values.get(key)
+            if token is None:
+                token = new_token()
+                if not self.shared.add(key, token, None):
+                    token = self.shared.get(key) or token
+            version.append(token)
+        return tuple(version)
+
+    async def _aversion(self, values, version_keys):
+        version = []
+        for key in version_keys:
+            token = values.get(key)
+            if token is None:
+                token = new_token()
+                if not await self.shared.aadd(key, token, None):
+                    token = await self.shared.aget(key) or token
+            version.append(token)
+        return tuple(version)
+
+    def _shared_entry(self, entry, key, version):
+        if entry is None or entry[0] != version:
+            self.shared_misses += 1
+            return MISSING
+        self.shared_hits += 1
+        self.local.set(key, version, entry[1])
+        return entry[1]
+
+    def lookup(self, model, pk):
+        """
+        Return (version, payload) for one object: its current version and
+        its payload if one was cached at that version, else MISSING. The
+        shared entry is read along with the version unless this process
+        holds one, which is then usually current.
+        """
+        key, version_keys = self.key(model, pk), self.version_keys(model, pk)
+        held = key in self.local
+        values = self.shared.get_many(version_keys if held else [*version_keys, key])
+        version = self._version(values, version_keys)
+        payload = self.local.get(key, version)
+        if payload is MISSING:
+            entry = self.shared.get(key) if held else values.get(key)
+            payload = self._shared_entry(entry, key, version)
+        return version, payload
+
+    async def alookup(self, model, pk):
+        key, version_keys = self.key(model, pk), self.version_keys(model, pk)
+        held = key in self.local
+        # BaseCache.aget_many reads key by key; get_many is one query.
+        values = await sync_to_async(self.shared.get_many)(version_keys if held else [*version_keys, key])
+        version = await self._aversion(values, version_keys)
+        payload = self.local.get(key, version)
+        if payload is MISSING:
+            entry = await self.shared.aget(key) if held else values.get(key)
+            payload = self._shared_entry(entry, key, version)
+        return version, payload
+
+    def set(self, model, pk, version, value):
+        key = self.key(model, pk)
+        self.local.set(key, version, value)
+        self.shared.set(key, (version, value), self.timeout)
+
+    async def aset(self, model, pk, version, value):
+        key = self.key(model, pk)
+        self.local.set(key, version, value)
+        await self.shared.aset(key, (version, value), self.timeout)
+
+    def invalidate(self, model, pk):
+        """Retire the entries of one object, in this process and every other."""
+        self.local.delete(self.key(model, pk))
+        self.shared.set(self.version_keys(model, pk)[1], new_token(), None)
+
+    def invalidate_table(self, model):
+        """Retire every entry of `model`'s table, in this process and every other."""
+        self.local.delete_prefix(f"detail:{table_label(model)}:")
+        self.shared.set(self.version_keys(model, None)[0], new_token(), None)
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'local': {
+                'hits': self.local.hits,
+                'misses': self.local.misses,
+                'evictions': self.local.evictions,
+                'size': len(self.local),
+                'max_entries': self.local.max_entries,
+            },
+            'shared': {
+                'hits': self.shared_hits,
+                'misses': self.shared_misses,
+            },
+        }
+
+
+detail_cache = TwoTierCache(
+    max_entries=getattr(settings, 'DETAIL_CACHE_MAX_ENTRIES', 1000),
+    timeout=getattr(settings, 'DETAIL_CACHE_TIMEOUT', 300),
+)
+
+
+def cached_detail(model, lookup):
+    """
+    Decorate a detail GET handler so its 200 payload is cached by the
+    object id found in the URL kwarg `lookup`, and carries a strong ETag
+    over that object's version (use it instead of `etag_for`).
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            pk = kwargs[lookup]
+            # Read the version before the object, so a concurrent write can
+            # only make the stored entry look older than it is.
+            version, payload = detail_cache.lookup(model, pk)
+            etag = etag_from_versions(request, version)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            if payload is not MISSING:
+                response = Response(payload)
+            else:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                detail_cache.set(model, pk, version, dict(response.data))
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def acached_detail(model, lookup):
+    """
+    `cached_detail` for async handlers. The handler's response must carry
+    its payload as `.data`, and a cached payload is answered with
+    `view.respond(payload)`.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(view, request, *args, **kwargs):
+            pk = kwargs[lookup]
+            version, payload = await detail_cache.alookup(model, pk)
+            etag = etag_from_versions(request, version)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            if payload is not MISSING:
+                response = view.respond(payload)
+            else:
+                response = await handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                await detail_cache.aset(model, pk, version, dict(response.data))
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+"""
+Compiled read path for model serializers.
+
+`compile_serializer` reads a ModelSerializer's readable fields once. It
+generates a flat function that maps a `values_list()` tuple straight to
+the dict `Serializer.to_representation` would return. No model instances
+are built and no per-field `get_attribute` calls are made. Plain
+integer, string and boolean columns are copied as they are. Every other
+field is converted by the serializer field's own `to_representation`,
+so the output is identical by construction.
+
+A serializer qualifies only if each readable field reads one concrete
+column of its model through a field type listed below, and the
+serializer does not override `to_representation`. Anything else
+(method fields, nested or dotted sources, many-to-many) keeps the
+regular DRF path.
+"""
+from typing import Callable, NamedTuple, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .pagination import KeysetPage
+
+# Fields whose to_representation returns non-null DB values unchanged.
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField)
+CONVERTED_FIELDS = (
+    serializers.ChoiceField,
+    serializers.DecimalField,
+    serializers.FloatField,
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DurationField,
+    serializers.UUIDField,
+    serializers.JSONField,
+)
+
+
+class CompiledSerializer(NamedTuple):
+    columns: Tuple[str, ...]
+    serialize: Callable[[tuple], dict]
+
+
+def _column(model, field):
+    if len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    return model_field.attname
+
+
+def _converter(field):
+    """Return None to copy the value, a callable to convert it, or False."""
+    if type(field) in PASSTHROUGH_FIELDS or (
+        isinstance(field, serializers.CharField) and type(field).to_representation is serializers.CharField.to_representation
+    ):
+        return None
+    if type(field) in CONVERTED_FIELDS:
+        return field.to_representation
+    if type(field) is PrimaryKeyRelatedField:
+        return field.pk_field.to_representation if field.pk_field is not None else None
+    return False
+
+
+def compile_serializer(serializer_class):
+    """Return a CompiledSerializer for `serializer_class`, or None."""
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        return None
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    columns, items, namespace = [], [], {}
+    for i, field in enumerate(serializer._readable_fields):
+        column = _column(model, field)
+        converter = _converter(field)
+        if column is None or converter is False:
+            return None
+        columns.append(column)
+        if converter is None:
+            items.append(f"{field.field_name!r}: v{i}")
+        else:
+            namespace[f'c{i}'] = converter
+            items.append(f"{field.field_name!r}: None if v{i} is None else c{i}(v{i})")
+    if not columns:
+        return None
+    names = ', '.join(f'v{i}' for i in range(len(columns)))
+    source = f"def serialize(row):\n    {names}, = row\n    return {{{', '.join(items)}}}\n"
+    exec(compile(source, f'<compiled {serializer_class.__name__}>', 'exec'), namespace)
+    return CompiledSerializer(tuple(columns), namespace['serialize'])
+
+
+_compiled = {}
+
+
+def get_compiled(serializer_class):
+    if serializer_class not in _compiled:
+        _compiled[serializer_class] = compile_serializer(serializer_class)
+    return _compiled[serializer_class]
+
+
+async def aserialize_many(serializer_class, data):
+    """
+    Serialize a queryset or an unevaluated keyset page in an async view,
+    reading rows with the async ORM. Serializers that do not compile fall
+    back to the regular path on the loaded instances.
+    """
+    compiled = get_compiled(serializer_class)
+    if isinstance(data, KeysetPage):
+        if compiled is None:
+            return serializer_class(await data.aload(), many=True).data
+        rows = await data.avalues_list(*compiled.columns)
+    elif compiled is None:
+        return serializer_class([instance async for instance in data], many=True).data
+    else:
+        rows = [row async for row in data.values_list(*compiled.columns)]
+    serialize = compiled.serialize
+    return [serialize(row) for row in rows]
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    Serializes querysets and unevaluated keyset pages with the compiled
+    function of its child, falling back to DRF for everything else.
+    """
+
+    def to_representation(self, data):
+        compiled = get_compiled(type(self.child))
+        if compiled is not None:
+            if isinstance(data, BaseManager):
+                data = data.all()
+            if isinstance(data, QuerySet):
+                rows = data.values_list(*compiled.columns)
+            elif isinstance(data, KeysetPage) and not data.loaded:
+                rows = data.values_list(*compiled.columns)
+            else:
+                rows = None
+            if rows is not None:
+                serialize = compiled.serialize
+                return [serialize(row) for row in rows]
+        return super().to_representation(data)
+
+
+class CompiledModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose `many=True` form uses the compiled read path."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = cls.__dict__.get('Meta')
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = CompiledListSerializer
@@ -0,0 +1,96 @@
+"""
+Streaming exports of whole tables as NDJSON or CSV.
+
+Rows are read with `values_list(...).iterator(chunk_size=...)` and turned
+into dicts by the compiled serializer (api/compiled.py). They are written
+to a `StreamingHttpResponse` a chunk at a time, so a worker holds at most
+one chunk of rows whatever the size of the table. The format is
+negotiated like any other DRF response: `Accept: application/x-ndjson`,
+`Accept: text/csv` or `?format=ndjson|csv`. NDJSON is the default.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import StreamingHttpResponse
+from rest_framework.views import APIView
+
+from .compiled import get_compiled
+from .renderers import CSVRenderer, NDJSONRenderer, csv_writer, ndjson_line
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_rows(queryset, serializer_class, chunk_size):
+    """Yield the representation of every row of `queryset`."""
+    compiled = get_compiled(serializer_class)
+    if compiled is not None:
+        serialize = compiled.serialize
+        for row in queryset.values_list(*compiled.columns).iterator(chunk_size=chunk_size):
+            yield serialize(row)
+    else:
+        serializer = serializer_class()
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield serializer.to_representation(obj)
+
+
+def stream_ndjson(rows, chunk_size):
+    lines = []
+    for row in rows:
+        lines.append(ndjson_line(row))
+        if len(lines) >= chunk_size:
+            yield b''.join(lines)
+            lines = []
+    if lines:
+        yield b''.join(lines)
+
+
+def stream_csv(fields, rows, chunk_size):
+    writer = csv_writer()
+    lines = [writer.writerow(fields)]
+    for row in rows:
+        lines.append(writer.writerow([row[field] for field in fields]))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines).encode('utf-8')
+            lines = []
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+
+class ExportView(APIView):
+    """
+    Base class of the export views. Subclasses set `queryset`,
+    `serializer_class`, `filename` and optionally `filterset_class`, or
+    override `get_queryset`. Query parameters go through the FilterSet as
+    they do on the matching list view.
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    queryset = None
+    serializer_class = None
+    filterset_class = None
+    filename = None
+    chunk_size = EXPORT_CHUNK_SIZE
+
+    def get_queryset(self):
+        if self.queryset is None:
+            raise ImproperlyConfigured(
+                f"{self.__class__.__name__} is missing a queryset. Define "
+                f"{self.__class__.__name__}.queryset or override get_queryset()."
+            )
+        return self.queryset.all()
+
+    def get(self, request):
+        queryset = self.get_queryset()
+        if self.filterset_class is not None:
+            queryset = self.filterset_class(request.GET, queryset=queryset).qs
+        rows = export_rows(queryset.order_by('pk'), self.serializer_class, self.chunk_size)
+
+        renderer = request.accepted_renderer
+        if renderer.format == 'csv':
+            fields = [field.field_name for field in self.serializer_class()._readable_fields]
+            content = stream_csv(fields, rows, self.chunk_size)
+            content_type = f'{renderer.media_type}; charset={renderer.charset}'
+        else:
+            content = stream_ndjson(rows, self.chunk_size)
+            content_type = renderer.media_type
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.{renderer.format}"'
+        return response
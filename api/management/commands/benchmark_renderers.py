@@ -0,0 +1,87 @@
+import gzip
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import MessagePackRenderer, ORJSONRenderer
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from users.models import User
+
+ENDPOINTS = ('market-list', 'quiz-list-create', 'quizresult-list-create', 'investment-simulation-list')
+RENDERERS = (
+    ('json', JSONRenderer()),
+    ('orjson', ORJSONRenderer()),
+    ('msgpack', MessagePackRenderer()),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare render time and payload size (raw and gzipped) of the stdlib "
+        "JSON, orjson and MessagePack renderers on full pages of the list "
+        "endpoints. Rows are generated in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help="Rows per endpoint (pages hold up to 500).")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                for name in ENDPOINTS:
+                    self.compare(name, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        user = User.objects.create_user(username='benchmark-renderers')
+        markets = Market.objects.bulk_create([
+            Market(market_name=f"Market {i}", risk_level='Medium', description='Benchmark market ' * 4)
+            for i in range(rows)
+        ])
+        quizzes = Quiz.objects.bulk_create([Quiz(quiz_text=f"Question {i}: what is a bond?") for i in range(rows)])
+        QuizResult.objects.bulk_create([
+            QuizResult(user=user, quiz=quizzes[i], score=i % 100, money_earned=f"{i % 1000}.25")
+            for i in range(rows)
+        ])
+        InvestmentSimulation.objects.bulk_create([
+            InvestmentSimulation(
+                user=user, market_id=markets[i], amount_invested='1000.00',
+                outcome='gain' if i % 2 else 'loss', profit_loss=f"{(i % 200) - 100}.50",
+            )
+            for i in range(rows)
+        ])
+
+    def compare(self, name, repeat):
+        response = APIClient().get(reverse(name), {'page_size': 500})
+        data = response.data
+        self.stdout.write(f"{name} ({len(data['results'])} rows)")
+        baseline = None
+        for label, renderer in RENDERERS:
+            body = renderer.render(data)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                renderer.render(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            median = statistics.median(timings)
+            baseline = baseline or median
+            self.stdout.write(
+                f"  {label:<8} {median:7.2f} ms ({baseline / median:4.1f}x)  "
+                f"{len(body):>8} bytes  {len(gzip.compress(body)):>7} gzipped"
+            )
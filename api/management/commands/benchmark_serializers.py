@@ -0,0 +1,89 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import MarketSerializer, QuizResultSerializer
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the compiled values() serializers with the regular DRF path "
+        "on generated rows, and check that both render identical JSON. The "
+        "rows are created in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='1000,10000,100000',
+                            help="Comma separated row counts to benchmark.")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            counts = sorted(int(n) for n in options['rows'].split(','))
+        except ValueError:
+            raise CommandError("--rows must be a comma separated list of integers")
+        try:
+            with transaction.atomic():
+                self.run(counts, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, counts, repeat):
+        user = User.objects.create_user(username='benchmark-serializers')
+        quiz = Quiz.objects.create(quiz_text='Benchmark quiz')
+        created = 0
+        for count in counts:
+            Market.objects.bulk_create([
+                Market(market_name=f"Market {i}", risk_level='Medium', description='Benchmark market')
+                for i in range(created, count)
+            ], batch_size=1000)
+            QuizResult.objects.bulk_create([
+                QuizResult(user=user, quiz=quiz, score=i % 100, money_earned=f"{i % 1000}.25")
+                for i in range(created, count)
+            ], batch_size=1000)
+            created = count
+
+            for serializer_class, queryset in (
+                (MarketSerializer, Market.objects.filter(market_name__startswith='Market ').order_by('market_id')[:count]),
+                (QuizResultSerializer, QuizResult.objects.filter(quiz=quiz).order_by('id')[:count]),
+            ):
+                self.compare(serializer_class, queryset, count, repeat)
+
+    def compare(self, serializer_class, queryset, count, repeat):
+        def regular():
+            return serializers.ListSerializer(child=serializer_class()).to_representation(list(queryset))
+
+        def compiled():
+            return serializer_class(queryset, many=True).data
+
+        if JSONRenderer().render(regular()) != JSONRenderer().render(compiled()):
+            raise CommandError(f"{serializer_class.__name__}: compiled output differs at {count} rows")
+
+        regular_ms = self.time(regular, repeat)
+        compiled_ms = self.time(compiled, repeat)
+        self.stdout.write(
+            f"{serializer_class.__name__} x {count}: DRF {regular_ms:.1f} ms, "
+            f"compiled {compiled_ms:.1f} ms ({regular_ms / compiled_ms:.1f}x)"
+        )
+
+    @staticmethod
+    def time(fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
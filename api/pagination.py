@@ -0,0 +1,241 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPage(Sequence):
+    """
+    One page of an ordered queryset, fetched on first use. Iterating it
+    loads model instances; `values_list()` loads plain tuples instead (used
+    by the compiled serializers in api/compiled.py). Either way one extra
+    row is read to find out whether there is a next page.
+    """
+
+    def __init__(self, queryset, page_size, field, pk_field):
+        self.queryset = queryset
+        self.page_size = page_size
+        self.field = field
+        self.pk_field = pk_field
+        self._instances = None
+        self._has_next = None
+        self.last_key = None
+
+    @property
+    def loaded(self):
+        return self._has_next is not None
+
+    @property
+    def has_next(self):
+        if not self.loaded:
+            self._load()
+        return self._has_next
+
+    def _load(self):
+        rows = list(self.queryset[:self.page_size + 1])
+        self._has_next = len(rows) > self.page_size
+        self._instances = rows[:self.page_size]
+        if self._instances:
+            last = self._instances[-1]
+            self.last_key = (self.field.value_from_object(last), self.pk_field.value_from_object(last))
+
+    def values_list(self, *columns):
+        rows = list(self.queryset.values_list(*columns, self.field.attname, self.pk_field.attname)[:self.page_size + 1])
+        self._has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if rows:
+            self.last_key = rows[-1][-2:]
+        return [row[:-2] for row in rows]
+
+    async def avalues_list(self, *columns):
+        """`values_list` for async views."""
+        queryset = self.queryset.values_list(*columns, self.field.attname, self.pk_field.attname)[:self.page_size + 1]
+        rows = [row async for row in queryset]
+        self._has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if rows:
+            self.last_key = rows[-1][-2:]
+        return [row[:-2] for row in rows]
+
+    async def aload(self):
+        """Load the page's instances for async views."""
+        rows = [row async for row in self.queryset[:self.page_size + 1]]
+        self._has_next = len(rows) > self.page_size
+        self._instances = rows[:self.page_size]
+        if self._instances:
+            last = self._instances[-1]
+            self.last_key = (self.field.value_from_object(last), self.pk_field.value_from_object(last))
+        return self._instances
+
+    def _instances_loaded(self):
+        if self._instances is None:
+            self._load()
+        return self._instances
+
+    def __len__(self):
+        return len(self._instances_loaded())
+
+    def __getitem__(self, index):
+        return self._instances_loaded()[index]
+
+    def __iter__(self):
+        return iter(self._instances_loaded())
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor keyset pagination for the list views.
+
+    Pages are ordered by a sortable field with the primary key as tie-breaker,
+    and the cursor stores the (value, pk) pair of the last row returned. The
+    next page is fetched with a `WHERE (field, pk) > (value, pk)` predicate,
+    so there is never an OFFSET scan or a COUNT(*), whatever the table size.
+    The cursor is applied on top of the already filtered queryset, which
+    keeps it compatible with the FilterSet classes used by the views.
+    """
+
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        field_name = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        pk_name = queryset.model._meta.pk.name
+        self.field = queryset.model._meta.get_field(field_name)
+        self.pk_field = queryset.model._meta.pk
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            after = 'lt' if descending else 'gt'
+            if field_name == pk_name:
+                queryset = queryset.filter(**{f'{pk_name}__{after}': pk})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{field_name}__{after}': value})
+                    | Q(**{field_name: value, f'{pk_name}__{after}': pk})
+                )
+
+        prefix = '-' if descending else ''
+        if field_name == pk_name:
+            queryset = queryset.order_by(f'{prefix}{pk_name}')
+        else:
+            queryset = queryset.order_by(f'{prefix}{field_name}', f'{prefix}{pk_name}')
+
+        self.page = KeysetPage(queryset, self.page_size, self.field, self.pk_field)
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the requested ordering if the view allows it, otherwise the
+        primary key. Views opt extra fields in through `ordering_fields`.
+        """
+        pk_name = queryset.model._meta.pk.name
+        allowed = {pk_name, *getattr(view, 'ordering_fields', ())}
+        ordering = request.query_params.get(self.ordering_query_param, '')
+        if ordering.lstrip('-') in allowed:
+            return ordering
+        return pk_name
+
+    def get_next_link(self):
+        if not self.page.has_next:
+            return None
+        value, pk = self.page.last_key
+        cursor = self.encode_cursor(value, pk)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def encode_cursor(self, value, pk):
+        payload = {'o': self.ordering, 'v': self._to_primitive(value), 'p': pk}
+        raw = json.dumps(payload, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            # A cursor is only meaningful for the ordering it was issued for.
+            if payload['o'] != self.ordering:
+                raise NotFound(self.invalid_cursor_message)
+            value = self.field.to_python(payload['v'])
+            pk = self.pk_field.to_python(payload['p'])
+        except (KeyError, TypeError, ValueError, UnicodeEncodeError,
+                binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if pk is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    @staticmethod
+    def _to_primitive(value):
+        if isinstance(value, Decimal):
+            return str(value)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+
+class KeysetPaginationMixin:
+    """
+    Gives an `APIView` the `paginate_queryset` / `get_paginated_response`
+    pair that DRF's generic views expose, backed by `pagination_class`.
+    """
+
+    pagination_class = KeysetPagination
+    ordering_fields = ()
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = self.pagination_class()
+        return self._paginator
+
+    def paginate_queryset(self, queryset):
+        return self.paginator.paginate_queryset(queryset, self.request, view=self)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
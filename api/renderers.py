@@ -0,0 +1,103 @@
+"""
+Renderers used in place of DRF's stdlib `json` renderer.
+
+`ORJSONRenderer` produces the same JSON as `JSONRenderer` for compact
+output. Types orjson does not handle the way DRF does (datetimes,
+Decimal, lazy strings and so on) go through DRF's own encoder, so
+`Decimal` keeps rendering as a number and datetimes keep their `Z`
+suffix. Serializer output already renders decimals such as `amount`,
+`profit_loss` and `money_earned` as strings. Indented output, which only
+the browsable API and `Accept: application/json; indent=N` ask for,
+falls back to the stdlib renderer.
+
+`MessagePackRenderer` is chosen with `Accept: application/msgpack`.
+`NDJSONRenderer` and `CSVRenderer` are offered by the export views in
+api/export.py, which stream their rows with `ndjson_line` and
+`csv_writer` instead of rendering a list.
+"""
+import csv
+
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def encode_default(obj):
+    """Convert what orjson and msgpack cannot encode, as DRF's encoder does."""
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.compact or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        # Keep the output a strict javascript subset, as JSONRenderer does.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """One JSON document per line; a list renders one line per item."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(ndjson_line(item) for item in items)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """A header row from the first item's keys, then one row per item."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        if not items:
+            return b''
+        fields = list(items[0])
+        writer = csv_writer()
+        lines = [writer.writerow(fields)]
+        lines.extend(writer.writerow([item.get(field) for field in fields]) for item in items)
+        return ''.join(lines).encode(self.charset)
+
+
+def ndjson_line(item):
+    return orjson.dumps(item, default=encode_default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_writer():
+    """A csv writer whose `writerow` returns the formatted line."""
+    return csv.writer(_Echo())
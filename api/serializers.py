@@ -1,37 +1,43 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from market.models import Market
-from investment_simulation.models import InvestmentSimulation
+from investment_simulation.models import InvestmentSimulation, SimulationJob
+from investment_simulation.backtest import DEFAULT_EVERY, STRATEGIES
 from quizzes.models import Quiz
 from quiz_results.models import QuizResult
 from assessment.models import Assessment
 from django.contrib.auth.models import User
-from virtualmoney.models import VirtualMoney
-from achievements.models import Achievement
-from users.models import User
+from virtualmoney.models import VirtualMoney, WalletBalance, WalletLedgerEntry
+from achievements.models import Achievement, AchievementRule
+from achievements.rules import RuleError, compile_rule
+from users.models import User, UserStats
 from django.contrib.auth.hashers import make_password
+from decimal import Decimal
+from .compiled import CompiledModelSerializer
 
 
       
 """     
 Serializer for the Market model which include all fields in the serialized output 
 """
-class MarketSerializer(serializers.ModelSerializer):
+class MarketSerializer(CompiledModelSerializer):
    class Meta:
        model = Market
        fields = '__all__'
 """
 Serializer for the InvestmentSimulation model which include all fields in the serialized output
 """
-class InvestmentSimulationSerializer(serializers.ModelSerializer):
+class InvestmentSimulationSerializer(CompiledModelSerializer):
    class Meta:
        model = InvestmentSimulation
        fields = '__all__'
+       read_only_fields = ['hypothetical']
 """
 Serializer for the Quiz model, handling all fields of the model
 Specify the model the serializer should use
 Use all fields of the Quiz model
 """
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(CompiledModelSerializer):
    class Meta:
        model = Quiz
        fields = "__all__"
@@ -40,11 +46,11 @@ Serializer for the QuizResult model, handling all fields of the model
 Specify the model the serializer should use
 Use all fields of the QuizResult model
 """
-class QuizResultSerializer(serializers.ModelSerializer):
+class QuizResultSerializer(CompiledModelSerializer):
    class Meta:
        model = QuizResult
        fields = "__all__"
-class AssessmentSerializer(serializers.ModelSerializer):
+class AssessmentSerializer(CompiledModelSerializer):
    """
    Serializer for the Assessment model.
    This serializer converts Assessment model instances into JSON format
@@ -62,13 +68,18 @@ when retrieving or creating a user instance, including sensitive fields like `pa
 """
 
 
-class UserSerializer(serializers.ModelSerializer):
+# Usernames stay taken after their user is soft deleted.
+UNIQUE_USERNAME = {'validators': [UniqueValidator(queryset=User.all_objects.all())]}
+
+
+class UserSerializer(CompiledModelSerializer):
    confirm_password = serializers.CharField(write_only=True)  # Extra field to handle confirm_password
 
 
    class Meta:
        model = User
        fields = "__all__"
+       extra_kwargs = {'username': UNIQUE_USERNAME}
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -116,7 +127,8 @@ class RegisterSerializer(serializers.ModelSerializer):
        model = User
        fields = '__all__'  # Include all fields from the User model
        extra_kwargs = {
-           'password': {'write_only': True}  # Ensure the password is write-only
+           'password': {'write_only': True},  # Ensure the password is write-only
+           'username': UNIQUE_USERNAME,
        }
    def create(self, validated_data):
        # Extract the password from validated_data
@@ -129,7 +141,7 @@ class RegisterSerializer(serializers.ModelSerializer):
        # Save the user to the database
        user.save()
        return user
-class VirtualMoneySerializer(serializers.ModelSerializer):
+class VirtualMoneySerializer(CompiledModelSerializer):
     class Meta:
         model = VirtualMoney
         fields = '__all__'
@@ -143,10 +155,204 @@ class VirtualMoneySerializer(serializers.ModelSerializer):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than zero.")
         return value
-class AchievementSerializer(serializers.ModelSerializer):
+class AchievementSerializer(CompiledModelSerializer):
    class Meta:
        model = Achievement
        fields = '__all__'
 
 
+class AchievementRuleSerializer(CompiledModelSerializer):
+   """
+   Validates a rule by compiling its conditions, so a bad rule is rejected
+   here rather than when the next event is evaluated.
+   """
+   class Meta:
+       model = AchievementRule
+       fields = '__all__'
+       read_only_fields = ['is_active']
+
+   def validate(self, data):
+       rule = AchievementRule(
+           trigger=data.get('trigger', getattr(self.instance, 'trigger', None)),
+           conditions=data.get('conditions', getattr(self.instance, 'conditions', {})),
+       )
+       try:
+           compile_rule(rule)
+       except RuleError as e:
+           raise serializers.ValidationError({'conditions': str(e)})
+       return data
+
+
+class WalletBalanceSerializer(serializers.ModelSerializer):
+   class Meta:
+       model = WalletBalance
+       fields = '__all__'
+
+
+class UserStatsSerializer(serializers.ModelSerializer):
+   """
+   A user's dashboard counters, with their username and wallet balance.
+   The view sets `balance` on the instance from the user's wallet row.
+   """
+   username = serializers.CharField(source='user.username', read_only=True)
+   average_score = serializers.FloatField(read_only=True)
+   balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+   class Meta:
+       model = UserStats
+       fields = [
+           'user', 'username', 'quizzes_taken', 'average_score', 'money_earned',
+           'achievements', 'active_simulations', 'balance', 'updated_at',
+       ]
+
+
+class WalletLedgerEntrySerializer(CompiledModelSerializer):
+   class Meta:
+       model = WalletLedgerEntry
+       fields = '__all__'
+
+
+class MonteCarloRequestSerializer(serializers.Serializer):
+   """
+   Validates a Monte Carlo run request. `paths` x `steps` is capped so a
+   single request cannot monopolise a worker.
+   """
+   MAX_CELLS = 10_000_000
+
+   market_id = serializers.PrimaryKeyRelatedField(queryset=Market.objects.all())
+   amount_invested = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+   paths = serializers.IntegerField(min_value=1, max_value=100_000, default=10_000)
+   steps = serializers.IntegerField(min_value=1, max_value=2520, default=252)
+   seed = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+
+   def validate(self, data):
+       if data['paths'] * data['steps'] > self.MAX_CELLS:
+           raise serializers.ValidationError(f"paths x steps must not exceed {self.MAX_CELLS}.")
+       return data
+
+   def job_params(self):
+       """JSON-safe parameters for a queued job, snapshotting the market's risk level."""
+       data = self.validated_data
+       return {
+           'market_id': data['market_id'].market_id,
+           'risk_level': data['market_id'].risk_level,
+           'amount_invested': str(data['amount_invested']),
+           'paths': data['paths'],
+           'steps': data['steps'],
+           'seed': data['seed'],
+       }
+
+
+class SimulationJobRequestSerializer(serializers.Serializer):
+   """
+   Validates the envelope of a job submission; the remaining fields are
+   validated by the serializer registered for the job kind.
+   """
+   PARAMS_SERIALIZERS = {
+       SimulationJob.MONTE_CARLO: MonteCarloRequestSerializer,
+   }
+
+   user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+   kind = serializers.ChoiceField(choices=SimulationJob.KIND_CHOICES, default=SimulationJob.MONTE_CARLO)
+
+
+class SimulationJobSerializer(CompiledModelSerializer):
+   class Meta:
+       model = SimulationJob
+       fields = '__all__'
+
+
+class BacktestStrategySerializer(serializers.Serializer):
+   """
+   A strategy and its settings. `every` is the number of daily bars between
+   DCA purchases or rebalances; `weights` splits money across the markets
+   (equal weights when omitted).
+   """
+   strategy = serializers.ChoiceField(choices=STRATEGIES)
+   every = serializers.IntegerField(min_value=1, default=DEFAULT_EVERY)
+   weights = serializers.ListField(child=serializers.FloatField(min_value=0), required=False, default=list)
+
+
+class BacktestRequestSerializer(BacktestStrategySerializer):
+   """
+   A single backtest of one strategy over one or more markets.
+   """
+   user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False, allow_null=True, default=None)
+   market_ids = serializers.ListField(
+       child=serializers.PrimaryKeyRelatedField(queryset=Market.objects.all()),
+       min_length=1,
+       max_length=20,
+   )
+   amount_invested = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+   start = serializers.DateTimeField()
+   end = serializers.DateTimeField()
+
+   def validate(self, data):
+       if data['start'] >= data['end']:
+           raise serializers.ValidationError("start must be before end.")
+       if data['weights'] and len(data['weights']) != len(data['market_ids']):
+           raise serializers.ValidationError("weights must have one entry per market.")
+       return data
+
+
+class BacktestBatchRequestSerializer(serializers.Serializer):
+   """
+   Every strategy in `strategies` is run against every market group in
+   `markets` (a list of lists of market IDs).
+   """
+   MAX_RUNS = 200
+
+   user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False, allow_null=True, default=None)
+   strategies = BacktestStrategySerializer(many=True, allow_empty=False)
+   markets = serializers.ListField(
+       child=serializers.ListField(
+           child=serializers.PrimaryKeyRelatedField(queryset=Market.objects.all()),
+           min_length=1,
+           max_length=20,
+       ),
+       min_length=1,
+   )
+   amount_invested = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+   start = serializers.DateTimeField()
+   end = serializers.DateTimeField()
+
+   def validate(self, data):
+       if data['start'] >= data['end']:
+           raise serializers.ValidationError("start must be before end.")
+       if len(data['strategies']) * len(data['markets']) > self.MAX_RUNS:
+           raise serializers.ValidationError(f"At most {self.MAX_RUNS} strategy x market runs per batch.")
+       for strategy in data['strategies']:
+           for group in data['markets']:
+               if strategy['weights'] and len(strategy['weights']) != len(group):
+                   raise serializers.ValidationError("weights must have one entry per market in every group.")
+       return data
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+   """
+   One sub-request of a batch: a method and path under /api/ (query string
+   included), an optional JSON body and optional request headers.
+   """
+   METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+   id = serializers.CharField(required=False, max_length=100)
+   method = serializers.ChoiceField(choices=METHODS, default='GET')
+   path = serializers.RegexField(r'^/api/', max_length=2000)
+   body = serializers.JSONField(required=False)
+   headers = serializers.DictField(child=serializers.CharField(max_length=1000), required=False, default=dict)
+
+   def to_internal_value(self, data):
+       if isinstance(data, dict) and isinstance(data.get('method'), str):
+           data = {**data, 'method': data['method'].upper()}
+       return super().to_internal_value(data)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+   """
+   Sub-requests run in order. With `parallel`, each run of consecutive GET
+   sub-requests runs concurrently instead.
+   """
+   MAX_REQUESTS = 20
 
+   requests = BatchSubRequestSerializer(many=True, allow_empty=False, max_length=MAX_REQUESTS)
+   parallel = serializers.BooleanField(default=False)
@@ -0,0 +1,38 @@
+"""
+Invalidate cached detail payloads (see api/cache.py) when their objects
+change: saves and deletes retire the object's entries, bulk writes their
+table's. Both run immediately and again after the transaction commits.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from achievements.models import Achievement
+from assessment.models import Assessment
+from market.models import Market
+from quizzes.models import Quiz
+from versioning.versions import bulk_write
+
+from .cache import detail_cache
+
+DETAIL_CACHED_MODELS = (Market, Quiz, Assessment, Achievement, get_user_model())
+
+
+def invalidate_detail(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pk = instance.pk
+    detail_cache.invalidate(sender, pk)
+    transaction.on_commit(lambda: detail_cache.invalidate(sender, pk))
+
+
+def invalidate_table(sender, **kwargs):
+    detail_cache.invalidate_table(sender)
+    transaction.on_commit(lambda: detail_cache.invalidate_table(sender))
+
+
+for model in DETAIL_CACHED_MODELS:
+    label = model._meta.label_lower
+    post_save.connect(invalidate_detail, sender=model, dispatch_uid=f'detail_cache_save_{label}')
+    post_delete.connect(invalidate_detail, sender=model, dispatch_uid=f'detail_cache_delete_{label}')
+    bulk_write.connect(invalidate_table, sender=model, dispatch_uid=f'detail_cache_bulk_{label}')
@@ -0,0 +1,165 @@
+"""
+Single-flight computation of expensive GET responses.
+
+Concurrent identical requests (same host, path, normalized query string
+and Accept header) share one computation. Threads of a worker wait on the
+leader's flight. Other workers see the leader's lock, an atomic `add()`
+on the shared cache (a row insert with the database backend), and poll
+for its result instead of recomputing.
+
+Responses are stored with the table versions they were built from. Once a
+table changes, the stored response is stale: one request rebuilds it,
+while concurrent requests keep getting the stale copy for up to
+SINGLE_FLIGHT_MAX_STALE seconds (stale-while-revalidate). A stale copy
+carries the ETag of the versions it was built from, not the current one.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from versioning.versions import get_versions
+
+from .conditional import etag_from_versions
+
+MISSING = object()
+POLL_INTERVAL = 0.05
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = MISSING
+
+
+class SingleFlight:
+    def __init__(self, alias='shared', wait_timeout=5.0, max_stale=60.0, timeout=300):
+        self.alias = alias
+        self.wait_timeout = wait_timeout
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def usable_stale(self, entry):
+        return entry is not None and time.time() - entry['built_at'] <= self.max_stale
+
+    def run(self, key, version, compute):
+        """
+        Return the result of `compute()` for `key` at `version`, computing it
+        at most once across concurrent callers. `compute` returns a
+        (result, cacheable) pair; results that are not cacheable are
+        returned to their caller only.
+        """
+        return self.run_versioned(key, version, compute)[0]
+
+    def run_versioned(self, key, version, compute):
+        """
+        `run`, returning a (result, version) pair: the version the result
+        was built at, older than `version` when a stale result is served.
+        """
+        entry = self.cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry['result'], version
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            if self.usable_stale(entry):
+                return entry['result'], entry['version']
+            flight.done.wait(self.wait_timeout)
+            if flight.result is not MISSING:
+                return flight.result
+            return compute()[0], version
+
+        try:
+            result, built, cacheable = self._lead(key, version, entry, compute)
+            if cacheable:
+                flight.result = result, built
+            return result, built
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _lead(self, key, version, entry, compute):
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not self.cache.add(lock_key, token, self.wait_timeout * 2):
+            # Another worker is computing it.
+            if self.usable_stale(entry):
+                return entry['result'], entry['version'], True
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                entry = self.cache.get(key)
+                if entry is not None and entry['version'] == version:
+                    return entry['result'], version, True
+                if self.cache.get(lock_key) is None:
+                    break
+            result, cacheable = compute()
+            return result, version, cacheable
+        try:
+            result, cacheable = compute()
+            if cacheable:
+                self.cache.set(key, {'version': version, 'result': result, 'built_at': time.time()}, self.timeout)
+            return result, version, cacheable
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+
+flights = SingleFlight(
+    wait_timeout=getattr(settings, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 5.0),
+    max_stale=getattr(settings, 'SINGLE_FLIGHT_MAX_STALE', 60.0),
+)
+
+
+def request_key(request):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    variant = f"{request.get_host()}|{request.path}|{query}|{request.META.get('HTTP_ACCEPT', '')}"
+    return f"flight:{hashlib.sha1(variant.encode()).hexdigest()}"
+
+
+def single_flight(*models):
+    """
+    Decorate a list GET handler whose output depends only on `models`, so
+    concurrent identical requests share one computation.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            responses = []
+
+            def compute():
+                response = handler(view, request, *args, **kwargs)
+                responses.append(response)
+                return response.data, response.status_code == 200
+
+            versions = get_versions(*models)
+            data, built = flights.run_versioned(request_key(request), versions, compute)
+            # The handler's own response when this request computed it.
+            if responses:
+                return responses[0]
+            response = Response(data)
+            if list(built) != list(versions):
+                # A stale body carries the ETag of the versions it was built
+                # at, so revalidating it later cannot match a newer version.
+                response['ETag'] = etag_from_versions(request, built)
+            return response
+        return wrapper
+    return decorator
@@ -1,3 +1,941 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase, APIClient, APITransactionTestCase
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from market.models import Market
+from quizzes.models import Quiz
+from quiz_results.models import QuizResult
+from users.models import User
+from api.cache import MISSING, LRUCache, detail_cache
+from api.compiled import get_compiled
+from api.pagination import KeysetPage, KeysetPaginationMixin
+from api.serializers import (
+    InvestmentSimulationSerializer, MarketSerializer, QuizResultSerializer,
+    SimulationJobSerializer, UserSerializer, VirtualMoneySerializer,
+)
+from api.singleflight import SingleFlight, request_key
+from investment_simulation.models import InvestmentSimulation, SimulationJob
+from rest_framework.renderers import JSONRenderer
+from api.renderers import MessagePackRenderer, ORJSONRenderer
+from virtualmoney.models import VirtualMoney, WalletBalance, WalletLedgerEntry
+from achievements.models import Achievement, AchievementRule
+from assessment.models import Assessment
+from leaderboard.boards import reset_boards
+from leaderboard.models import LeaderboardEntry
+from market.timeseries import ingest_bars
+from api import batch, urls as api_urls
+from api.async_views import AsyncListView
+from api.export import ExportView
+from versioning.versions import get_versions
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Market.objects.bulk_create([
+            Market(market_name=f"Market {i:02d}", risk_level="Low", description="Test market")
+            for i in range(7)
+        ])
+        self.market_list_url = reverse('market-list')
+
+    def collect(self, url):
+        """Follow `next` links until the last page and return every row seen."""
+        rows = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rows.extend(response.data['results'])
+            url = response.data['next']
+        return rows
+
+    def test_first_page_is_capped_and_has_next_cursor(self):
+        response = self.client.get(self.market_list_url, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIn('cursor=', response.data['next'])
+
+    def test_following_cursors_returns_every_row_once_in_pk_order(self):
+        rows = self.collect(f"{self.market_list_url}?page_size=3")
+        ids = [row['market_id'] for row in rows]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), Market.objects.count())
+
+    def test_last_page_has_no_next_cursor(self):
+        response = self.client.get(self.market_list_url, {'page_size': 100})
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(self.market_list_url, {'page_size': 10 ** 6})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_descending_ordering_on_sortable_field(self):
+        rows = self.collect(f"{self.market_list_url}?page_size=2&ordering=-market_name")
+        names = [row['market_name'] for row in rows]
+        self.assertEqual(names, sorted(names, reverse=True))
+
+    def test_unknown_ordering_falls_back_to_primary_key(self):
+        response = self.client.get(self.market_list_url, {'ordering': 'description'})
+        ids = [row['market_id'] for row in response.data['results']]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.market_list_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        response = self.client.get(self.market_list_url, {'page_size': 2})
+        next_url = response.data['next'] + '&ordering=-market_name'
+        response = self.client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pagination_respects_filterset(self):
+        user = User.objects.create_user(username="learner", password="testpassword")
+        quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        QuizResult.objects.bulk_create([
+            QuizResult(user=user, quiz=quiz, score=score, money_earned=10)
+            for score in (40, 55, 70, 85, 90, 95)
+        ])
+        url = f"{reverse('quizresult-list-create')}?page_size=2&score_min=70&ordering=-score"
+        scores = [row['score'] for row in self.collect(url)]
+        self.assertEqual(scores, [95, 90, 85, 70])
+
+    def test_ties_on_ordering_field_are_broken_by_primary_key(self):
+        Market.objects.update(risk_level="Medium")
+        rows = self.collect(f"{self.market_list_url}?page_size=2&ordering=risk_level")
+        ids = [row['market_id'] for row in rows]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), Market.objects.count())
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        self.market_list_url = reverse('market-list')
+        self.market_detail_url = reverse('market-detail', args=[self.market.market_id])
+
+    def test_get_sets_strong_etag(self):
+        response = self.client.get(self.market_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertNotEqual(response['ETag'], self.client.get(self.market_list_url)['ETag'])
+
+    def test_matching_etag_returns_304_with_one_query(self):
+        etag = self.client.get(self.market_list_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.market_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_query_string_changes_etag(self):
+        etag = self.client.get(self.market_list_url)['ETag']
+        response = self.client.get(self.market_list_url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_save_soft_delete_and_bulk_update_change_etag(self):
+        etags = [self.client.get(self.market_list_url)['ETag']]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.market.description = "Updated"
+            self.market.save()
+        etags.append(self.client.get(self.market_list_url)['ETag'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.market.soft_delete()
+        etags.append(self.client.get(self.market_list_url)['ETag'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.all_objects.restore()
+        etags.append(self.client.get(self.market_list_url)['ETag'])
+        self.assertEqual(len(set(etags)), 4)
+
+    def test_other_tables_do_not_change_etag(self):
+        etag = self.client.get(self.market_list_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Quiz.objects.create(quiz_text="Sample quiz text")
+        response = self.client.get(self.market_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_object_has_no_etag(self):
+        response = self.client.get(reverse('market-detail', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class DetailCacheTests(APITestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        # A local tier and counters of its own, so hits don't leak between tests.
+        for patcher in (
+            mock.patch.object(detail_cache, 'local', LRUCache(100)),
+            mock.patch.object(detail_cache, 'shared_hits', 0),
+            mock.patch.object(detail_cache, 'shared_misses', 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        self.market_detail_url = reverse('market-detail', args=[self.market.market_id])
+
+    def test_repeated_get_is_served_from_local_tier(self):
+        first = self.client.get(self.market_detail_url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.market_detail_url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(detail_cache.local.hits, 1)
+
+    def test_shared_tier_refills_local_tier(self):
+        self.client.get(self.market_detail_url)
+        detail_cache.local.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.market_detail_url)
+        self.assertEqual(response.data['market_name'], "Stocks")
+        self.assertEqual(detail_cache.stats()['shared']['hits'], 1)
+
+    def test_not_modified_costs_one_query(self):
+        etag = self.client.get(self.market_detail_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.market_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.market.save()
+        response = self.client.get(self.market_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_save_and_soft_delete_invalidate(self):
+        self.client.get(self.market_detail_url)
+        self.market.description = "Updated"
+        self.market.save()
+        self.assertEqual(self.client.get(self.market_detail_url).data['description'], "Updated")
+        self.market.soft_delete()
+        self.assertEqual(self.client.get(self.market_detail_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_update_invalidates(self):
+        self.client.get(self.market_detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.objects.filter(pk=self.market.pk).update(description="Bulk")
+        self.assertEqual(self.client.get(self.market_detail_url).data['description'], "Bulk")
+
+    def test_bulk_update_is_seen_before_commit_and_spares_other_keys(self):
+        self.client.get(self.market_detail_url)
+        caches['shared'].set('flight:other', 'kept')
+        Market.objects.filter(pk=self.market.pk).update(description="Bulk")
+        self.assertEqual(self.client.get(self.market_detail_url).data['description'], "Bulk")
+        self.assertEqual(caches['shared'].get('flight:other'), 'kept')
+
+    def test_payload_stored_after_a_commit_is_not_served_at_the_new_version(self):
+        version, _ = detail_cache.lookup(Market, self.market.pk)
+        payload = dict(self.client.get(self.market_detail_url).data)
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.objects.filter(pk=self.market.pk).update(description="Committed")
+        # A request that read the row before the commit stores it afterwards.
+        detail_cache.set(Market, self.market.pk, version, payload)
+        detail_cache.local.clear()  # another worker
+        self.assertEqual(self.client.get(self.market_detail_url).data['description'], "Committed")
+
+    def test_writes_to_other_rows_spare_the_entry(self):
+        etag = self.client.get(self.market_detail_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Market.objects.create(market_name="Bonds", risk_level="Low", description="Bonds")
+            other.description = "Updated"
+            other.save()
+        response = self.client.get(self.market_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.get(self.market_detail_url)
+        self.assertEqual((detail_cache.local.hits, detail_cache.local.misses), (2, 1))
+
+    def test_evicted_version_does_not_revive_an_entry(self):
+        self.client.get(self.market_detail_url)
+        detail_cache.shared.delete_many(detail_cache.version_keys(Market, self.market.pk))
+        detail_cache.local.clear()
+        self.client.get(self.market_detail_url)
+        self.assertEqual(detail_cache.stats()['shared']['hits'], 0)
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = LRUCache(max_entries=2)
+        lru.set('a', 1, 'A')
+        lru.set('b', 1, 'B')
+        lru.get('a', 1)
+        lru.set('c', 1, 'C')
+        self.assertIs(lru.get('b', 1), MISSING)
+        self.assertEqual(lru.get('a', 1), 'A')
+        self.assertEqual(lru.evictions, 1)
+
+    def test_stats_endpoint(self):
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['local']), {'hits', 'misses', 'evictions', 'size', 'max_entries'})
+
+
+class SingleFlightTests(APITestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.flight = SingleFlight(alias='default', wait_timeout=2, max_stale=60)
+        self.calls = 0
+
+    def compute(self, result='fresh', delay=0.0, cacheable=True):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return result, cacheable
+        return compute
+
+    def test_concurrent_callers_share_one_computation(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.run('key', [1], self.compute(delay=0.2))))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['fresh'] * 10)
+        self.assertEqual(self.calls, 1)
+
+    def test_current_version_is_served_without_computing(self):
+        self.flight.run('key', [1], self.compute())
+        self.assertEqual(self.flight.run('key', [1], self.compute('other')), 'fresh')
+        self.assertEqual(self.flight.run('key', [2], self.compute('newer')), 'newer')
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_result_is_served_while_another_worker_rebuilds(self):
+        self.flight.run('key', [1], self.compute('old'))
+        caches['default'].add('key:lock', 'other-worker')
+        self.assertEqual(self.flight.run('key', [2], self.compute('new')), 'old')
+        self.assertEqual(self.calls, 1)
+
+    def test_waits_for_another_workers_result(self):
+        caches['default'].add('key:lock', 'other-worker')
+        timer = threading.Timer(0.2, lambda: caches['default'].set(
+            'key', {'version': [1], 'result': 'theirs', 'built_at': time.time()}
+        ))
+        timer.start()
+        self.assertEqual(self.flight.run('key', [1], self.compute('mine')), 'theirs')
+        timer.join()
+        self.assertEqual(self.calls, 0)
+
+    def test_uncacheable_result_is_not_stored(self):
+        self.flight.run('key', [1], self.compute('error', cacheable=False))
+        self.assertEqual(self.flight.run('key', [1], self.compute()), 'fresh')
+        self.assertEqual(self.calls, 2)
+
+    def test_list_view_serves_rebuilt_response_after_change(self):
+        url = reverse('market-list')
+        Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.objects.create(market_name="Bonds", risk_level="Low", description="Bonds")
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+    def test_stale_response_carries_the_etag_it_was_built_at(self):
+        url = reverse('market-list')
+        Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        with mock.patch('api.singleflight.flights', self.flight):
+            first = self.client.get(url)
+            with self.captureOnCommitCallbacks(execute=True):
+                Market.objects.create(market_name="Bonds", risk_level="Low", description="Bonds")
+            lock_key = f"{request_key(RequestFactory().get(url))}:lock"
+            caches['default'].add(lock_key, 'other-worker')
+            stale = self.client.get(url)
+            self.assertEqual(len(stale.data['results']), 1)
+            self.assertEqual(stale['ETag'], first['ETag'])
+            caches['default'].delete(lock_key)
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(revalidated.data['results']), 2)
+        self.assertNotEqual(revalidated['ETag'], stale['ETag'])
+
+
+class CompiledSerializerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="learner", password="testpassword", gender="Female")
+        User.objects.create_user(username="other", password="testpassword")
+        quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        QuizResult.objects.create(user=self.user, quiz=quiz, score=80, money_earned="12.50")
+        VirtualMoney.objects.create(user=self.user, amount="100.00")
+        InvestmentSimulation.objects.create(
+            user=self.user, market_id=self.market, amount_invested="50.00", outcome="gain", profit_loss="-3.25",
+        )
+        SimulationJob.objects.create(user=self.user, params={'paths': 10, 'seed': None})
+
+    def assertSameOutput(self, serializer_class):
+        model = serializer_class.Meta.model
+        self.assertIsNotNone(get_compiled(serializer_class))
+        expected = JSONRenderer().render(serializer_class(list(model.objects.all()), many=True).data)
+        compiled = JSONRenderer().render(serializer_class(model.objects.all(), many=True).data)
+        self.assertEqual(compiled, expected)
+
+    def test_output_is_byte_identical_to_drf(self):
+        for serializer_class in (
+            MarketSerializer, QuizResultSerializer, VirtualMoneySerializer,
+            UserSerializer, InvestmentSimulationSerializer, SimulationJobSerializer,
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assertSameOutput(serializer_class)
+
+    def test_list_view_does_not_build_instances(self):
+        url = reverse('market-list')
+        Market.objects.bulk_create([
+            Market(market_name=f"Market {i:02d}", risk_level="Low", description="Test market")
+            for i in range(4)
+        ])
+        expected = MarketSerializer(list(Market.objects.order_by('market_id')[:2]), many=True).data
+        with mock.patch.object(Market, 'from_db', side_effect=AssertionError("instance built")):
+            response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.data['results'], expected)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_every_list_view_takes_the_compiled_path(self):
+        route_kwargs = {'wallet-ledger': {'user_id': self.user.user_id}}
+        self.client.force_authenticate(self.user)
+        for pattern in api_urls.urlpatterns:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is None or not issubclass(view_class, KeysetPaginationMixin):
+                continue
+            url = reverse(pattern.name, kwargs=route_kwargs.get(pattern.name, {}))
+            with self.subTest(route=pattern.name), \
+                    mock.patch.object(KeysetPage, '_load', side_effect=AssertionError("instances loaded")):
+                self.assertEqual(self.client.get(url, {'page_size': 1}).status_code, status.HTTP_200_OK)
+
+    def test_serializer_with_method_field_is_not_compiled(self):
+        class NamedMarketSerializer(MarketSerializer):
+            label = serializers.SerializerMethodField()
+
+            def get_label(self, obj):
+                return obj.market_name.upper()
+
+        self.assertIsNone(get_compiled(NamedMarketSerializer))
+        data = NamedMarketSerializer(Market.objects.all(), many=True).data
+        self.assertEqual(data[0]['label'], "STOCKS")
+
+
+class RendererTests(APITestCase):
+    def setUp(self):
+        self.market = Market.objects.create(market_name="Stocks \u2028 Ação", risk_level="High", description="Stock market")
+        self.market_list_url = reverse('market-list')
+
+    def test_orjson_output_matches_json_renderer(self):
+        data = {
+            'amount': Decimal('10.25'),
+            'when': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy("Market"),
+            'nested': [MarketSerializer(self.market).data, (1, 2.5, None, True)],
+            1: 'integer key',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_json_renderer(self):
+        data = {'a': [1, 2]}
+        accepted = 'application/json; indent=4'
+        self.assertEqual(ORJSONRenderer().render(data, accepted, {}), JSONRenderer().render(data, accepted, {}))
+
+    def test_msgpack_is_negotiated_through_accept(self):
+        json_response = self.client.get(self.market_list_url)
+        response = self.client.get(self.market_list_url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+
+    def test_msgpack_renders_decimals_like_json(self):
+        data = {'amount': Decimal('10.25')}
+        self.assertEqual(msgpack.unpackb(MessagePackRenderer().render(data)), {'amount': 10.25})
+
+    def test_msgpack_request_body(self):
+        body = msgpack.packb({'market_name': "Bonds", 'risk_level': "Low", 'description': "Bonds"})
+        response = self.client.post(self.market_list_url, body, content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Market.objects.filter(market_name="Bonds").exists())
+
+    def test_malformed_bodies_are_rejected(self):
+        for body, content_type in ((b'{"market_name": ', 'application/json'), (b'\xc1', 'application/msgpack')):
+            with self.subTest(content_type=content_type):
+                response = self.client.post(self.market_list_url, body, content_type=content_type)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="learner", password="testpassword")
+        other = User.objects.create_user(username="other", password="testpassword")
+        quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        QuizResult.objects.bulk_create([
+            QuizResult(user=self.user if score % 20 else other, quiz=quiz, score=score, money_earned="10.50")
+            for score in range(0, 100, 10)
+        ])
+        QuizResult.objects.filter(score=90).update(is_active=False)
+        self.url = reverse('quizresult-export')
+
+    def ndjson(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_ndjson_matches_list_serializer(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('quiz-results.ndjson', response['Content-Disposition'])
+        expected = QuizResultSerializer(QuizResult.objects.filter(is_active=True).order_by('pk'), many=True).data
+        self.assertEqual(self.ndjson(response), json.loads(JSONRenderer().render(expected)))
+
+    def test_csv_through_format_and_accept(self):
+        for kwargs in ({'data': {'format': 'csv'}}, {'HTTP_ACCEPT': 'text/csv'}):
+            with self.subTest(**kwargs):
+                response = self.client.get(self.url, **kwargs)
+                self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+                rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+                self.assertEqual(len(rows), 9)
+                self.assertEqual(rows[1]['score'], '10')
+                self.assertEqual(rows[1]['money_earned'], '10.50')
+
+    def test_filterset_is_honored(self):
+        response = self.client.get(self.url, {'score_min': 40, 'user': 'learner'})
+        self.assertEqual([row['score'] for row in self.ndjson(response)], [50, 70])
+
+    def test_view_without_queryset_is_improperly_configured(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "missing a queryset"):
+            type('NoQuerysetView', (ExportView,), {})().get_queryset()
+
+    def test_rows_are_streamed_in_chunks(self):
+        with mock.patch('api.views.QuizResultExportView.chunk_size', 4):
+            response = self.client.get(self.url)
+            chunks = list(response.streaming_content)
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [4, 4, 1])
+
+    def test_other_exports(self):
+        VirtualMoney.objects.create(user=self.user, amount="25.00")
+        response = self.client.get(reverse('virtualmoney-export'), {'format': 'csv'})
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines()[0], 'id,amount,date_granted,is_active,user')
+        response = self.client.get(reverse('investment-simulation-export'))
+        self.assertEqual(self.ndjson(response), [])
+
+
+def normalize_sql(sql):
+    """Replace literals so the same query with different parameters compares equal."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    return re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+
+
+def duplicated_sql(queries):
+    counts = Counter(normalize_sql(query['sql']) for query in queries)
+    return [(count, sql) for sql, count in counts.most_common() if count > 1]
+
+
+class SearchFilterTests(APITestCase):
+    def setUp(self):
+        for name in ('Growth Stocks', 'Government Bonds', 'Crypto'):
+            Market.objects.create(market_name=name, risk_level='High', description='Sample market')
+        learner = User.objects.create_user(username="learner", password="testpassword")
+        other = User.objects.create_user(username="other", password="testpassword")
+        quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        for user in (learner, other):
+            QuizResult.objects.create(user=user, quiz=quiz, score=80, money_earned='1.00')
+
+    def test_market_name_filter(self):
+        response = self.client.get(reverse('market-list'), {'name': 'ONDS'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([market['market_name'] for market in response.data['results']], ['Government Bonds'])
+
+    def test_username_filters(self):
+        response = self.client.get(reverse('user-list'), {'username': 'EARN'})
+        self.assertEqual([user['username'] for user in response.data['results']], ['learner'])
+        response = self.client.get(reverse('quizresult-list-create'), {'user': 'the'})
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        detail_cache.local.clear()
+        caches['shared'].clear()
+        # A local tier of its own, so hit counters don't leak into other tests.
+        patcher = mock.patch.object(detail_cache, 'local', LRUCache(100))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username="learner", password="testpassword")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+            Market.objects.create(market_name="Bonds", risk_level="Low", description="Bond market")
+            Market.objects.create(market_name="Closed", risk_level="Low", description="Closed", is_active=False)
+        self.quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        self.achievement = Achievement.objects.create(
+            user_id=self.user, criteria='First quiz', date_achieved=datetime.date(2024, 1, 1),
+            description='Finished a quiz', reward_type='Badge', title='Starter',
+        )
+        VirtualMoney.objects.create(user=self.user, amount='300.00')
+        for score in (40, 80):
+            QuizResult.objects.create(user=self.user, quiz=self.quiz, score=score, money_earned='2.50')
+        InvestmentSimulation.objects.create(
+            user=self.user, market_id=self.market, amount_invested='100.00', outcome='Profit', profit_loss='12.50',
+        )
+
+    def test_payloads_match_sync_views(self):
+        routes = [
+            ('market-list', {}), ('market-detail', {'market_id': self.market.market_id}),
+            ('quiz-list-create', {}), ('quiz-detail', {'id': self.quiz.id}),
+            ('achievement-list', {}), ('achievement-detail', {'id': self.achievement.id}),
+        ]
+        for name, kwargs in routes:
+            async_name = 'async-' + name.replace('-list-create', '-list')
+            sync_response = self.client.get(reverse(name, kwargs=kwargs), {'page_size': 1})
+            async_response = self.client.get(reverse(async_name, kwargs=kwargs), {'page_size': 1})
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK, async_name)
+            self.assertEqual(async_response['Content-Type'], 'application/json')
+            sync_data, async_data = sync_response.json(), async_response.json()
+            if sync_data.get('next'):
+                sync_data['next'] = sync_data['next'].replace('/api/', '/api/async/')
+            self.assertEqual(async_data, sync_data, async_name)
+        for name in ('market-list', 'quiz-list-create', 'achievement-list'):
+            async_name = 'async-' + name.replace('-list-create', '-list')
+            sync_response = self.client.get(reverse(name), {'cursor': 'garbage'})
+            async_response = self.client.get(reverse(async_name), {'cursor': 'garbage'})
+            self.assertEqual(async_response.status_code, status.HTTP_404_NOT_FOUND, async_name)
+            self.assertEqual(async_response.json(), sync_response.json(), async_name)
+
+    def test_list_follows_cursor_and_filters(self):
+        url = reverse('async-market-list')
+        first = self.client.get(url, {'page_size': 1}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual([m['market_name'] for m in first['results'] + second['results']], ["Stocks", "Bonds"])
+        self.assertIsNone(second['next'])
+        filtered = self.client.get(url, {'is_active': 'false'}).json()
+        self.assertEqual(filtered['results'], [])
+
+    def test_matching_etag_returns_304(self):
+        url = reverse('async-market-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.objects.create(market_name="Crypto", risk_level="High", description="Crypto market")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_detail_is_cached_and_invalidated(self):
+        url = reverse('async-market-detail', args=[self.market.market_id])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['market_name'], "Stocks")
+        self.assertEqual(detail_cache.local.hits, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.market.market_name = "Equities"
+            self.market.save()
+        self.assertEqual(self.client.get(url).json()['market_name'], "Equities")
+
+    def test_list_view_without_queryset_is_improperly_configured(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "missing a queryset"):
+            type('NoQuerysetView', (AsyncListView,), {})().get_queryset()
+
+    def test_missing_objects_return_404(self):
+        closed = Market.all_objects.get(market_name="Closed")
+        for url in (reverse('async-market-detail', args=[closed.market_id]),
+                    reverse('async-quiz-detail', args=[9999]),
+                    reverse('async-achievement-detail', args=[9999]),
+                    reverse('async-user-dashboard', args=[9999])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, url)
+            self.assertFalse(response.has_header('ETag'))
+
+    def test_dashboard(self):
+        response = self.client.get(reverse('async-user-dashboard', args=[self.user.user_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['user']['username'], "learner")
+        self.assertEqual(data['balance'], str(WalletBalance.objects.get(user=self.user).balance))
+        self.assertEqual(data['quiz_results']['count'], 2)
+        self.assertEqual(data['quiz_results']['average_score'], 60)
+        self.assertEqual(data['quiz_results']['money_earned'], '5.00')
+        self.assertEqual([r['score'] for r in data['quiz_results']['recent']], [80, 40])
+        self.assertEqual(data['simulations']['amount_invested'], '100.00')
+        self.assertEqual(data['simulations']['profit_loss'], '12.50')
+        self.assertEqual(data['simulations']['recent'][0]['outcome'], 'Profit')
+        self.assertEqual(data['achievements']['count'], 1)
+        self.assertEqual(data['achievements']['recent'][0]['title'], 'Starter')
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        detail_cache.local.clear()
+        caches['shared'].clear()
+        patcher = mock.patch.object(detail_cache, 'local', LRUCache(100))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username="learner", password="testpassword")
+        self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        QuizResult.objects.create(user=self.user, quiz=quiz, score=80, money_earned='8.00')
+        VirtualMoney.objects.create(user=self.user, amount='30.00')
+        Achievement.objects.create(
+            user_id=self.user, criteria='First quiz', date_achieved=datetime.date(2024, 1, 1),
+            description='Finished a quiz', reward_type='Badge', title='Starter',
+        )
+        self.url = reverse('batch')
+        self.home_screen = [
+            f"/api/users/{self.user.user_id}/", "/api/quiz-results/?user=learner", "/api/virtualmoney/",
+            "/api/achievements/", "/api/markets/",
+        ]
+
+    def batch(self, requests, **options):
+        return self.client.post(self.url, {'requests': requests, **options}, format='json')
+
+    def test_home_screen_in_one_request(self):
+        response = self.batch([{'id': path, 'path': path} for path in self.home_screen])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['responses']
+        self.assertEqual([result['id'] for result in results], self.home_screen)
+        for path, result in zip(self.home_screen, results):
+            single = self.client.get(path)
+            self.assertEqual(result['status'], status.HTTP_200_OK, path)
+            self.assertEqual(result['body'], single.json(), path)
+            self.assertEqual(result['headers']['ETag'], single['ETag'], path)
+
+    def test_caller_is_authenticated_once(self):
+        with mock.patch.object(JWTAuthentication, 'authenticate', return_value=(self.user, 'token')) as authenticate:
+            response = self.client.post(
+                self.url, {'requests': [{'path': path} for path in self.home_screen]},
+                format='json', HTTP_AUTHORIZATION='Bearer token',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(authenticate.call_count, 1)
+
+    def test_writes_run_in_order_and_failures_are_per_sub_request(self):
+        response = self.batch([
+            {'method': 'post', 'path': '/api/markets/',
+             'body': {'market_name': "Bonds", 'risk_level': 'Low', 'description': 'Bond market'}},
+            {'method': 'POST', 'path': '/api/markets/', 'body': {'market_name': "Missing fields"}},
+            {'path': '/api/markets/?risk_level=Low'},
+            {'path': '/api/unknown/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}},
+        ])
+        statuses = [result['status'] for result in response.json()['responses']]
+        self.assertEqual(statuses, [201, 400, 200, 404, 400])
+        names = [m['market_name'] for m in response.json()['responses'][2]['body']['results']]
+        self.assertEqual(names, ["Stocks", "Bonds"])
+
+    def test_conditional_sub_request(self):
+        etag = self.client.get('/api/markets/')['ETag']
+        response = self.batch([{'path': '/api/markets/', 'headers': {'If-None-Match': etag}}])
+        result = response.json()['responses'][0]
+        self.assertEqual(result['status'], status.HTTP_304_NOT_MODIFIED)
+        self.assertIsNone(result['body'])
+
+    def test_async_views_and_streaming(self):
+        response = self.batch([
+            {'path': f"/api/async/markets/{self.market.market_id}/"},
+            {'path': '/api/virtualmoney/export/'},
+        ])
+        async_result, export = response.json()['responses']
+        self.assertEqual(async_result['body']['market_name'], "Stocks")
+        self.assertEqual(export['status'], status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_batches(self):
+        too_many = [{'path': '/api/markets/'}] * 21
+        for requests in ([], too_many, [{'path': '/auth/login/'}], [{'method': 'TRACE', 'path': '/api/markets/'}]):
+            self.assertEqual(self.batch(requests).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ParallelBatchTests(APITransactionTestCase):
+    def test_consecutive_gets_run_concurrently(self):
+        user = User.objects.create_user(username="learner", password="testpassword")
+        Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        requests = [
+            {'path': f"/api/users/{user.user_id}/"}, {'path': '/api/markets/'},
+            {'method': 'POST', 'path': '/api/markets/',
+             'body': {'market_name': "Bonds", 'risk_level': 'Low', 'description': 'Bond market'}},
+            {'path': '/api/markets/'}, {'path': '/api/achievements/'},
+        ]
+        url = reverse('batch')
+        sequential = self.client.post(url, {'requests': requests}, format='json').json()['responses']
+        Market.objects.filter(market_name="Bonds").delete()
+        with mock.patch.object(batch, 'run_in_thread', wraps=batch.run_in_thread) as run_in_thread:
+            response = self.client.post(url, {'requests': requests, 'parallel': True}, format='json')
+        self.assertEqual(run_in_thread.call_count, 4)
+        parallel = response.json()['responses']
+        self.assertEqual([r['status'] for r in parallel], [200, 200, 201, 200, 200])
+        self.assertEqual(len(parallel[3]['body']['results']), 2)
+        self.assertEqual(parallel[0]['body'], sequential[0]['body'])
+
+
+class QueryScalingTests(APITestCase):
+    """
+    Seeds every table at 10, 100 and 1000 rows and requests every GET route
+    of api/urls.py at each size. The number of queries must not change with
+    the number of rows (an N+1 shows up as a count that grows with the
+    page), and the time may grow no faster than the row count. A route added
+    to api/urls.py without an entry in `route_kwargs` fails the test.
+    """
+    ROW_COUNTS = (10, 100, 1000)
+    PARAMS = {'page_size': 1000, 'limit': 100, 'radius': 50, 'interval': '1d'}
+    TIMING_REPEATS = 3
+    TIMING_SLACK = 2.0  # times linear growth
+    TIMING_FLOOR = 0.05  # seconds; absorbs noise on fast routes
+
+    def setUp(self):
+        self.seeded = 0
+        self.today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def seed(self, total):
+        """Bring every table up to `total` rows."""
+        new = range(self.seeded, total)
+        users = User.objects.bulk_create([User(username=f"user{i}", password='!') for i in new])
+        markets = Market.objects.bulk_create([
+            Market(market_name=f"Market {i}", risk_level='Medium', description='Seeded market') for i in new
+        ])
+        quizzes = Quiz.objects.bulk_create([Quiz(quiz_text=f"Question {i}") for i in new])
+        if not self.seeded:
+            self.first_user, self.first_market = users[0], markets[0]
+        first_user = self.first_user
+        QuizResult.objects.bulk_create([
+            QuizResult(user=user, quiz=quiz, score=i % 100, money_earned='1.50')
+            for i, user, quiz in zip(new, users, quizzes)
+        ])
+        InvestmentSimulation.objects.bulk_create([
+            InvestmentSimulation(user=user, market_id=market, amount_invested='100.00', outcome='gain', profit_loss='5.00')
+            for user, market in zip(users, markets)
+        ])
+        Assessment.objects.bulk_create([
+            Assessment(user_id=user, question_text=f"Question {i}", answers=['a', 'b']) for i, user in zip(new, users)
+        ])
+        VirtualMoney.objects.bulk_create([VirtualMoney(user=user, amount='10.00') for user in users])
+        Achievement.objects.bulk_create([
+            Achievement(user_id=user, criteria='Seeded', date_achieved=self.today.date(), description='Seeded',
+                        reward_type='Badge', title=f"Achievement {i}")
+            for i, user in zip(new, users)
+        ])
+        AchievementRule.objects.bulk_create([
+            AchievementRule(title=f"Rule {i}", description='Seeded', trigger=AchievementRule.QUIZ_RESULT,
+                            conditions={'min_score': 50})
+            for i in new
+        ])
+        WalletLedgerEntry.objects.bulk_create([
+            WalletLedgerEntry(user=first_user, amount='1.00', source=WalletLedgerEntry.GRANT) for _ in new
+        ])
+        SimulationJob.objects.bulk_create([SimulationJob(user=user, params={}) for user in users])
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(board='score', user=user, value=i + 1)
+            for i, user in zip(new, users)
+        ])
+        ingest_bars(self.first_market.market_id, [
+            ((self.today - datetime.timedelta(days=i)).timestamp(), 1, 2, 0.5, 1.5, 100) for i in new
+        ])
+        self.seeded = total
+
+    def route_kwargs(self):
+        """URL kwargs of every GET route, pointing at rows seeded first."""
+        first = lambda model: model.objects.order_by('pk').values_list('pk', flat=True)[0]
+        user_id = self.first_user.user_id
+        return {
+            'market-list': {}, 'market-detail': {'market_id': self.first_market.market_id},
+            'market-prices': {'market_id': self.first_market.market_id},
+            'investment-simulation-list': {}, 'investment-simulation-export': {},
+            'investment-simulation-detail': {'id': first(InvestmentSimulation)},
+            'simulation-job-detail': {'id': first(SimulationJob)},
+            'quiz-list-create': {}, 'quiz-detail': {'id': first(Quiz)},
+            'quizresult-list-create': {}, 'quizresult-export': {}, 'quizresult-detail': {'id': first(QuizResult)},
+            'assessment-list': {}, 'assessment-detail': {'assessment_id': first(Assessment)},
+            'user-list': {}, 'user-detail': {'id': user_id}, 'user-stats': {'user_id': user_id},
+            'virtualmoney-list': {}, 'virtualmoney-export': {}, 'virtualmoney-detail': {'id': first(VirtualMoney)},
+            'wallet-balance': {'user_id': user_id}, 'wallet-ledger': {'user_id': user_id},
+            'cache-stats': {},
+            'leaderboard': {'metric': 'score'},
+            'leaderboard-rank': {'metric': 'score', 'user_id': user_id},
+            'leaderboard-neighbors': {'metric': 'score', 'user_id': user_id},
+            'achievement-list': {}, 'achievement-detail': {'id': first(Achievement)},
+            'achievement-rule-list': {}, 'achievement-rule-detail': {'id': first(AchievementRule)},
+            'schema-swagger-ui': {}, 'schema-redoc': {},
+            'async-market-list': {}, 'async-market-detail': {'market_id': self.first_market.market_id},
+            'async-quiz-list': {}, 'async-quiz-detail': {'id': first(Quiz)},
+            'async-achievement-list': {}, 'async-achievement-detail': {'id': first(Achievement)},
+            'async-user-dashboard': {'user_id': user_id},
+        }
+
+    def get_routes(self):
+        names = []
+        for pattern in api_urls.urlpatterns:
+            view = getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+            if view is not None and hasattr(view, 'get'):
+                names.append(pattern.name)
+        return names
+
+    def clear_caches(self):
+        # Every measured request starts cold, so caches cannot hide queries.
+        detail_cache.local.clear()
+        caches['shared'].clear()
+        reset_boards()
+
+    def fetch(self, url):
+        params = dict(self.PARAMS)
+        if 'prices' in url:
+            params['start'] = int((self.today - datetime.timedelta(days=max(self.ROW_COUNTS) + 1)).timestamp())
+        start = time.perf_counter()
+        response = self.client.get(url, params)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response, time.perf_counter() - start
+
+    def measure(self, url):
+        self.fetch(url)  # warm up per-process state
+        self.clear_caches()
+        with CaptureQueriesContext(connection) as context:
+            response, _ = self.fetch(url)
+        # Read them now: the next request resets connection.queries.
+        queries = context.captured_queries
+        self.assertEqual(response.status_code, status.HTTP_200_OK, f"GET {url} returned {response.status_code}")
+        timings = []
+        for _ in range(self.TIMING_REPEATS):
+            self.clear_caches()
+            timings.append(self.fetch(url)[1])
+        return queries, min(timings)
+
+    def test_query_count_and_time_stay_flat_as_rows_grow(self):
+        results = {}
+        for total in self.ROW_COUNTS:
+            self.seed(total)
+            kwargs = self.route_kwargs()
+            for name in self.get_routes():
+                self.assertIn(name, kwargs, f"Route {name} has no entry in QueryScalingTests.route_kwargs")
+                results.setdefault(name, {})[total] = self.measure(reverse(name, kwargs=kwargs[name]))
+
+        smallest, largest = self.ROW_COUNTS[0], self.ROW_COUNTS[-1]
+        for name, by_size in results.items():
+            with self.subTest(route=name):
+                counts = {total: len(queries) for total, (queries, _) in by_size.items()}
+                queries = by_size[largest][0]
+                report = '\n'.join(f"  {count} x {sql}" for count, sql in duplicated_sql(queries)) or '  (none)'
+                self.assertEqual(
+                    len(set(counts.values())), 1,
+                    f"Route {name} runs a number of queries that grows with the rows: {counts}.\n"
+                    f"Duplicated SQL at {largest} rows:\n{report}",
+                )
+                small_time, large_time = by_size[smallest][1], by_size[largest][1]
+                limit = self.TIMING_SLACK * (largest / smallest) * small_time + self.TIMING_FLOOR
+                self.assertLessEqual(
+                    large_time, limit,
+                    f"Route {name} took {large_time * 1000:.1f} ms at {largest} rows and "
+                    f"{small_time * 1000:.1f} ms at {smallest}, worse than linear.",
+                )
@@ -7,14 +7,24 @@ from django.urls import path
 
 
 from .views import (
-   MarketListView, MarketDetailView,
-   InvestmentSimulationListView, InvestmentSimulationDetailView,
-   QuizView, QuizDetailView, QuizResultView, QuizResultDetailView,
+   MarketListView, MarketDetailView, MarketPriceView,
+   InvestmentSimulationListView, InvestmentSimulationDetailView, InvestmentSimulationExportView, MonteCarloSimulationView,
+   SimulationJobListView, SimulationJobDetailView,
+   BacktestView, BacktestBatchView,
+   QuizView, QuizDetailView, QuizResultView, QuizResultDetailView, QuizResultExportView,
    AssessmentDetailView, AssessmentListView,
    RegisterView, UserListView, UserDetailView,
-   VirtualMoneyView, VirtualMoneyDetailView,
-   AchievementView, AchievementDetailView
+   VirtualMoneyView, VirtualMoneyDetailView, VirtualMoneyExportView,
+   WalletBalanceView, WalletLedgerView, UserStatsView, CacheStatsView,
+   LeaderboardView, LeaderboardRankView, LeaderboardNeighborsView,
+   AchievementView, AchievementDetailView,
+   AchievementRuleView, AchievementRuleDetailView,
 )
+from .async_views import (
+   AsyncMarketListView, AsyncMarketDetailView, AsyncQuizListView, AsyncQuizDetailView,
+   AsyncAchievementListView, AsyncAchievementDetailView, AsyncUserDashboardView,
+)
+from .batch import BatchView
 
 
 
@@ -40,11 +50,18 @@ urlpatterns = [
                          
    path('markets/', MarketListView.as_view(), name='market-list'),  # List all markets
    path('markets/<int:market_id>/', MarketDetailView.as_view(), name='market-detail'),  # View details of a specific market by ID
+   path('markets/<int:market_id>/prices/', MarketPriceView.as_view(), name='market-prices'),  # OHLCV bars of a market over a time range
 
 
    #URLs for investment simulation-related views 
    path('investment-simulations/', InvestmentSimulationListView.as_view(), name='investment-simulation-list'),  # List all investment simulations
    path('investment-simulations/<int:id>/', InvestmentSimulationDetailView.as_view(), name='investment-simulation-detail'),  # View details of a specific simulation by ID
+   path('investment-simulations/export/', InvestmentSimulationExportView.as_view(), name='investment-simulation-export'),  # Stream all simulations as NDJSON or CSV
+   path('investment-simulations/monte-carlo/', MonteCarloSimulationView.as_view(), name='investment-simulation-monte-carlo'),  # Run a Monte Carlo simulation for a market
+   path('investment-simulations/jobs/', SimulationJobListView.as_view(), name='simulation-job-list'),  # Queue a simulation job
+   path('investment-simulations/jobs/<int:id>/', SimulationJobDetailView.as_view(), name='simulation-job-detail'),  # Status and result of a simulation job
+   path('investment-simulations/backtests/', BacktestView.as_view(), name='investment-simulation-backtest'),  # Backtest a strategy over historical prices
+   path('investment-simulations/backtests/batch/', BacktestBatchView.as_view(), name='investment-simulation-backtest-batch'),  # Backtest many strategies x markets at once
 
 
    # URLs for quiz-related views
@@ -55,6 +72,7 @@ urlpatterns = [
     #URLs for quiz result-related views 
    path('quiz-results/', QuizResultView.as_view(), name='quizresult-list-create'),  # List all quiz results and create a new result
    path('quiz-results/<int:id>/', QuizResultDetailView.as_view(), name='quizresult-detail'),  # View details of a specific quiz result by ID
+   path('quiz-results/export/', QuizResultExportView.as_view(), name='quizresult-export'),  # Stream all quiz results as NDJSON or CSV
 
 
    #URLs for assessment-related views
@@ -69,16 +87,46 @@ urlpatterns = [
    #URLs for user-related views 
    path('users/', UserListView.as_view(), name='user-list'),  # List all users
    path('users/<int:id>/', UserDetailView.as_view(), name='user-detail'),  # View details of a specific user by ID
+   path('users/<int:user_id>/stats/', UserStatsView.as_view(), name='user-stats'),  # Dashboard counters of a user, read from one row
 
 
    #URLs for virtual money-related views
    path('virtualmoney/', VirtualMoneyView.as_view(), name='virtualmoney-list'),  # List all virtual money entries
    path('virtualmoney/<int:id>/', VirtualMoneyDetailView.as_view(), name='virtualmoney-detail'),  # View details of a specific virtual money entry by ID
+   path('virtualmoney/export/', VirtualMoneyExportView.as_view(), name='virtualmoney-export'),  # Stream all virtual money entries as NDJSON or CSV
+
+
+   #URLs for wallet-related views
+   path('wallets/<int:user_id>/', WalletBalanceView.as_view(), name='wallet-balance'),  # Current wallet balance of a user
+   path('wallets/<int:user_id>/ledger/', WalletLedgerView.as_view(), name='wallet-ledger'),  # Ledger entries of a user's wallet
+
+   path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),  # Detail cache counters of the serving worker
+
+   #URLs for leaderboards (metric is score, money_earned or balance; ?quiz=<id> for a per-quiz board)
+   path('leaderboards/<str:metric>/', LeaderboardView.as_view(), name='leaderboard'),  # Top users of a leaderboard
+   path('leaderboards/<str:metric>/users/<int:user_id>/', LeaderboardRankView.as_view(), name='leaderboard-rank'),  # A user's rank
+   path('leaderboards/<str:metric>/users/<int:user_id>/neighbors/', LeaderboardNeighborsView.as_view(), name='leaderboard-neighbors'),  # Users ranked around a user
 
 
    #URLs for achievement-related views
    path('achievements/', AchievementView.as_view(), name='achievement-list'),  # List all achievements
    path('achievements/<int:id>/', AchievementDetailView.as_view(), name='achievement-detail'),  # View details of a specific achievement by ID
+   path('achievement-rules/', AchievementRuleView.as_view(), name='achievement-rule-list'),
+   path('achievement-rules/<int:id>/', AchievementRuleDetailView.as_view(), name='achievement-rule-detail'),
+
+
+   #URLs for async read views; serve them from an ASGI server (see Procfile.asgi)
+   path('async/markets/', AsyncMarketListView.as_view(), name='async-market-list'),  # Same as markets/
+   path('async/markets/<int:market_id>/', AsyncMarketDetailView.as_view(), name='async-market-detail'),  # Same as markets/<id>/
+   path('async/quizzes/', AsyncQuizListView.as_view(), name='async-quiz-list'),  # Same as GET quizzes/
+   path('async/quizzes/<int:id>/', AsyncQuizDetailView.as_view(), name='async-quiz-detail'),  # Same as GET quizzes/<id>/
+   path('async/achievements/', AsyncAchievementListView.as_view(), name='async-achievement-list'),  # Same as GET achievements/
+   path('async/achievements/<int:id>/', AsyncAchievementDetailView.as_view(), name='async-achievement-detail'),  # Same as GET achievements/<id>/
+   path('async/users/<int:user_id>/dashboard/', AsyncUserDashboardView.as_view(), name='async-user-dashboard'),  # Profile, balance and recent activity of a user
+
+
+   #URL for running several of the calls above in one request
+   path('batch/', BatchView.as_view(), name='batch'),  # Sub-requests in, all their responses out
    
    # Urls for Swagger documentation
    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
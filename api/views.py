@@ -4,13 +4,20 @@ from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from market.models import Market
-from investment_simulation.models import InvestmentSimulation
+from market.timeseries import BAR_COLUMNS, INTERVALS, MAX_BARS_PER_QUERY, expected_bar_count, parse_timestamp, query_bars
+from investment_simulation.models import InvestmentSimulation, SimulationJob
+from investment_simulation.monte_carlo import run_monte_carlo
+from investment_simulation.jobs import JobLimitExceeded, submit_job
+from investment_simulation.backtest import BacktestError, load_closes, run_backtest, run_batch
 from assessment.models import Assessment
 from quizzes.models import Quiz
 from quiz_results.models import QuizResult
-from virtualmoney.models import VirtualMoney
-from .serializers import VirtualMoneySerializer
-from achievements.models import Achievement
+from virtualmoney.models import VirtualMoney, WalletBalance, WalletLedgerEntry
+from virtualmoney.wallet import InsufficientFunds
+from users.models import UserStats
+from leaderboard.boards import board_key, get_board
+from .serializers import UserStatsSerializer, VirtualMoneySerializer, WalletBalanceSerializer, WalletLedgerEntrySerializer
+from achievements.models import Achievement, AchievementRule
 from .serializers import (
     MarketSerializer,
     InvestmentSimulationSerializer,
@@ -19,11 +26,28 @@ from .serializers import (
     QuizResultSerializer,
     UserSerializer,
     AchievementSerializer,
+    AchievementRuleSerializer,
     RegisterSerializer,
+    MonteCarloRequestSerializer,
+    SimulationJobRequestSerializer,
+    SimulationJobSerializer,
+    BacktestRequestSerializer,
+    BacktestBatchRequestSerializer,
 )
 import logging
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as filters
+from .pagination import KeysetPaginationMixin
+from .conditional import etag_for
+from .cache import cached_detail, detail_cache
+from .singleflight import single_flight
+from .export import ExportView
+from search.filters import ContainsFilter
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -32,7 +56,7 @@ User = get_user_model()
 Filter classes for dashboard metrics
 """
 class UserFilter(filters.FilterSet):
-    username = filters.CharFilter(field_name='username', lookup_expr='icontains')
+    username = ContainsFilter(field_name='username')
     is_active = filters.BooleanFilter(field_name='is_active')
 
     class Meta:
@@ -40,24 +64,24 @@ class UserFilter(filters.FilterSet):
         fields = ['username', 'is_active']
 
 class MarketFilter(filters.FilterSet):
-    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    name = ContainsFilter(field_name='market_name')
 
     class Meta:
         model = Market
         fields = ['name', 'is_active']
 
 class InvestmentSimulationFilter(filters.FilterSet):
-    risk_level = filters.RangeFilter(field_name='risk_level')
-    investment_type = filters.CharFilter(field_name='investment_type', lookup_expr='icontains')
-    user = filters.CharFilter(field_name='user__username', lookup_expr='icontains')
+    risk_level = filters.CharFilter(field_name='market_id__risk_level')
+    market = filters.NumberFilter(field_name='market_id')
+    user = ContainsFilter(field_name='user__username')
 
     class Meta:
         model = InvestmentSimulation
-        fields = ['risk_level', 'investment_type', 'user', 'is_active']
+        fields = ['risk_level', 'market', 'user', 'is_active']
 
 class QuizResultFilter(filters.FilterSet):
     score = filters.RangeFilter(field_name='score')
-    user = filters.CharFilter(field_name='user__username', lookup_expr='icontains')
+    user = ContainsFilter(field_name='user__username')
 
     class Meta:
         model = QuizResult
@@ -69,16 +93,20 @@ MarketListView:
      - GET: Retrieves all active market entries.
      - POST: Creates a new market entry.
 """
-class MarketListView(APIView):
+class MarketListView(KeysetPaginationMixin, APIView):
    filter_backends = [DjangoFilterBackend]
    filterset_class = MarketFilter  # Adding filter
+   ordering_fields = ['market_name', 'risk_level']
 
+   @etag_for(Market)
+   @single_flight(Market)
    def get(self, request):
        logger.info("Fetching all active markets")
-       markets = Market.objects.filter(is_active=True)
+       markets = Market.objects.all()
        filtered_markets = self.filterset_class(request.GET, queryset=markets)  # Applying filter
-       serializer = MarketSerializer(filtered_markets.qs, many=True)
-       return Response(serializer.data)
+       page = self.paginate_queryset(filtered_markets.qs)
+       serializer = MarketSerializer(page, many=True)
+       return self.get_paginated_response(serializer.data)
 
    def post(self, request):
        logger.info("Creating a new market entry")
@@ -98,10 +126,11 @@ MarketDetailView:
      - DELETE: Soft deletes a market entry by marking it as inactive (using the `is_active` field).
 """
 class MarketDetailView(APIView):
+   @cached_detail(Market, 'market_id')
    def get(self, request, market_id):
        try:
            logger.info(f"Fetching market with ID: {market_id}")
-           market = Market.objects.get(market_id=market_id, is_active=True)
+           market = Market.objects.get(market_id=market_id)
            serializer = MarketSerializer(market)
            return Response(serializer.data)
        except Market.DoesNotExist:
@@ -111,7 +140,7 @@ class MarketDetailView(APIView):
    def put(self, request, market_id):
        try:
            logger.info(f"Updating market with ID: {market_id}")
-           market = Market.objects.get(market_id = market_id, is_active=True)
+           market = Market.objects.get(market_id = market_id)
            serializer = MarketSerializer(market, data=request.data)
            if serializer.is_valid():
                serializer.save()
@@ -126,7 +155,7 @@ class MarketDetailView(APIView):
    def delete(self, request, market_id):
        try:
            logger.info(f"Attempting to deactivate (soft delete) market with ID: {market_id}")
-           market = Market.objects.get(market_id = market_id, is_active=True)
+           market = Market.objects.get(market_id = market_id)
            market.is_active = False
            market.save()
            logger.info(f"Market with ID {market_id} deactivated successfully")
@@ -135,38 +164,97 @@ class MarketDetailView(APIView):
            logger.error(f"Market with ID {market_id} not found or already deactivated")
            return Response(status=status.HTTP_404_NOT_FOUND)
 
+"""
+MarketPriceView:
+   - GET: Returns OHLCV bars for a market between `start` and `end` (epoch seconds or
+     ISO 8601, default: the last 7 days), downsampled on the server to `interval`
+     (1m, 5m, 15m, 1h, 4h or 1d; default 1h). Bar timestamps are epoch seconds.
+"""
+class MarketPriceView(APIView):
+   def get(self, request, market_id):
+       if not Market.objects.filter(market_id=market_id).exists():
+           logger.error(f"Market with ID {market_id} not found or inactive")
+           return Response(status=status.HTTP_404_NOT_FOUND)
+
+       interval = request.GET.get('interval', '1h')
+       if interval not in INTERVALS:
+           return Response({"error": f"interval must be one of {', '.join(INTERVALS)}"}, status=status.HTTP_400_BAD_REQUEST)
+       try:
+           end = parse_timestamp(request.GET['end']) if 'end' in request.GET else timezone.now()
+           start = parse_timestamp(request.GET['start']) if 'start' in request.GET else end - timedelta(days=7)
+       except (ValueError, OverflowError, OSError):
+           return Response({"error": "start and end must be epoch seconds or ISO 8601 timestamps"}, status=status.HTTP_400_BAD_REQUEST)
+       if start >= end:
+           return Response({"error": "start must be before end"}, status=status.HTTP_400_BAD_REQUEST)
+       if expected_bar_count(start, end, interval) > MAX_BARS_PER_QUERY:
+           return Response(
+               {"error": f"Range too large for interval {interval}; use a coarser interval or a shorter range"},
+               status=status.HTTP_400_BAD_REQUEST,
+           )
+
+       logger.info(f"Fetching {interval} prices for market {market_id}")
+       series = query_bars(market_id, start, end, interval)
+       columns = [series[name].tolist() for name in BAR_COLUMNS]
+       columns[0] = [int(timestamp) for timestamp in columns[0]]
+       bars = [dict(zip(BAR_COLUMNS, row)) for row in zip(*columns)]
+       return Response({"market_id": market_id, "interval": interval, "bars": bars})
+
 """
 InvestmentSimulationListView:
    - Handles list operations for the `InvestmentSimulation` model, including:
      - GET: Retrieves all investment simulations.
      - POST: Creates a new investment simulation entry.
 """
-class InvestmentSimulationListView(APIView):
+class InvestmentSimulationListView(KeysetPaginationMixin, APIView):
     filter_backends = [DjangoFilterBackend]
     filterset_class = InvestmentSimulationFilter  # Adding filter
+    ordering_fields = ['investment_date', 'amount_invested', 'profit_loss']
 
+    @etag_for(InvestmentSimulation)
     def get(self, request):
         logger.info("Fetching all investment simulations")
-        simulations = InvestmentSimulation.objects.filter(is_active=True)
+        simulations = InvestmentSimulation.objects.all()
         filtered_simulations = self.filterset_class(request.GET, queryset=simulations)  # Applying filter
-        serializer = InvestmentSimulationSerializer(filtered_simulations.qs, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(filtered_simulations.qs)
+        serializer = InvestmentSimulationSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def post(self, request):
         logger.info("Creating a new investment simulation")
         serializer = InvestmentSimulationSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except InsufficientFunds as e:
+                logger.warning(f"Investment simulation rejected: {e}")
+                return Response({"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST)
             logger.info("Investment simulation created successfully")
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         logger.error(f"Investment simulation creation failed: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+"""
+InvestmentSimulationExportView:
+   - GET: Streams every active investment simulation as NDJSON or CSV,
+     filtered like the list view.
+"""
+class InvestmentSimulationExportView(ExportView):
+    queryset = InvestmentSimulation.objects.all()
+    serializer_class = InvestmentSimulationSerializer
+    filterset_class = InvestmentSimulationFilter
+    filename = 'investment-simulations'
+
+    def get_queryset(self):
+        logger.info("Exporting investment simulations")
+        return super().get_queryset()
+
 class InvestmentSimulationDetailView(APIView):
+    @etag_for(InvestmentSimulation)
     def get(self, request, id):
         try:
             logger.info(f"Fetching investment simulation with ID: {id}")
-            simulation = InvestmentSimulation.objects.get(id=id, is_active=True)
+            simulation = InvestmentSimulation.objects.get(id=id)
             serializer = InvestmentSimulationSerializer(simulation)
             return Response(serializer.data)
         except InvestmentSimulation.DoesNotExist:
@@ -176,14 +264,18 @@ class InvestmentSimulationDetailView(APIView):
     def put(self, request, id):
         try:
             logger.info(f"Updating investment simulation with ID: {id}")
-            simulation = InvestmentSimulation.objects.get(id=id, is_active=True)
-            serializer = InvestmentSimulationSerializer(simulation, data=request.data)
-            if serializer.is_valid():
+            with transaction.atomic():
+                simulation = InvestmentSimulation.objects.select_for_update().get(id=id)
+                serializer = InvestmentSimulationSerializer(simulation, data=request.data)
+                if not serializer.is_valid():
+                    logger.error(f"Investment simulation update failed: {serializer.errors}")
+                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
                 serializer.save()
-                logger.info(f"Investment simulation with ID {id} updated successfully")
-                return Response(serializer.data)
-            logger.error(f"Investment simulation update failed: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            logger.info(f"Investment simulation with ID {id} updated successfully")
+            return Response(serializer.data)
+        except InsufficientFunds as e:
+            logger.warning(f"Investment simulation {id} update rejected: {e}")
+            return Response({"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST)
         except InvestmentSimulation.DoesNotExist:
             logger.error(f"Investment simulation with ID {id} not found")
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -191,19 +283,152 @@ class InvestmentSimulationDetailView(APIView):
     def delete(self, request, id):
         try:
             logger.info(f"Attempting to soft delete investment simulation with ID: {id}")
-            simulation = InvestmentSimulation.objects.get(id=id, is_active=True)
-            simulation.is_active = False
-            simulation.save()
+            with transaction.atomic():
+                simulation = InvestmentSimulation.objects.select_for_update().get(id=id)
+                simulation.is_active = False
+                simulation.save()
             logger.info(f"Investment simulation with ID {id} soft deleted successfully")
             return Response(status=status.HTTP_204_NO_CONTENT)
         except InvestmentSimulation.DoesNotExist:
             logger.error(f"Investment simulation with ID {id} not found")
             return Response(status=status.HTTP_404_NOT_FOUND)
 
+"""
+MonteCarloSimulationView:
+   - POST: Runs a server-side Monte Carlo simulation of an investment in a market
+     and returns the profit/loss distribution (expected value, percentiles and
+     probability of loss). Nothing is persisted.
+"""
+class MonteCarloSimulationView(APIView):
+    def post(self, request):
+        serializer = MonteCarloRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Monte Carlo simulation request invalid: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        market = data['market_id']
+        logger.info(f"Running {data['paths']}x{data['steps']} Monte Carlo simulation for market {market.market_id}")
+        result = run_monte_carlo(
+            data['amount_invested'],
+            market.risk_level,
+            n_paths=data['paths'],
+            n_steps=data['steps'],
+            seed=data['seed'],
+        )
+        result['market_id'] = market.market_id
+        return Response(result, status=status.HTTP_200_OK)
+
+"""
+SimulationJobListView:
+   - POST: Queues a simulation job and returns immediately with 202 and the job.
+     The job is run by the `run_simulation_worker` command; poll its detail URL
+     for the status and result.
+"""
+class SimulationJobListView(APIView):
+    def post(self, request):
+        serializer = SimulationJobRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Simulation job request invalid: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = serializer.validated_data['user']
+        kind = serializer.validated_data['kind']
+        params_serializer = SimulationJobRequestSerializer.PARAMS_SERIALIZERS[kind](data=request.data)
+        if not params_serializer.is_valid():
+            logger.error(f"Simulation job parameters invalid: {params_serializer.errors}")
+            return Response(params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            job = submit_job(user, kind, params_serializer.job_params())
+        except JobLimitExceeded as e:
+            logger.warning(str(e))
+            return Response({"error": "Too many active simulation jobs"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        logger.info(f"Queued simulation job {job.id} for user {user.pk}")
+        response = Response(SimulationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = reverse('simulation-job-detail', args=[job.id])
+        return response
+
+class SimulationJobDetailView(APIView):
+    """
+    Retrieve the status of a simulation job, and its result once it has finished.
+    """
+    def get(self, request, id):
+        try:
+            job = SimulationJob.objects.get(id=id)
+            serializer = SimulationJobSerializer(job)
+            return Response(serializer.data)
+        except SimulationJob.DoesNotExist:
+            logger.error(f"Simulation job {id} not found")
+            return Response({"error": "Simulation job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+"""
+BacktestView:
+   - POST: Replays a strategy (buy_and_hold, dca or rebalance) over the stored daily
+     prices of one or more markets between `start` and `end`, and returns the equity
+     curve with return, volatility and drawdown statistics. The outcome is saved as a
+     hypothetical InvestmentSimulation against the first market; the wallet is not touched.
+"""
+class BacktestView(APIView):
+    def post(self, request):
+        serializer = BacktestRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Backtest request invalid: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        market_ids = [market.market_id for market in data['market_ids']]
+        try:
+            timestamps, closes = load_closes(market_ids, data['start'], data['end'])
+            result = run_backtest(timestamps, closes, data['strategy'], data['amount_invested'], data['weights'], data['every'])
+            with transaction.atomic():
+                simulation = InvestmentSimulation.record(
+                    market_ids[0], getattr(data['user'], 'pk', None), data['amount_invested'], result['profit_loss'],
+                    hypothetical=True,
+                )
+        except BacktestError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Backtest {data['strategy']} on markets {market_ids} saved as simulation {simulation.id}")
+        return Response({"market_ids": market_ids, "simulation": simulation.id, **result}, status=status.HTTP_201_CREATED)
+
+"""
+BacktestBatchView:
+   - POST: Runs every strategy in `strategies` against every market group in `markets`
+     in one call, spread over a process pool, and saves each outcome as a hypothetical
+     InvestmentSimulation. Equity curves are omitted; statistics only.
+"""
+class BacktestBatchView(APIView):
+    def post(self, request):
+        serializer = BacktestBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Backtest batch request invalid: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        groups = [[market.market_id for market in group] for group in data['markets']]
+        try:
+            # Load each market group's prices once and share them across strategies.
+            prices = {tuple(group): load_closes(group, data['start'], data['end']) for group in groups}
+            runs = [(group, strategy) for strategy in data['strategies'] for group in groups]
+            results = run_batch([
+                (*prices[tuple(group)], strategy['strategy'], data['amount_invested'], strategy['weights'], strategy['every'], False)
+                for group, strategy in runs
+            ])
+            with transaction.atomic():
+                simulations = [
+                    InvestmentSimulation.record(
+                        group[0], getattr(data['user'], 'pk', None), data['amount_invested'], result['profit_loss'],
+                        hypothetical=True,
+                    )
+                    for (group, _), result in zip(runs, results)
+                ]
+        except BacktestError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Backtest batch of {len(results)} runs completed")
+        return Response({"results": [
+            {"market_ids": group, "simulation": simulation.id, **result}
+            for (group, _), simulation, result in zip(runs, simulations, results)
+        ]}, status=status.HTTP_201_CREATED)
+
 """
 Handles creating and retrieving quizzes
 """
-class QuizView(APIView):
+class QuizView(KeysetPaginationMixin, APIView):
     """
     Create a new quiz or retrieve all active quizzes.
     """
@@ -217,21 +442,25 @@ class QuizView(APIView):
         logger.error("Invalid quiz data")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @etag_for(Quiz)
+    @single_flight(Quiz)
     def get(self, request):
         logger.info("Retrieving all active quizzes")
-        quizzes = Quiz.objects.filter(is_active=True)
-        serializer = QuizSerializer(quizzes, many=True)
-        logger.info(f"{len(quizzes)} active quizzes retrieved")
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        quizzes = Quiz.objects.all()
+        page = self.paginate_queryset(quizzes)
+        data = QuizSerializer(page, many=True).data
+        logger.info(f"{len(data)} active quizzes retrieved")
+        return self.get_paginated_response(data)
     
 class QuizDetailView(APIView):
     """
     Retrieve, update, or soft delete a specific quiz by ID.
     """
+    @cached_detail(Quiz, 'id')
     def get(self, request, id):
         logger.info(f"Received request to fetch quiz with quiz_id: {id}")
         try:
-            quiz = Quiz.objects.get(id=id, is_active=True)
+            quiz = Quiz.objects.get(id=id)
             serializer = QuizSerializer(quiz)
             logger.info(f"Successfully fetched quiz: {id}")
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -245,7 +474,7 @@ class QuizDetailView(APIView):
     def put(self, request, id):
         logger.info(f"Updating quiz with ID {id}")
         try:
-            quiz = Quiz.objects.get(id=id, is_active=True)
+            quiz = Quiz.objects.get(id=id)
             serializer = QuizSerializer(quiz, data=request.data)
             if serializer.is_valid():
                 serializer.save()
@@ -260,7 +489,7 @@ class QuizDetailView(APIView):
     def delete(self, request, id):
         logger.info(f"Soft deleting quiz with ID {id}")
         try:
-            quiz = Quiz.objects.get(id=id, is_active=True)
+            quiz = Quiz.objects.get(id=id)
             quiz.soft_delete()  # Ensure your model has a soft_delete method
             logger.info(f"Quiz {id} soft deleted")
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -269,36 +498,56 @@ class QuizDetailView(APIView):
             return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class QuizResultView(APIView):
+class QuizResultView(KeysetPaginationMixin, APIView):
    filter_backends = [DjangoFilterBackend]
    filterset_class = QuizResultFilter  # Adding filter
+   ordering_fields = ['score', 'money_earned']
 
    def post(self, request):
        logger.info("Creating a new quiz result")
        serializer = QuizResultSerializer(data=request.data)
        if serializer.is_valid():
-           serializer.save()
+           with transaction.atomic():
+               serializer.save()
            logger.info("Quiz result created")
            return Response(serializer.data, status=status.HTTP_201_CREATED)
        logger.error("Invalid quiz result data")
        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+   @etag_for(QuizResult)
    def get(self, request):
        logger.info("Retrieving all active quiz results")
-       quiz_results = QuizResult.objects.filter(is_active=True)
+       quiz_results = QuizResult.objects.all()
        filtered_quiz_results = self.filterset_class(request.GET, queryset=quiz_results)  # Applying filter
-       serializer = QuizResultSerializer(filtered_quiz_results.qs, many=True)
-       logger.info(f"{len(quiz_results)} active quiz results retrieved")
-       return Response(serializer.data)
+       page = self.paginate_queryset(filtered_quiz_results.qs)
+       data = QuizResultSerializer(page, many=True).data
+       logger.info(f"{len(data)} active quiz results retrieved")
+       return self.get_paginated_response(data)
+
+"""
+QuizResultExportView:
+   - GET: Streams every active quiz result as NDJSON or CSV, filtered like
+     the list view.
+"""
+class QuizResultExportView(ExportView):
+   queryset = QuizResult.objects.all()
+   serializer_class = QuizResultSerializer
+   filterset_class = QuizResultFilter
+   filename = 'quiz-results'
+
+   def get_queryset(self):
+       logger.info("Exporting quiz results")
+       return super().get_queryset()
 
 class QuizResultDetailView(APIView):
    """
    Retrieve a specific quiz result by ID
    """
+   @etag_for(QuizResult)
    def get(self, request, id):
        logger.info(f"Retrieving quiz result with ID {id}")
        try:
-           quiz_result = QuizResult.objects.get(id=id, is_active=True)
+           quiz_result = QuizResult.objects.get(id=id)
            serializer = QuizResultSerializer(quiz_result)
            logger.info(f"Quiz result {id} retrieved")
            return Response(serializer.data, status=status.HTTP_200_OK)
@@ -311,12 +560,13 @@ class QuizResultDetailView(APIView):
    def put(self, request, id):
        logger.info(f"Updating quiz result with ID {id}")
        try:
-           quiz_result = QuizResult.objects.get(id=id, is_active=True)
-           serializer = QuizResultSerializer(quiz_result, data=request.data)
-           if serializer.is_valid():
-               serializer.save()
-               logger.info(f"Quiz result {id} updated")
-               return Response(serializer.data, status=status.HTTP_200_OK)
+           with transaction.atomic():
+               quiz_result = QuizResult.objects.select_for_update().get(id=id)
+               serializer = QuizResultSerializer(quiz_result, data=request.data)
+               if serializer.is_valid():
+                   serializer.save()
+                   logger.info(f"Quiz result {id} updated")
+                   return Response(serializer.data, status=status.HTTP_200_OK)
            logger.error(f"Invalid data for quiz result {id}")
            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
        except QuizResult.DoesNotExist:
@@ -328,8 +578,9 @@ class QuizResultDetailView(APIView):
    def delete(self, request, id):
        logger.info(f"Soft deleting quiz result with ID {id}")
        try:
-           quiz_result = QuizResult.objects.get(id=id, is_active=True)
-           quiz_result.soft_delete()
+           with transaction.atomic():
+               quiz_result = QuizResult.objects.select_for_update().get(id=id)
+               quiz_result.soft_delete()
            logger.info(f"Quiz result {id} soft deleted")
            return Response(status=status.HTTP_204_NO_CONTENT)
        except QuizResult.DoesNotExist:
@@ -340,16 +591,19 @@ class QuizResultDetailView(APIView):
 UserListView:
    - Handles listing all users with filter capabilities for username and active status.
 """
-class UserListView(APIView):
+class UserListView(KeysetPaginationMixin, APIView):
    filter_backends = [DjangoFilterBackend]
    filterset_class = UserFilter  # Adding filter
+   ordering_fields = ['username', 'created_at']
 
+   @etag_for(User)
    def get(self, request):
        users = User.objects.all()
        filtered_users = self.filterset_class(request.GET, queryset=users)  # Applying filter
-       serializer = UserSerializer(filtered_users.qs, many=True)
+       page = self.paginate_queryset(filtered_users.qs)
+       serializer = UserSerializer(page, many=True)
        logger.info("Retrieved user list.")
-       return Response(serializer.data, status=status.HTTP_200_OK)
+       return self.get_paginated_response(serializer.data)
 
 class UserDetailView(APIView):
    """
@@ -360,6 +614,7 @@ class UserDetailView(APIView):
    - PATCH: Partially updates user data.
    - DELETE: Soft deletes the user by setting their `is_active` field to False.
    """
+   @cached_detail(User, 'id')
    def get(self, request, id):
        try:
            user = User.objects.get(user_id=id)
@@ -436,16 +691,19 @@ class RegisterView(APIView):
 AssessmentListView:
    - Handles listing and creation of assessments with the ability to filter.
 """
-class AssessmentListView(APIView):
+class AssessmentListView(KeysetPaginationMixin, APIView):
    filter_backends = [DjangoFilterBackend]
    filterset_class = filters.FilterSet  # No custom filter added for simplicity
+   ordering_fields = ['taken_at']
 
+   @etag_for(Assessment)
    def get(self, request):
-       assessments = Assessment.objects.filter(is_active=True)
+       assessments = Assessment.objects.all()
        filtered_assessments = self.filterset_class(request.GET, queryset=assessments)  # Applying filter
-       serializer = AssessmentSerializer(filtered_assessments.qs, many=True)
+       page = self.paginate_queryset(filtered_assessments.qs)
+       serializer = AssessmentSerializer(page, many=True)
        logger.info("Listed all active Assessments")
-       return Response(serializer.data)
+       return self.get_paginated_response(serializer.data)
 
    def post(self, request):
        serializer = AssessmentSerializer(data=request.data)
@@ -461,6 +719,7 @@ class AssessmentDetailView(APIView):
    """
    Retrieve, update, or soft delete a specific Assessment instance based on its ID.
    """
+   @cached_detail(Assessment, 'assessment_id')
    def get(self, request, assessment_id):
        """
        Retrieve a specific Assessment by its ID.
@@ -510,10 +769,12 @@ class AssessmentDetailView(APIView):
            logger.error(f"Assessment with ID {assessment_id} not found for soft deletion")
            return Response({'detail': 'Assessment not found.'}, status=status.HTTP_404_NOT_FOUND)
       
-class VirtualMoneyView(APIView):
+class VirtualMoneyView(KeysetPaginationMixin, APIView):
    """
    Handles creating and listing VirtualMoney instances.
    """
+   ordering_fields = ['amount', 'date_granted']
+
    def post(self, request):
        """
        Create a new VirtualMoney instance.
@@ -521,23 +782,38 @@ class VirtualMoneyView(APIView):
        logger.info('POST request received for VirtualMoney')
        serializer = VirtualMoneySerializer(data=request.data)
        if serializer.is_valid():
-           serializer.save()
+           with transaction.atomic():
+               serializer.save()
            logger.info('VirtualMoney created successfully')
            return Response(serializer.data, status=status.HTTP_201_CREATED)
        logger.error('Validation errors: %s', serializer.errors)
        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
    """
-   List all VirtualMoney instances.
+   List all active VirtualMoney instances.
    """
+   @etag_for(VirtualMoney)
    def get(self, request):
        """
-       Retrieve a list of all VirtualMoney instances.
+       Retrieve a list of all active VirtualMoney instances.
        """
        logger.info('GET request received for VirtualMoney list')
        virtual_moneys = VirtualMoney.objects.all()
-       serializer = VirtualMoneySerializer(virtual_moneys, many=True)
-       return Response(serializer.data)
+       page = self.paginate_queryset(virtual_moneys)
+       serializer = VirtualMoneySerializer(page, many=True)
+       return self.get_paginated_response(serializer.data)
+class VirtualMoneyExportView(ExportView):
+   """
+   Streams every active VirtualMoney instance as NDJSON or CSV.
+   """
+   queryset = VirtualMoney.objects.all()
+   serializer_class = VirtualMoneySerializer
+   filename = 'virtualmoney'
+
+   def get_queryset(self):
+       logger.info('Exporting VirtualMoney')
+       return super().get_queryset()
 class VirtualMoneyDetailView(APIView):
+   @etag_for(VirtualMoney)
    def get(self, request, id):
        try:
            virtual_money = VirtualMoney.objects.get(id=id)
@@ -546,31 +822,159 @@ class VirtualMoneyDetailView(APIView):
        except VirtualMoney.DoesNotExist:
            return Response({"error": "Virtual Money not found"}, status=status.HTTP_404_NOT_FOUND)
    def patch(self, request, id):
+       """
+       Partially update a grant. The row is locked for the duration of the
+       update and the change in amount is posted to the wallet ledger in the
+       same transaction.
+       """
        try:
-           virtual_money = VirtualMoney.objects.get(id= id)
-           serializer = VirtualMoneySerializer(virtual_money, data=request.data, partial=True)
-           if serializer.is_valid():
-               serializer.save()
-               return Response(serializer.data)
-           return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+           with transaction.atomic():
+               virtual_money = VirtualMoney.objects.select_for_update().get(id=id)
+               serializer = VirtualMoneySerializer(virtual_money, data=request.data, partial=True)
+               if serializer.is_valid():
+                   serializer.save()
+                   return Response(serializer.data)
+               return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
        except VirtualMoney.DoesNotExist:
            return Response({"error": "Virtual Money not found"}, status=status.HTTP_404_NOT_FOUND)
-
-
-       except VirtualMoney.DoesNotExist:
-           return Response({"error": "VirtualMoney not found"}, status=status.HTTP_404_NOT_FOUND)
    def delete(self, request, id):
        try:
-           virtual_money = VirtualMoney.objects.get(id=id)
-           virtual_money.is_active = False
-           virtual_money.save()
+           with transaction.atomic():
+               virtual_money = VirtualMoney.objects.select_for_update().get(id=id)
+               virtual_money.is_active = False
+               virtual_money.save()
            return Response(status=status.HTTP_204_NO_CONTENT)
        except VirtualMoney.DoesNotExist:
            return Response({"error": "VirtualMoney not found"}, status=status.HTTP_404_NOT_FOUND)
-class AchievementView(APIView):
+
+
+class WalletBalanceView(APIView):
+   """
+   Return a user's wallet balance from its materialized row, without
+   aggregating the ledger.
+   """
+   def get(self, request, user_id):
+       wallet = WalletBalance.objects.filter(user_id=user_id).first()
+       if wallet is None:
+           if not User.objects.filter(user_id=user_id).exists():
+               logger.error(f"User with ID {user_id} not found.")
+               return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+           wallet = WalletBalance(user_id=user_id)
+       serializer = WalletBalanceSerializer(wallet)
+       return Response(serializer.data)
+
+
+class UserStatsView(APIView):
+   """
+   Return a user's dashboard counters from their UserStats row, joined with
+   the user and wallet in a single query instead of aggregating results,
+   achievements and simulations.
+   """
+   def get(self, request, user_id):
+       user = User.objects.select_related('stats', 'wallet').filter(user_id=user_id).first()
+       if user is None:
+           logger.error(f"User with ID {user_id} not found.")
+           return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+       stats = getattr(user, 'stats', None) or UserStats(user=user)
+       wallet = getattr(user, 'wallet', None)
+       stats.balance = wallet.balance if wallet else Decimal('0.00')
+       serializer = UserStatsSerializer(stats)
+       return Response(serializer.data)
+
+
+class WalletLedgerView(KeysetPaginationMixin, APIView):
+   """
+   List a user's wallet ledger entries, oldest first.
+   """
+   def get(self, request, user_id):
+       entries = WalletLedgerEntry.objects.filter(user_id=user_id)
+       page = self.paginate_queryset(entries)
+       serializer = WalletLedgerEntrySerializer(page, many=True)
+       return self.get_paginated_response(serializer.data)
+
+
+class CacheStatsView(APIView):
+   """
+   Return this worker's detail cache counters (hits, misses, evictions).
+   """
+   def get(self, request):
+       return Response(detail_cache.stats())
+
+
+class LeaderboardMixin:
+   """
+   Resolves the board named by the URL metric and the optional `quiz`
+   query parameter, and formats ranked rows.
+   """
+   MAX_LIMIT = 100
+
+   def get_board(self, request, metric):
+       quiz = request.GET.get('quiz')
+       try:
+           key = board_key(metric, int(quiz) if quiz else None)
+       except ValueError as e:
+           return None, Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+       return get_board(key), None
+
+   def get_count(self, request, name, default):
+       try:
+           value = int(request.GET.get(name, default))
+       except ValueError:
+           value = default
+       return min(max(value, 0), self.MAX_LIMIT)
+
+   def format_rows(self, rows):
+       usernames = dict(User.all_objects.filter(user_id__in=[row['user_id'] for row in rows]).values_list('user_id', 'username'))
+       return [{**row, 'username': usernames.get(row['user_id']), 'value': str(row['value'])} for row in rows]
+
+
+class LeaderboardView(LeaderboardMixin, APIView):
+   """
+   Return the top `limit` users of a leaderboard (`score`, `money_earned`
+   or `balance`; pass `quiz` for a per-quiz board).
+   """
+   def get(self, request, metric):
+       board, error = self.get_board(request, metric)
+       if error:
+           return error
+       rows = board.top(self.get_count(request, 'limit', 10))
+       return Response({"board": board.key, "total": len(board), "results": self.format_rows(rows)})
+
+
+class LeaderboardRankView(LeaderboardMixin, APIView):
+   """
+   Return a user's rank and value on a leaderboard.
+   """
+   def get(self, request, metric, user_id):
+       board, error = self.get_board(request, metric)
+       if error:
+           return error
+       position = board.position(user_id)
+       if position is None:
+           return Response({"error": "User is not on this leaderboard"}, status=status.HTTP_404_NOT_FOUND)
+       row = self.format_rows(board.around(position, 0))[0]
+       return Response({"board": board.key, "total": len(board), **row})
+
+
+class LeaderboardNeighborsView(LeaderboardMixin, APIView):
+   """
+   Return the users ranked within `radius` places of a user.
+   """
+   def get(self, request, metric, user_id):
+       board, error = self.get_board(request, metric)
+       if error:
+           return error
+       position = board.position(user_id)
+       if position is None:
+           return Response({"error": "User is not on this leaderboard"}, status=status.HTTP_404_NOT_FOUND)
+       rows = board.around(position, self.get_count(request, 'radius', 5))
+       return Response({"board": board.key, "total": len(board), "rank": position + 1, "results": self.format_rows(rows)})
+class AchievementView(KeysetPaginationMixin, APIView):
    """
    Handles creating and listing Achievement instances.
    """
+   ordering_fields = ['date_achieved', 'title']
+
    def post(self, request):
        """
        Create a new Achievement instance.
@@ -578,22 +982,25 @@ class AchievementView(APIView):
        logger.info('POST request received for Achievement')
        serializer = AchievementSerializer(data=request.data)
        if serializer.is_valid():
-           serializer.save()
+           with transaction.atomic():
+               serializer.save()
            logger.info('Achievement created successfully')
            return Response(serializer.data, status=status.HTTP_201_CREATED)
        logger.error('Validation errors: %s', serializer.errors)
        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
    """
-   List all Achievement instances.
+   List all active Achievement instances.
    """
+   @etag_for(Achievement)
    def get(self, request):
        """
-       Retrieve a list of all Achievement instances.
+       Retrieve a list of all active Achievement instances.
        """
        logger.info('GET request received for Achievement list')
        achievements = Achievement.objects.all()
-       serializer = AchievementSerializer(achievements, many=True)
-       return Response(serializer.data)
+       page = self.paginate_queryset(achievements)
+       serializer = AchievementSerializer(page, many=True)
+       return self.get_paginated_response(serializer.data)
 
 
 class AchievementDetailView(APIView):
@@ -602,6 +1009,7 @@ class AchievementDetailView(APIView):
    """
 
 
+   @cached_detail(Achievement, 'id')
    def get(self, request,id ):
        """
        Retrieve a specific Achievement instance by ID.
@@ -622,14 +1030,70 @@ class AchievementDetailView(APIView):
        Partially update a specific Achievement instance by ID.
        """
        try:
-           achievement = Achievement.objects.get(id=id)
-           serializer = AchievementSerializer(achievement, data=request.data, partial=True)
-           if serializer.is_valid():
-               serializer.save()
-               return Response(serializer.data)
+           with transaction.atomic():
+               achievement = Achievement.objects.select_for_update().get(id=id)
+               serializer = AchievementSerializer(achievement, data=request.data, partial=True)
+               if serializer.is_valid():
+                   serializer.save()
+                   return Response(serializer.data)
            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
        except Achievement.DoesNotExist:
            return Response({"error": "Achievement not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
+class AchievementRuleView(KeysetPaginationMixin, APIView):
+   """
+   Handles creating and listing the rules that award achievements automatically.
+   """
+   ordering_fields = ['title']
 
+   @etag_for(AchievementRule)
+   def get(self, request):
+       logger.info('GET request received for AchievementRule list')
+       rules = AchievementRule.objects.filter(is_active=True)
+       page = self.paginate_queryset(rules)
+       serializer = AchievementRuleSerializer(page, many=True)
+       return self.get_paginated_response(serializer.data)
+
+   def post(self, request):
+       logger.info('POST request received for AchievementRule')
+       serializer = AchievementRuleSerializer(data=request.data)
+       if serializer.is_valid():
+           serializer.save()
+           logger.info(f"AchievementRule created with ID {serializer.data['id']}")
+           return Response(serializer.data, status=status.HTTP_201_CREATED)
+       return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AchievementRuleDetailView(APIView):
+   """
+   Handles retrieval, partial update, and soft deletion of an achievement rule.
+   """
+
+   def get_rule(self, id):
+       return AchievementRule.objects.filter(id=id, is_active=True).first()
+
+   @etag_for(AchievementRule)
+   def get(self, request, id):
+       rule = self.get_rule(id)
+       if rule is None:
+           return Response({"error": "Achievement rule not found"}, status=status.HTTP_404_NOT_FOUND)
+       return Response(AchievementRuleSerializer(rule).data)
+
+   def patch(self, request, id):
+       rule = self.get_rule(id)
+       if rule is None:
+           return Response({"error": "Achievement rule not found"}, status=status.HTTP_404_NOT_FOUND)
+       serializer = AchievementRuleSerializer(rule, data=request.data, partial=True)
+       if serializer.is_valid():
+           serializer.save()
+           return Response(serializer.data)
+       return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+   def delete(self, request, id):
+       rule = self.get_rule(id)
+       if rule is None:
+           return Response({"error": "Achievement rule not found"}, status=status.HTTP_404_NOT_FOUND)
+       rule.soft_delete()
+       logger.info(f"AchievementRule with ID {id} soft deleted")
+       return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assessment", "0006_remove_assessment_correct_answer"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assessment",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["assessment_id"],
+                name="assessment_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="assessment",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user_id", "assessment_id"],
+                name="assessment_active_user_idx",
+            ),
+        ),
+    ]
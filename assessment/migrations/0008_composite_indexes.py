@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assessment", "0007_active_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assessment",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["taken_at", "assessment_id"],
+                name="assessment_active_taken_idx",
+            ),
+        ),
+    ]
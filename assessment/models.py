@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from versioning.soft_delete import ACTIVE, ActiveManager, SoftDeleteManager
 
 class Assessment(models.Model):
     """
@@ -22,6 +23,15 @@ class Assessment(models.Model):
     answers = models.JSONField(default=list)    
     is_active = models.BooleanField(default=True)
     taken_at = models.DateTimeField(auto_now_add=True)  
+    objects = ActiveManager()
+    all_objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['assessment_id'], condition=ACTIVE, name='assessment_active_idx'),
+            models.Index(fields=['user_id', 'assessment_id'], condition=ACTIVE, name='assessment_active_user_idx'),
+            models.Index(fields=['taken_at', 'assessment_id'], condition=ACTIVE, name='assessment_active_taken_idx'),
+        ]
 
     def soft_delete(self):
         """Soft delete the assessment by marking it as inactive."""
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class BenchmarksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'benchmarks'
+
+    def ready(self):
+        if settings.BENCHMARK_DB_LATENCY:
+            from .latency import add_query_latency
+            add_query_latency(settings.BENCHMARK_DB_LATENCY)
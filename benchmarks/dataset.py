@@ -0,0 +1,352 @@
+"""
+Synthetic, referentially consistent data for scale tests and benchmarks.
+
+`DatasetGenerator.generate` creates reference rows first: markets spread
+over the risk levels and a pool of quizzes. It then creates users in
+chunks. Each chunk is written in one transaction and holds the users plus
+their grants, quiz results, investment simulations and achievements. Every
+per-user count is Poisson distributed around the configured mean, so some
+users are much busier than others. Quiz popularity follows a Zipf law,
+scores a clipped normal distribution, and investment returns the drift and
+volatility of the market's risk level (investment_simulation/monte_carlo.py).
+
+Bulk writes skip the signals that normally maintain the wallet, so the
+generator writes the matching ledger entries and balances itself, and
+each user's stats row. Every user's balance is the sum of their ledger,
+and no stake overdraws a wallet.
+Run `rebuild_leaderboards` afterwards to index the new results.
+
+While the users are written, the secondary indexes of the tables they fill
+and the substring search indexes are dropped, and they are built again
+once at the end: maintaining every foreign key, partial and composite
+index and the search triggers row by row costs more than the inserts.
+
+Everything is drawn from one seeded generator, so the same config and
+seed always produce the same data.
+"""
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import NamedTuple
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.fields import AutoFieldMixin
+from django.utils import timezone
+
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from investment_simulation.monte_carlo import TRADING_DAYS_PER_YEAR, make_rng, risk_profile
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from search import indexes as search_indexes
+from users.models import AVATAR_CHOICES, GENDER_CHOICES, User, UserStats
+from versioning.versions import bulk_write, bump_version
+from virtualmoney.models import VirtualMoney, WalletBalance, WalletLedgerEntry
+
+RISK_LEVELS = ('Low', 'Medium', 'High', 'Extreme')
+LOCATIONS = ('Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Kampala', 'Kigali', 'Dar es Salaam')
+GRANT_AMOUNTS = (100, 250, 500, 1000)
+# Models written per chunk of users, whose indexes are deferred.
+CHUNK_MODELS = (User, VirtualMoney, QuizResult, InvestmentSimulation, Achievement, WalletLedgerEntry, WalletBalance, UserStats)
+ACHIEVEMENT_TITLES = ('First Steps', 'Quiz Whiz', 'Market Explorer', 'Steady Saver', 'Risk Taker', 'Top Scorer')
+
+
+class DatasetConfig(NamedTuple):
+    users: int = 10_000
+    markets: int = 20
+    quizzes: int = 200
+    grants_per_user: float = 1.0
+    quiz_results_per_user: float = 5.0
+    simulations_per_user: float = 2.0
+    achievements_per_user: float = 1.0
+    score_mean: float = 70.0
+    score_sd: float = 15.0
+    money_per_point: float = 0.10
+    quiz_popularity: float = 1.2  # Zipf exponent; larger favours the first quizzes more
+    reward_share: float = 0.3  # share of achievements that pay Extra Virtual Money
+    reward_amount: int = 50
+    username_prefix: str = 'synthetic'
+    password: str = 'synthetic-password'
+    seed: int = 0
+    chunk_size: int = 20_000  # users per transaction
+    batch_size: int = 5_000  # rows per executemany call
+    cache_kib: int = 256 * 1024  # SQLite page cache while generating
+
+
+def amounts(cents):
+    """Decimal strings ("12.30") from integer cents; exact below 2**53 cents."""
+    return [f"{value / 100:.2f}" for value in cents.tolist()]
+
+
+@contextmanager
+def page_cache(kib):
+    """
+    Give SQLite a `kib` KiB page cache for the duration of the block. With
+    the default 2 MiB, index pages written by a large transaction spill to
+    disk and are read back, which halves the insert rate.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        previous = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA cache_size = {-int(kib)}')
+        try:
+            yield
+        finally:
+            cursor.execute(f'PRAGMA cache_size = {int(previous)}')
+
+
+@contextmanager
+def deferred_indexes(models):
+    """
+    Drop the secondary (non-unique) indexes of `models` and the search
+    indexes for the duration of the block, and build them again at the end.
+    """
+    # Outside a `with` block the editor runs each statement as it is asked
+    # to, which is all this needs; SQLite cannot enter one inside a
+    # transaction (as in tests).
+    editor = connection.schema_editor()
+    with transaction.atomic():
+        search_indexes.uninstall(connection)
+        with connection.cursor() as cursor:
+            for model in models:
+                constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                for name, constraint in constraints.items():
+                    if constraint['index'] and not constraint['unique'] and not constraint['primary_key']:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with transaction.atomic():
+            for model in models:
+                # The field and Meta indexes, as created with the table.
+                for statement in editor._model_indexes_sql(model):
+                    editor.execute(statement)
+            search_indexes.install(connection)
+
+
+class TableWriter:
+    """
+    Inserts rows of one model with `executemany`.
+
+    `bulk_create` prepares every value of every row through the field
+    API, which caps it at roughly 20k rows/s on SQLite. The generator knows
+    the type of everything it writes, so rows are passed to the driver as
+    they are. Only the fields left out are prepared, once per insert: their
+    defaults, or "now" for auto_now(_add) fields. Auto primary keys are
+    allocated from the current maximum, which assumes nothing else writes
+    to the table while the generator runs.
+    """
+
+    def __init__(self, model, columns, batch_size):
+        opts = model._meta
+        self.model = model
+        self.batch_size = batch_size
+        self.auto_pk = isinstance(opts.pk, AutoFieldMixin)
+        fields = [opts.get_field(name) for name in columns]
+        self.defaulted = [
+            field for field in opts.concrete_fields
+            if field not in fields and not (self.auto_pk and field.primary_key)
+        ]
+        targets = ([opts.pk] if self.auto_pk else []) + fields + self.defaulted
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(opts.db_table),
+            ', '.join(connection.ops.quote_name(field.column) for field in targets),
+            ', '.join(['%s'] * len(targets)),
+        )
+        if self.auto_pk:
+            self.next_pk = (model._base_manager.aggregate(last=Max(opts.pk.attname))['last'] or 0) + 1
+
+    def default_values(self):
+        now = timezone.now()
+        values = []
+        for field in self.defaulted:
+            value = now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False) else field.get_default()
+            values.append(field.get_db_prep_save(value, connection))
+        return tuple(values)
+
+    def insert(self, rows):
+        """Insert `rows` (tuples in column order) and return their primary keys."""
+        defaults = self.default_values()
+        if self.auto_pk:
+            pks = list(range(self.next_pk, self.next_pk + len(rows)))
+            self.next_pk += len(rows)
+            params = [(pk, *row, *defaults) for pk, row in zip(pks, rows)]
+        else:
+            pks = None
+            params = [(*row, *defaults) for row in rows]
+        with connection.cursor() as cursor:
+            for start in range(0, len(params), self.batch_size):
+                cursor.executemany(self.sql, params[start:start + self.batch_size])
+        if rows:
+            bump_version(self.model)
+            bulk_write.send(sender=self.model)
+        return pks
+
+
+class DatasetGenerator:
+    def __init__(self, config=DatasetConfig(), progress=None):
+        self.config = config
+        self.rng = make_rng(config.seed)
+        self.progress = progress
+        self.counts = {}
+        self.today = timezone.localdate()
+        self.writers = {}
+
+    def write(self, model, columns, rows):
+        writer = self.writers.get(model)
+        if writer is None:
+            writer = self.writers[model] = TableWriter(model, columns, self.config.batch_size)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(rows)
+        return writer.insert(rows)
+
+    @property
+    def total_rows(self):
+        return sum(self.counts.values())
+
+    def generate(self):
+        """Write the whole dataset and return {model name: rows written}."""
+        config = self.config
+        start = time.perf_counter()
+        with transaction.atomic():
+            levels = [RISK_LEVELS[i % len(RISK_LEVELS)] for i in range(config.markets)]
+            self.market_ids = self.write(Market, ['market_name', 'risk_level', 'description'], [
+                (f"{config.username_prefix} market {i}", level, f"Synthetic {level.lower()} risk market")
+                for i, level in enumerate(levels)
+            ])
+            self.market_profiles = [risk_profile(level) for level in levels]
+            self.quiz_ids = self.write(Quiz, ['quiz_text'], [
+                (f"Synthetic question {i}: which investment carries the most risk?",) for i in range(config.quizzes)
+            ])
+        ranks = np.arange(1, config.quizzes + 1, dtype=np.float64) ** -config.quiz_popularity
+        self.quiz_weights = ranks / ranks.sum()
+        self.password = make_password(config.password)
+        self.dates = [connection.ops.adapt_datefield_value(self.today - timedelta(days=days)) for days in range(365)]
+
+        with page_cache(config.cache_kib), deferred_indexes(CHUNK_MODELS):
+            for first in range(0, config.users, config.chunk_size):
+                with transaction.atomic():
+                    self.generate_chunk(first, min(first + config.chunk_size, config.users))
+                if self.progress:
+                    self.progress(self, time.perf_counter() - start)
+        if self.progress:
+            self.progress(self, time.perf_counter() - start)
+        reset_sql = connection.ops.sequence_reset_sql(no_style(), list(self.writers))
+        if reset_sql:
+            with connection.cursor() as cursor:
+                for sql in reset_sql:
+                    cursor.execute(sql)
+        return dict(self.counts)
+
+    def generate_chunk(self, first, last):
+        config, rng = self.config, self.rng
+        n = last - first
+        ages = rng.integers(13, 65, n).tolist()
+        genders = [GENDER_CHOICES[i][0] for i in rng.integers(0, len(GENDER_CHOICES), n)]
+        avatars = [AVATAR_CHOICES[i][0] for i in rng.integers(0, len(AVATAR_CHOICES), n)]
+        locations = [LOCATIONS[i] for i in rng.integers(0, len(LOCATIONS), n)]
+        incomes = amounts(np.round(rng.lognormal(np.log(2_000_000), 0.6, n)))
+        user_ids = np.array(self.write(
+            User, ['username', 'password', 'age', 'gender', 'location', 'income', 'avatar'],
+            [(f"{config.username_prefix}{first + i}", self.password, *values)
+             for i, values in enumerate(zip(ages, genders, locations, incomes, avatars))],
+        ))
+        # Every user has at least one grant so that they can invest.
+        grant_owner = np.repeat(user_ids, 1 + rng.poisson(max(config.grants_per_user - 1, 0), n))
+        result_owner = np.repeat(user_ids, rng.poisson(config.quiz_results_per_user, n))
+        simulation_owner = np.repeat(user_ids, rng.poisson(config.simulations_per_user, n))
+        achievement_owner = np.repeat(user_ids, rng.poisson(config.achievements_per_user, n))
+        ledger = []
+
+        grant_cents = rng.choice(GRANT_AMOUNTS, len(grant_owner)) * 100
+        grant_ids = self.write(VirtualMoney, ['user', 'amount'], list(zip(grant_owner.tolist(), amounts(grant_cents))))
+        ledger += self.entries(grant_ids, grant_owner, grant_cents, WalletLedgerEntry.GRANT)
+
+        scores = np.clip(np.round(rng.normal(config.score_mean, config.score_sd, len(result_owner))), 0, 100).astype(np.int64)
+        earned_cents = np.round(scores * config.money_per_point * 100).astype(np.int64)
+        quizzes = np.array(self.quiz_ids)[rng.choice(len(self.quiz_ids), len(result_owner), p=self.quiz_weights)]
+        result_ids = self.write(QuizResult, ['user', 'quiz', 'score', 'money_earned'], list(zip(
+            result_owner.tolist(), quizzes.tolist(), scores.tolist(), amounts(earned_cents),
+        )))
+        ledger += self.entries(result_ids, result_owner, earned_cents, WalletLedgerEntry.QUIZ_PAYOUT)
+
+        # Stakes are sized from what the user holds before investing, and a
+        # loss can at most wipe out the stake, so no stake can overdraw.
+        order = np.argsort(user_ids)
+        funds = np.zeros(n, dtype=np.int64)
+        np.add.at(funds, order[np.searchsorted(user_ids, grant_owner, sorter=order)], grant_cents)
+        np.add.at(funds, order[np.searchsorted(user_ids, result_owner, sorter=order)], earned_cents)
+        owner_index = order[np.searchsorted(user_ids, simulation_owner, sorter=order)]
+        per_user = np.bincount(owner_index, minlength=n)
+        stake_cents = np.maximum(
+            (funds[owner_index] * rng.uniform(0.05, 0.9, len(simulation_owner)) / per_user[owner_index]).astype(np.int64),
+            100,
+        )
+        markets = rng.integers(0, len(self.market_ids), len(simulation_owner))
+        years = rng.integers(20, TRADING_DAYS_PER_YEAR + 1, len(simulation_owner)) / TRADING_DAYS_PER_YEAR
+        drifts = np.array([profile.drift - 0.5 * profile.volatility ** 2 for profile in self.market_profiles])
+        volatilities = np.array([profile.volatility for profile in self.market_profiles])
+        growth = np.exp(rng.normal(drifts[markets] * years, volatilities[markets] * np.sqrt(years)))
+        profit_cents = np.maximum(np.round(stake_cents * (growth - 1)), -stake_cents).astype(np.int64)
+        simulation_ids = self.write(
+            InvestmentSimulation, ['user', 'market_id', 'amount_invested', 'profit_loss', 'outcome'],
+            list(zip(
+                simulation_owner.tolist(), np.array(self.market_ids)[markets].tolist(),
+                amounts(stake_cents), amounts(profit_cents),
+                ['Profit' if profit >= 0 else 'Loss' for profit in profit_cents.tolist()],
+            )),
+        )
+        ledger += self.entries(simulation_ids, simulation_owner, -stake_cents, WalletLedgerEntry.INVESTMENT_STAKE)
+        ledger += self.entries(simulation_ids, simulation_owner, stake_cents + profit_cents, WalletLedgerEntry.INVESTMENT_RETURN)
+
+        rewarded = rng.random(len(achievement_owner)) < config.reward_share
+        reward_cents = np.where(rewarded, config.reward_amount * 100, 0)
+        achievement_ids = self.write(
+            Achievement, ['user_id', 'title', 'description', 'criteria', 'date_achieved', 'reward_type', 'reward_amount'],
+            list(zip(
+                achievement_owner.tolist(),
+                [ACHIEVEMENT_TITLES[i] for i in rng.integers(0, len(ACHIEVEMENT_TITLES), len(achievement_owner))],
+                ["Synthetic achievement"] * len(achievement_owner),
+                ["Generated"] * len(achievement_owner),
+                [self.dates[i] for i in rng.integers(0, 365, len(achievement_owner))],
+                ['Extra Virtual Money' if reward else 'Badge' for reward in rewarded.tolist()],
+                amounts(reward_cents),
+            )),
+        )
+        ledger += self.entries(achievement_ids, achievement_owner, reward_cents, WalletLedgerEntry.ACHIEVEMENT_REWARD)
+
+        self.write(WalletLedgerEntry, ['user', 'amount', 'source', 'reference_id'], ledger)
+        balances = np.zeros(n, dtype=np.int64)
+        for owners, cents in (
+            (grant_owner, grant_cents), (result_owner, earned_cents),
+            (simulation_owner, profit_cents), (achievement_owner, reward_cents),
+        ):
+            np.add.at(balances, order[np.searchsorted(user_ids, owners, sorter=order)], cents)
+        self.write(WalletBalance, ['user', 'balance'], list(zip(user_ids.tolist(), amounts(balances))))
+
+        def per_owner(owners, weights=None):
+            return np.bincount(order[np.searchsorted(user_ids, owners, sorter=order)], weights, minlength=n).astype(np.int64)
+
+        self.write(UserStats, ['user', 'quizzes_taken', 'score_total', 'money_earned', 'achievements', 'active_simulations'], list(zip(
+            user_ids.tolist(), per_owner(result_owner).tolist(), per_owner(result_owner, scores).tolist(),
+            amounts(per_owner(result_owner, earned_cents)), per_owner(achievement_owner).tolist(),
+            per_owner(simulation_owner).tolist(),
+        )))
+
+    @staticmethod
+    def entries(ids, owners, cents, source):
+        """Ledger rows for the non-zero amounts (in cents) posted by the rows `ids`."""
+        keep = cents != 0
+        return [
+            (user_id, amount, source, reference_id)
+            for user_id, amount, reference_id in zip(
+                owners[keep].tolist(), amounts(cents[keep]), np.array(ids, dtype=np.int64)[keep].tolist(),
+            )
+        ]
@@ -0,0 +1,29 @@
+"""
+Simulated database round trips for benchmarks.
+
+SQLite answers from the local disk in microseconds, while the production
+database is across a network and every query waits about a millisecond
+for it. `add_query_latency` makes every query on every connection sleep
+that long first. The sleep releases the GIL as a network wait would, so
+a benchmark can show how the server handles requests that mostly wait.
+Only benchmark servers turn this on, through BENCHMARK_DB_LATENCY.
+"""
+import time
+
+from django.db.backends.signals import connection_created
+
+
+def add_query_latency(seconds):
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def connected(sender, connection, **kwargs):
+        # The wrapper list outlives reconnects, so add the delay only once.
+        # It goes first: connections open inside a request, while
+        # `connection.execute_wrapper()` blocks (see metrics.middleware) have
+        # wrappers pushed that they pop off the end when they exit.
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, delay)
+
+    connection_created.connect(connected, weak=False, dispatch_uid='benchmark_query_latency')
@@ -0,0 +1,322 @@
+"""
+Closed-loop HTTP load tester.
+
+`concurrency` virtual clients each send one request at a time for
+`duration` seconds. Each request picks a route from the weighted `ROUTES`
+mix. Requests that finish during the first `warmup` seconds are not
+recorded. `summarize` reports throughput, latency percentiles and error
+rates per route and overall.
+
+The client is a minimal HTTP/1.1 implementation on asyncio streams. It
+keeps the connection alive when the server allows it; gunicorn's sync
+workers do not, so each request then opens a new connection, as a browser
+would against the Procfile setup. A transport failure is recorded with
+status 0 and counts as an error, like any status of 400 or above.
+
+IDs used in request paths and bodies (users, markets, quizzes,
+achievements) are discovered through the API before the run, so any
+seeded server can be targeted.
+"""
+import asyncio
+import json
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+class Target(NamedTuple):
+    users: List[Tuple[int, str]]  # (user_id, username) of users with the known password
+    password: str
+    markets: List[int]
+    quizzes: List[int]
+    achievements: List[int] = []
+
+
+class Route(NamedTuple):
+    name: str
+    weight: float
+    build: Callable[[random.Random, Target], Tuple[str, str, Optional[dict]]]  # -> (method, path, body)
+
+
+def login(rng, target):
+    _, username = rng.choice(target.users)
+    return 'POST', '/auth/login/', {'username': username, 'password': target.password}
+
+
+def list_markets(rng, target):
+    return 'GET', '/api/markets/', None
+
+
+def submit_quiz_result(rng, target):
+    score = rng.randint(0, 100)
+    return 'POST', '/api/quiz-results/', {
+        'user': rng.choice(target.users)[0],
+        'quiz': rng.choice(target.quizzes),
+        'score': score,
+        'money_earned': f"{score / 10:.2f}",
+    }
+
+
+def grant_money(rng, target):
+    return 'POST', '/api/virtualmoney/', {
+        'user': rng.choice(target.users)[0],
+        'amount': f"{rng.choice((10, 25, 50, 100)):.2f}",
+    }
+
+
+def run_simulation(rng, target):
+    amount = rng.randint(100, 2000) / 100
+    profit = round(amount * rng.uniform(-0.5, 0.6), 2)
+    return 'POST', '/api/investment-simulations/', {
+        'user': rng.choice(target.users)[0],
+        'market_id': rng.choice(target.markets),
+        'amount_invested': f"{amount:.2f}",
+        'profit_loss': f"{profit:.2f}",
+        'outcome': 'Profit' if profit >= 0 else 'Loss',
+    }
+
+
+def run_monte_carlo(rng, target):
+    return 'POST', '/api/investment-simulations/monte-carlo/', {
+        'market_id': rng.choice(target.markets),
+        'amount_invested': '100.00',
+        'paths': 1000,
+        'steps': 252,
+    }
+
+
+ROUTES = {
+    route.name: route for route in (
+        Route('login', 5, login),
+        Route('list_markets', 50, list_markets),
+        Route('submit_quiz_result', 20, submit_quiz_result),
+        Route('grant_money', 10, grant_money),
+        Route('run_simulation', 15, run_simulation),
+        Route('monte_carlo', 0, run_monte_carlo),
+    )
+}
+
+
+def read_routes(prefix='/api/'):
+    """
+    The market, quiz and achievement list and detail reads, under `prefix`:
+    '/api/' for the sync views, '/api/async/' for their async versions.
+    """
+    def get(path, ids=None):
+        if ids is None:
+            return lambda rng, target: ('GET', f"{prefix}{path}", None)
+        return lambda rng, target: ('GET', f"{prefix}{path}{rng.choice(getattr(target, ids))}/", None)
+    return [
+        Route('market_list', 20, get('markets/')),
+        Route('market_detail', 20, get('markets/', 'markets')),
+        Route('quiz_list', 15, get('quizzes/')),
+        Route('quiz_detail', 20, get('quizzes/', 'quizzes')),
+        Route('achievement_list', 10, get('achievements/')),
+        Route('achievement_detail', 15, get('achievements/', 'achievements')),
+    ]
+
+
+def parse_mix(spec):
+    """
+    Routes weighted by a "name=weight,name=weight" spec. Routes not named
+    keep their default weight; give them 0 to leave them out.
+    """
+    weights = {name: route.weight for name, route in ROUTES.items()}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, weight = item.partition('=')
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route {name!r}; choose from {', '.join(ROUTES)}.")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name!r}: {weight!r}.")
+        if weights[name] < 0:
+            raise ValueError(f"Invalid weight for {name!r}: {weight!r}.")
+    routes = [ROUTES[name]._replace(weight=weight) for name, weight in weights.items() if weight > 0]
+    if not routes:
+        raise ValueError("The mix has no route with a positive weight.")
+    return routes
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened whenever the server closes it."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = b'' if body is None else json.dumps(body).encode()
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Accept: application/json\r\nContent-Length: {len(payload)}\r\n"
+        )
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        try:
+            self.writer.write(head.encode('latin-1') + b'\r\n' + payload)
+            await self.writer.drain()
+            return await self.read_response()
+        except (OSError, asyncio.IncompleteReadError, HTTPError, ValueError):
+            self.close()
+            raise
+
+    async def read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b'HTTP/1.'):
+            raise HTTPError(f"Malformed status line {status_line!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                body += chunk[:-2]
+            body = bytes(body)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close' or parts[0] == b'HTTP/1.0':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def split_url(base_url):
+    url = urlsplit(base_url)
+    if url.scheme != 'http' or not url.hostname:
+        raise ValueError(f"Only http:// URLs are supported, not {base_url!r}.")
+    return url.hostname, url.port or 80
+
+
+async def get_json(connection, path):
+    status, body = await connection.request('GET', path)
+    if status != 200:
+        raise HTTPError(f"GET {path} returned {status}")
+    return json.loads(body)
+
+
+async def discover(base_url, username_prefix, password):
+    """Find the IDs the request bodies need through the API."""
+    connection = Connection(*split_url(base_url))
+    try:
+        users = await get_json(connection, f"/api/users/?page_size=500&username={username_prefix}")
+        markets = await get_json(connection, '/api/markets/?page_size=500')
+        quizzes = await get_json(connection, '/api/quizzes/?page_size=500')
+        achievements = await get_json(connection, '/api/achievements/?page_size=500')
+    finally:
+        connection.close()
+    target = Target(
+        users=[(user['user_id'], user['username']) for user in users['results']
+               if user['username'].startswith(username_prefix)],
+        password=password,
+        markets=[market['market_id'] for market in markets['results']],
+        quizzes=[quiz['id'] for quiz in quizzes['results']],
+        achievements=[achievement['id'] for achievement in achievements['results']],
+    )
+    if not (target.users and target.markets and target.quizzes):
+        raise HTTPError(f"The server at {base_url} has no {username_prefix!r} users, markets or quizzes; seed it first.")
+    return target
+
+
+class Sample(NamedTuple):
+    route: str
+    status: int
+    seconds: float
+
+
+async def run_load(base_url, target, routes, concurrency, duration, warmup=0.0, seed=0):
+    """Drive `routes` with `concurrency` clients and return the recorded samples."""
+    host, port = split_url(base_url)
+    names = [route.name for route in routes]
+    weights = [route.weight for route in routes]
+    builders = {route.name: route.build for route in routes}
+    samples = []
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    record_after, stop_at = started + warmup, started + warmup + duration
+
+    async def client(index):
+        rng = random.Random(seed * 100_003 + index)
+        connection = Connection(host, port)
+        try:
+            while loop.time() < stop_at:
+                name = rng.choices(names, weights)[0]
+                method, path, body = builders[name](rng, target)
+                start = time.perf_counter()
+                try:
+                    status, _ = await connection.request(method, path, body)
+                except (OSError, asyncio.IncompleteReadError, HTTPError, ValueError):
+                    status = 0
+                elapsed = time.perf_counter() - start
+                if loop.time() >= record_after:
+                    samples.append(Sample(name, status, elapsed))
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return samples
+
+
+def summarize_samples(samples, duration):
+    seconds = np.array([sample.seconds for sample in samples])
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    errors = sum(1 for sample in samples if sample.status == 0 or sample.status >= 400)
+    summary = {
+        'requests': len(samples),
+        'throughput': len(samples) / duration if duration else 0.0,
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'statuses': dict(sorted(statuses.items())),
+    }
+    if samples:
+        percentiles = np.percentile(seconds, LATENCY_PERCENTILES) * 1000
+        summary['latency_ms'] = {
+            'mean': float(seconds.mean() * 1000),
+            **{f"p{p}": float(value) for p, value in zip(LATENCY_PERCENTILES, percentiles)},
+            'max': float(seconds.max() * 1000),
+        }
+    else:
+        summary['latency_ms'] = None
+    return summary
+
+
+def summarize(samples, duration):
+    """{'routes': {name: summary}, 'total': summary}; throughput is per second of `duration`."""
+    by_route: Dict[str, list] = {}
+    for sample in samples:
+        by_route.setdefault(sample.route, []).append(sample)
+    return {
+        'routes': {name: summarize_samples(by_route[name], duration) for name in sorted(by_route)},
+        'total': summarize_samples(samples, duration),
+    }
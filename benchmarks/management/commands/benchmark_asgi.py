@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import server
+from benchmarks.dataset import DatasetConfig
+from benchmarks.loadtest import HTTPError, discover, read_routes, run_load, summarize
+
+PREFIXES = {'wsgi': '/api/', 'asgi': '/api/async/'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI and ASGI deployment profiles on the read-heavy endpoints. "
+        "Seeds one SQLite database, then serves it with the sync views under gunicorn's "
+        "sync workers (Procfile) and with the async views under uvicorn workers "
+        "(Procfile.asgi), with the same number of workers, and drives the same "
+        "market/quiz/achievement read mix at each. Every query waits --db-latency "
+        "seconds first, standing in for the network round trip to a remote database; "
+        "the gain grows with it, and without it both profiles are bound by the CPU."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users to seed.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the dataset and of the request mix.")
+        parser.add_argument('--db-latency', type=float, default=0.005, help="Seconds each query waits.")
+        parser.add_argument('--bind', default='127.0.0.1:8765')
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes of each profile.")
+        parser.add_argument('--concurrency', type=int, default=64, help="Concurrent clients.")
+        parser.add_argument('--duration', type=float, default=20.0, help="Seconds measured per profile.")
+        parser.add_argument('--warmup', type=float, default=3.0, help="Seconds run before measuring.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        log = self.stderr if options['json'] else self.stdout
+        config = DatasetConfig()
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='investika-asgi-') as directory:
+            env = server.environment(directory, BENCHMARK_DB_LATENCY=options['db_latency'])
+            try:
+                log.write(f"Seeding {options['users']} users")
+                # Seed without the latency; it only matters to the servers.
+                server.seed(dict(env, BENCHMARK_DB_LATENCY='0'), options['users'], options['seed'])
+                for profile, prefix in PREFIXES.items():
+                    with server.serve(env, profile, options['bind'], options['workers'],
+                                      log_path=os.path.join(directory, f"{profile}.log")) as base_url:
+                        log.write(f"Driving {profile} ({prefix}) with {options['concurrency']} clients")
+                        results[profile] = self.drive(base_url, read_routes(prefix), config, options)
+            except server.ServerError as e:
+                raise CommandError(str(e))
+        wsgi, asgi = results['wsgi']['total'], results['asgi']['total']
+        results['gain'] = {
+            'throughput': asgi['throughput'] / wsgi['throughput'] if wsgi['throughput'] else None,
+            'p50': self.ratio(wsgi, asgi, 'p50'),
+            'p99': self.ratio(wsgi, asgi, 'p99'),
+        }
+        results['config'] = {
+            name: options[name] for name in
+            ('users', 'seed', 'db_latency', 'workers', 'concurrency', 'duration', 'warmup')
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.report(results)
+
+    def drive(self, base_url, routes, config, options):
+        async def main():
+            target = await discover(base_url, config.username_prefix, config.password)
+            return await run_load(
+                base_url, target, routes, options['concurrency'], options['duration'],
+                warmup=options['warmup'], seed=options['seed'],
+            )
+        try:
+            samples = asyncio.run(main())
+        except (OSError, HTTPError, ValueError) as e:
+            raise CommandError(f"Load test against {base_url} failed: {e}")
+        return summarize(samples, options['duration'])
+
+    @staticmethod
+    def ratio(wsgi, asgi, percentile):
+        """The ASGI latency percentile as a multiple of the WSGI one."""
+        if not (wsgi['latency_ms'] and asgi['latency_ms'] and wsgi['latency_ms'][percentile]):
+            return None
+        return asgi['latency_ms'][percentile] / wsgi['latency_ms'][percentile]
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'profile':<8} {'route':<20} {'requests':>9} {'req/s':>9} {'errors':>8} "
+            f"{'p50 ms':>9} {'p99 ms':>9}"
+        )
+        for profile in PREFIXES:
+            rows = list(results[profile]['routes'].items()) + [('total', results[profile]['total'])]
+            for name, summary in rows:
+                latency = summary['latency_ms'] or {'p50': 0.0, 'p99': 0.0}
+                self.stdout.write(
+                    f"{profile:<8} {name:<20} {summary['requests']:>9} {summary['throughput']:>9.1f} "
+                    f"{summary['error_rate']:>8.1%} {latency['p50']:>9.1f} {latency['p99']:>9.1f}"
+                )
+        gain = results['gain']
+        if gain['throughput'] is None:
+            self.stdout.write(self.style.WARNING("The WSGI run served no requests; nothing to compare."))
+            return
+        self.stdout.write(
+            f"ASGI serves {gain['throughput']:.2f}x the requests per second of WSGI"
+            + (f", at {gain['p50']:.2f}x its p50 and {gain['p99']:.2f}x its p99 latency."
+               if gain['p50'] and gain['p99'] else ".")
+        )
@@ -0,0 +1,55 @@
+import warnings
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from benchmarks.micro import Fixture
+from benchmarks.plans import MIN_ROWS, capture, check
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every query of every GET view in api/urls.py, with each ordering "
+        "the list views allow and their filters, and fail if any reads a table of "
+        "at least --min-rows rows in full. A dataset of --users users is generated "
+        "on top of the database's own rows in a transaction that is rolled back "
+        "afterwards, and the tables are analyzed first so the planner sees its size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help="Users in the generated dataset.")
+        parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help="Smallest table whose full scan fails.")
+        parser.add_argument('--show-plans', action='store_true', help="Print the plan of every query.")
+
+    def handle(self, *args, **options):
+        try:
+            with warnings.catch_warnings(), transaction.atomic():
+                warnings.filterwarnings('ignore', '.*is not compatible with schema generation')
+                fixture = Fixture(users=options['users'])
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                queries = capture(fixture)
+                plans, findings = check(queries, options['min_rows'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options['show_plans']:
+            for plan in plans:
+                self.stdout.write(f"{plan.query.route} ({plan.query.variant})\n  {plan.query.sql}")
+                self.stdout.write('  ' + plan.detail.replace('\n', '\n  '))
+        failures = [finding for finding in findings if finding.allowed is None]
+        for finding in findings:
+            query = finding.plan.query
+            line = f"{query.route} ({query.variant}) scans {finding.table} ({finding.rows} rows)"
+            if finding.allowed:
+                self.stdout.write(f"{line}: allowed, {finding.allowed}")
+            else:
+                self.stdout.write(self.style.ERROR(line) + f"\n  {query.sql}")
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(plans)} queries read a large table in full")
+        self.stdout.write(self.style.SUCCESS(f"None of the {len(plans)} queries reads a large table in full"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from benchmarks.dataset import DatasetConfig, DatasetGenerator
+from leaderboard.boards import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic, referentially consistent dataset (users, grants, "
+        "quiz results, investment simulations, achievements and their wallet "
+        "ledger) for scale tests and benchmarks. The same options and --seed "
+        "always produce the same data."
+    )
+
+    def add_arguments(self, parser):
+        defaults = DatasetConfig()
+        for name, value in defaults._asdict().items():
+            if name == 'password':
+                continue
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+        parser.add_argument('--password', default=defaults.password, help="Password of every generated user.")
+        parser.add_argument('--skip-leaderboards', action='store_true',
+                            help="Do not rebuild the leaderboards afterwards.")
+
+    def handle(self, *args, **options):
+        config = DatasetConfig(**{name: options[name] for name in DatasetConfig._fields})
+        generator = DatasetGenerator(config, progress=self.report)
+        try:
+            counts = generator.generate()
+        except IntegrityError as e:
+            raise CommandError(f"Could not write the dataset ({e}); choose another --username-prefix.")
+        for model, count in counts.items():
+            self.stdout.write(f"  {model}: {count}")
+        if not options['skip_leaderboards']:
+            self.stdout.write(f"Rebuilt leaderboards with {rebuild()} entries")
+        self.stdout.write(self.style.SUCCESS(f"Generated {generator.total_rows} rows"))
+
+    def report(self, generator, seconds):
+        rows = generator.total_rows
+        self.stdout.write(f"{rows} rows in {seconds:.1f} s ({rows / seconds:,.0f} rows/s)")
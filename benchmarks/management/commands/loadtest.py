@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import server
+from benchmarks.dataset import DatasetConfig
+from benchmarks.loadtest import HTTPError, discover, parse_mix, run_load, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the API. Seeds a fresh SQLite database with generate_dataset, "
+        "starts gunicorn as the Procfile (or Procfile.asgi) does and drives a "
+        "weighted mix of routes at a fixed concurrency, then reports throughput, "
+        "latency percentiles and error rates per route. Use --url to target a "
+        "server that is already running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running, seeded server; nothing is seeded or started.")
+        parser.add_argument('--database-url', help="Seed and serve this database instead of a temporary SQLite file.")
+        parser.add_argument('--no-seed', action='store_true', help="Serve --database-url as it is.")
+        parser.add_argument('--users', type=int, default=1000, help="Users to seed.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the dataset and of the request mix.")
+        parser.add_argument('--username-prefix', default=DatasetConfig().username_prefix)
+        parser.add_argument('--password', default=DatasetConfig().password, help="Password of the seeded users.")
+        parser.add_argument('--profile', choices=sorted(server.PROFILES), default='wsgi',
+                            help="wsgi serves like Procfile, asgi like Procfile.asgi.")
+        parser.add_argument('--bind', default='127.0.0.1:8765')
+        parser.add_argument('--workers', type=int, default=4, help="gunicorn worker processes.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Concurrent clients.")
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds measured.")
+        parser.add_argument('--warmup', type=float, default=5.0, help="Seconds run before measuring.")
+        parser.add_argument('--mix', default='', help="Route weights as name=weight,...; e.g. login=0,monte_carlo=5.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            routes = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.log = self.stderr if options['json'] else self.stdout
+        if options['url']:
+            results = self.drive(options['url'].rstrip('/'), routes, options)
+        else:
+            with tempfile.TemporaryDirectory(prefix='investika-loadtest-') as directory:
+                results = self.serve_and_drive(directory, routes, options)
+        results['config'] = {
+            'url': options['url'],
+            'profile': None if options['url'] else options['profile'],
+            'workers': None if options['url'] else options['workers'],
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'warmup': options['warmup'],
+            'users': None if options['url'] else options['users'],
+            'seed': options['seed'],
+            'mix': {route.name: route.weight for route in routes},
+            'commit': self.commit(),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.report(results)
+
+    def serve_and_drive(self, directory, routes, options):
+        env = server.environment(directory, options['database_url'])
+        try:
+            if not options['no_seed']:
+                self.log.write(f"Seeding {options['users']} users")
+                server.seed(env, options['users'], options['seed'], options['username_prefix'], options['password'])
+            with server.serve(env, options['profile'], options['bind'], options['workers'],
+                              log_path=os.path.join(directory, 'gunicorn.log')) as base_url:
+                self.log.write(f"gunicorn ({options['profile']}) is serving {base_url} with {options['workers']} workers")
+                return self.drive(base_url, routes, options)
+        except server.ServerError as e:
+            raise CommandError(str(e))
+
+    def drive(self, base_url, routes, options):
+        async def main():
+            target = await discover(base_url, options['username_prefix'], options['password'])
+            self.log.write(
+                f"Driving {options['concurrency']} clients for {options['warmup']:g} s warmup "
+                f"+ {options['duration']:g} s"
+            )
+            return await run_load(
+                base_url, target, routes, options['concurrency'], options['duration'],
+                warmup=options['warmup'], seed=options['seed'],
+            )
+        try:
+            samples = asyncio.run(main())
+        except (OSError, HTTPError, ValueError) as e:
+            raise CommandError(f"Load test against {base_url} failed: {e}")
+        return summarize(samples, options['duration'])
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'route':<20} {'requests':>9} {'req/s':>9} {'errors':>8} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        )
+        rows = list(results['routes'].items()) + [('total', results['total'])]
+        for name, summary in rows:
+            latency = summary['latency_ms'] or {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+            self.stdout.write(
+                f"{name:<20} {summary['requests']:>9} {summary['throughput']:>9.1f} "
+                f"{summary['error_rate']:>8.1%} {latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}"
+            )
+        failing = {name: summary['statuses'] for name, summary in rows if summary['errors']}
+        for name, statuses in failing.items():
+            self.stdout.write(self.style.WARNING(f"{name} statuses: {statuses}"))
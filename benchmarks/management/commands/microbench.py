@@ -0,0 +1,135 @@
+import json
+import os
+import platform
+import subprocess
+import warnings
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from benchmarks.micro import CALIBRATION, Fixture, collect_cases, compare, measure, speed_shift
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark every serializer in api/serializers.py, every FilterSet and "
+        "every APIView method. Reports ops/sec and allocations per case and flags "
+        "regressions against a stored baseline. The data is created in a transaction "
+        "that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filter', default='', help="Only run cases whose name contains this text.")
+        parser.add_argument('--users', type=int, default=200, help="Users in the generated dataset.")
+        parser.add_argument('--min-time', type=float, default=0.2, help="Seconds timed per case.")
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'),
+                            help="Baseline file to compare with (and to write with --save).")
+        parser.add_argument('--save', action='store_true', help="Store the results as the new baseline.")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Relative slowdown or allocation growth that counts as a regression.")
+        parser.add_argument('--strict', action='store_true', help="Fail on regressions and broken cases.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        log = self.stderr if options['json'] else self.stdout
+        # DEBUG keeps every query in connection.queries, which would show up
+        # in the timings and allocations; the test runner turns it off too.
+        try:
+            with override_settings(DEBUG=False), warnings.catch_warnings(), transaction.atomic():
+                warnings.filterwarnings('ignore', '.*is not compatible with schema generation')
+                fixture = Fixture(users=options['users'])
+                # The calibration case always runs: it is what the others are scaled by.
+                cases = [
+                    case for case in collect_cases(fixture)
+                    if case.name == CALIBRATION or options['filter'] in case.name
+                ]
+                results = measure(
+                    cases, options['min_time'], options['rounds'],
+                    progress=None if options['json'] else self.write_result,
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+        baseline = self.load_baseline(options['baseline'])
+        stored = baseline.get('benchmarks', {}) if baseline else {}
+        regressions = compare(results, stored, options['threshold'])
+        shift = speed_shift(results, stored)
+        broken = [result for result in results if result.error]
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'benchmarks': {result.name: result._asdict() for result in results},
+                'regressions': [dict(regression._asdict(), change=regression.change) for regression in regressions],
+                'baseline': baseline.get('commit') if baseline else None,
+                'speed_shift': shift,
+            }, indent=2))
+        else:
+            self.write_summary(results, regressions, broken, baseline, shift, options['threshold'])
+        if options['save']:
+            self.save_baseline(options['baseline'], results, baseline)
+            log.write(f"Saved baseline to {options['baseline']}")
+        if options['strict'] and (regressions or broken):
+            raise CommandError(f"{len(regressions)} regressions and {len(broken)} broken cases")
+
+    def write_result(self, result):
+        if result.error:
+            self.stdout.write(self.style.ERROR(f"{result.name:<60} {result.error}"))
+        else:
+            self.stdout.write(
+                f"{result.name:<60} {result.ops_per_sec:>12,.1f} ops/s "
+                f"{result.peak_bytes / 1024:>10,.1f} KiB peak {result.retained_bytes / 1024:>8,.1f} KiB retained"
+            )
+
+    def write_summary(self, results, regressions, broken, baseline, shift, threshold):
+        if baseline is None:
+            self.stdout.write("No baseline to compare with; store one with --save.")
+        elif abs(shift - 1) > threshold:
+            self.stdout.write(self.style.WARNING(
+                f"The calibration workload ran {shift - 1:+.0%} against the baseline: the machine is "
+                f"busier or faster than when it was stored. Cases are compared after scaling by it."
+            ))
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(
+                f"REGRESSION {regression.name} {regression.metric}: "
+                f"{regression.baseline:,.1f} -> {regression.current:,.1f} ({regression.change:+.0%})"
+            ))
+        self.stdout.write(f"{len(results)} cases, {len(broken)} broken, {len(regressions)} regressions")
+
+    def load_baseline(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            raise CommandError(f"Unreadable baseline {path}: {e}")
+
+    def save_baseline(self, path, results, previous):
+        # Cases not run this time (see --filter) keep their stored numbers.
+        benchmarks = dict(previous.get('benchmarks', {})) if previous else {}
+        for result in results:
+            if not result.error:
+                benchmarks[result.name] = {'ops_per_sec': result.ops_per_sec, 'peak_bytes': result.peak_bytes}
+        with open(path, 'w') as f:
+            json.dump({
+                'commit': self.commit(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'benchmarks': dict(sorted(benchmarks.items())),
+            }, f, indent=2)
+            f.write('\n')
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
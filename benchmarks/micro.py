@@ -0,0 +1,489 @@
+"""
+Microbenchmarks of the API's hot pieces.
+
+`collect_cases` finds what to measure in the source rather than from a
+hand-kept list:
+- every serializer class in api/serializers.py, serialized (one instance
+  and a page of 100) and validated against a payload;
+- every FilterSet in api/views.py, filtering a queryset and fetching a page;
+- every method of every APIView routed in api/urls.py, called through
+  APIRequestFactory and rendered.
+
+A class or route without an entry in the tables below becomes a failing
+case, so a new serializer, filter or endpoint cannot be missed silently.
+One more case, `calibration/workload`, runs a fixed workload that no change to the
+code can speed up or slow down; it measures the machine.
+
+`measure` reports operations per second and allocations. The speed is the
+best of several timed rounds, as timeit does. Allocations are the peak and
+the retained traced memory of one operation (tracemalloc). Cases that
+write run in a savepoint that is rolled back, so every call sees the same
+data. Cached views are measured warm, the way repeated requests see them.
+Results are compared with a stored baseline by `compare`, after scaling
+by how much faster or slower the calibration case ran.
+"""
+import datetime
+import gc
+import inspect
+import json
+import time
+import tracemalloc
+from typing import Callable, NamedTuple, Optional
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django_filters import FilterSet
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from achievements.models import Achievement, AchievementRule
+from api import serializers as api_serializers
+from api import urls as api_urls
+from api import views as api_views
+from assessment.models import Assessment
+from benchmarks.dataset import DatasetConfig, DatasetGenerator
+from investment_simulation.models import InvestmentSimulation, SimulationJob
+from leaderboard.boards import rebuild
+from market.models import Market
+from market.timeseries import ingest_bars
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from users.models import User
+from virtualmoney.models import VirtualMoney, WalletLedgerEntry
+
+LIST_SIZE = 100
+HTTP_METHODS = ('get', 'post', 'put', 'patch', 'delete')
+PRICE_DAYS = 120
+CALIBRATION = 'calibration/workload'
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], object]
+    writes: bool = False
+
+
+class Result(NamedTuple):
+    name: str
+    ops_per_sec: Optional[float]
+    peak_bytes: Optional[int]
+    retained_bytes: Optional[int]
+    error: Optional[str] = None
+
+
+class Fixture:
+    """A small generated dataset plus one row of every table the API reads."""
+
+    def __init__(self, users=200, seed=0):
+        DatasetGenerator(DatasetConfig(
+            users=users, markets=4, quizzes=20, username_prefix='microbench', seed=seed,
+        )).generate()
+        first = lambda model: model._default_manager.order_by('pk').first()
+        self.user = first(User)
+        self.fresh_user = User.objects.create_user(username='microbench-fresh', password='microbench-password')
+        self.market, self.other_market = list(Market.objects.order_by('pk')[:2])
+        self.quiz = first(Quiz)
+        self.quiz_result = first(QuizResult)
+        self.simulation = first(InvestmentSimulation)
+        self.virtual_money = first(VirtualMoney)
+        self.achievement = first(Achievement)
+        self.assessment = Assessment.objects.create(user_id=self.user, question_text='Microbench question', answers=['a', 'b'])
+        self.rule = AchievementRule.objects.create(
+            title='Microbench rule', description='Scores over 50', trigger=AchievementRule.QUIZ_RESULT,
+            conditions={'min_score': 50},
+        )
+        self.job = SimulationJob.objects.create(user=self.user, params={})
+        self.ledger_entry = first(WalletLedgerEntry)
+        self.end = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.end - datetime.timedelta(days=PRICE_DAYS)
+        for market in (self.market, self.other_market):
+            ingest_bars(market.market_id, [
+                ((self.end - datetime.timedelta(days=i)).timestamp(), 100 + i % 7, 104, 98, 101 + i % 5, 1000)
+                for i in range(PRICE_DAYS + 1)
+            ])
+        rebuild()
+
+
+# Valid input of every serializer in api/serializers.py, by class name.
+SERIALIZER_PAYLOADS = {
+    'MarketSerializer': lambda f: {'market_name': 'Microbench market', 'risk_level': 'Low', 'description': 'Benchmark market'},
+    'InvestmentSimulationSerializer': lambda f: {
+        'user': f.user.pk, 'market_id': f.market.pk, 'amount_invested': '10.00', 'profit_loss': '1.50', 'outcome': 'Profit',
+    },
+    'QuizSerializer': lambda f: {'quiz_text': 'Which investment carries the most risk?'},
+    'QuizResultSerializer': lambda f: {'user': f.user.pk, 'quiz': f.quiz.pk, 'score': 80, 'money_earned': '8.00'},
+    'AssessmentSerializer': lambda f: {'user_id': f.user.pk, 'question_text': 'How do you invest?', 'answers': ['a', 'b']},
+    'UserSerializer': lambda f: {
+        'username': 'microbench-new', 'password': 'microbench-password', 'confirm_password': 'microbench-password',
+    },
+    'RegisterSerializer': lambda f: {'username': 'microbench-new', 'password': 'microbench-password'},
+    'VirtualMoneySerializer': lambda f: {'user': f.user.pk, 'amount': '25.00'},
+    'AchievementSerializer': lambda f: {
+        'user_id': f.user.pk, 'title': 'Microbench', 'description': 'Benchmark', 'criteria': 'None',
+        'date_achieved': f.end.date().isoformat(), 'reward_type': 'Badge',
+    },
+    'AchievementRuleSerializer': lambda f: {
+        'title': 'Microbench rule', 'description': 'Scores over 50', 'trigger': AchievementRule.QUIZ_RESULT,
+        'conditions': {'min_score': 50},
+    },
+    'WalletBalanceSerializer': lambda f: {'user': f.fresh_user.pk, 'balance': '10.00'},
+    'UserStatsSerializer': lambda f: {'user': f.fresh_user.pk, 'quizzes_taken': 1, 'money_earned': '8.00'},
+    'WalletLedgerEntrySerializer': lambda f: {
+        'user': f.user.pk, 'amount': '1.00', 'source': WalletLedgerEntry.GRANT, 'reference_id': 1,
+    },
+    'MonteCarloRequestSerializer': lambda f: {'market_id': f.market.pk, 'amount_invested': '100.00', 'paths': 1000, 'steps': 252},
+    'SimulationJobRequestSerializer': lambda f: {'user': f.user.pk, 'kind': SimulationJob.MONTE_CARLO},
+    'SimulationJobSerializer': lambda f: {'user': f.user.pk, 'kind': SimulationJob.MONTE_CARLO, 'params': {}},
+    'BacktestStrategySerializer': lambda f: {'strategy': 'dca', 'every': 5},
+    'BacktestRequestSerializer': lambda f: {
+        'user': f.user.pk, 'strategy': 'rebalance', 'market_ids': [f.market.pk, f.other_market.pk],
+        'amount_invested': '10.00', 'start': f.start.isoformat(), 'end': f.end.isoformat(),
+    },
+    'BacktestBatchRequestSerializer': lambda f: {
+        'user': f.user.pk, 'strategies': [{'strategy': 'buy_and_hold'}, {'strategy': 'dca'}],
+        'markets': [[f.market.pk], [f.market.pk, f.other_market.pk]],
+        'amount_invested': '10.00', 'start': f.start.isoformat(), 'end': f.end.isoformat(),
+    },
+    'BatchSubRequestSerializer': lambda f: {'id': 'user', 'method': 'get', 'path': f"/api/users/{f.user.pk}/"},
+    'BatchRequestSerializer': lambda f: {'requests': [
+        {'id': 'user', 'path': f"/api/users/{f.user.pk}/"},
+        {'id': 'results', 'path': f"/api/quiz-results/?user={f.user.username}"},
+        {'id': 'money', 'path': '/api/virtualmoney/'},
+        {'id': 'achievements', 'path': '/api/achievements/'},
+        {'id': 'markets', 'path': '/api/markets/'},
+    ]},
+}
+
+# Query parameters of every FilterSet in api/views.py, by class name.
+FILTER_PARAMS = {
+    'UserFilter': {'username': 'microbench1', 'is_active': 'true'},
+    'MarketFilter': {'name': 'market'},
+    'InvestmentSimulationFilter': {'user': 'microbench1', 'risk_level': 'High', 'market': '1'},
+    'QuizResultFilter': {'score_min': '50', 'score_max': '90', 'user': 'microbench1'},
+}
+
+# URL kwargs of every route in api/urls.py.
+ROUTE_KWARGS = {
+    'market-list': lambda f: {}, 'market-detail': lambda f: {'market_id': f.market.pk},
+    'market-prices': lambda f: {'market_id': f.market.pk},
+    'investment-simulation-list': lambda f: {}, 'investment-simulation-export': lambda f: {},
+    'investment-simulation-detail': lambda f: {'id': f.simulation.pk},
+    'investment-simulation-monte-carlo': lambda f: {},
+    'simulation-job-list': lambda f: {}, 'simulation-job-detail': lambda f: {'id': f.job.pk},
+    'investment-simulation-backtest': lambda f: {}, 'investment-simulation-backtest-batch': lambda f: {},
+    'quiz-list-create': lambda f: {}, 'quiz-detail': lambda f: {'id': f.quiz.pk},
+    'quizresult-list-create': lambda f: {}, 'quizresult-export': lambda f: {},
+    'quizresult-detail': lambda f: {'id': f.quiz_result.pk},
+    'assessment-list': lambda f: {}, 'assessment-detail': lambda f: {'assessment_id': f.assessment.pk},
+    'register': lambda f: {},
+    'user-list': lambda f: {}, 'user-detail': lambda f: {'id': f.user.pk}, 'user-stats': lambda f: {'user_id': f.user.pk},
+    'virtualmoney-list': lambda f: {}, 'virtualmoney-export': lambda f: {},
+    'virtualmoney-detail': lambda f: {'id': f.virtual_money.pk},
+    'wallet-balance': lambda f: {'user_id': f.user.pk}, 'wallet-ledger': lambda f: {'user_id': f.user.pk},
+    'cache-stats': lambda f: {},
+    'leaderboard': lambda f: {'metric': 'score'},
+    'leaderboard-rank': lambda f: {'metric': 'score', 'user_id': f.quiz_result.user_id},
+    'leaderboard-neighbors': lambda f: {'metric': 'score', 'user_id': f.quiz_result.user_id},
+    'achievement-list': lambda f: {}, 'achievement-detail': lambda f: {'id': f.achievement.pk},
+    'achievement-rule-list': lambda f: {}, 'achievement-rule-detail': lambda f: {'id': f.rule.pk},
+    'schema-swagger-ui': lambda f: {'format': 'openapi'}, 'schema-redoc': lambda f: {'format': 'openapi'},
+    'async-market-list': lambda f: {}, 'async-market-detail': lambda f: {'market_id': f.market.pk},
+    'async-quiz-list': lambda f: {}, 'async-quiz-detail': lambda f: {'id': f.quiz.pk},
+    'async-achievement-list': lambda f: {}, 'async-achievement-detail': lambda f: {'id': f.achievement.pk},
+    'async-user-dashboard': lambda f: {'user_id': f.user.pk},
+    'batch': lambda f: {},
+}
+
+# Request bodies of the write methods, by (route, method); the name of a
+# serializer reuses its payload.
+ROUTE_BODIES = {
+    ('market-list', 'post'): 'MarketSerializer',
+    ('market-detail', 'put'): 'MarketSerializer',
+    ('investment-simulation-list', 'post'): 'InvestmentSimulationSerializer',
+    ('investment-simulation-detail', 'put'): 'InvestmentSimulationSerializer',
+    ('investment-simulation-monte-carlo', 'post'): 'MonteCarloRequestSerializer',
+    ('simulation-job-list', 'post'): lambda f: {
+        'user': f.user.pk, 'kind': SimulationJob.MONTE_CARLO, 'market_id': f.market.pk,
+        'amount_invested': '100.00', 'paths': 100, 'steps': 50,
+    },
+    ('investment-simulation-backtest', 'post'): 'BacktestRequestSerializer',
+    ('investment-simulation-backtest-batch', 'post'): 'BacktestBatchRequestSerializer',
+    ('quiz-list-create', 'post'): 'QuizSerializer',
+    ('quiz-detail', 'put'): 'QuizSerializer',
+    ('quizresult-list-create', 'post'): 'QuizResultSerializer',
+    ('quizresult-detail', 'put'): 'QuizResultSerializer',
+    ('assessment-list', 'post'): 'AssessmentSerializer',
+    ('assessment-detail', 'put'): 'AssessmentSerializer',
+    ('register', 'post'): lambda f: {
+        'username': 'microbench-new', 'password': 'microbench-password', 'confirm_password': 'microbench-password',
+    },
+    ('user-detail', 'patch'): lambda f: {'location': 'Nairobi'},
+    ('virtualmoney-list', 'post'): 'VirtualMoneySerializer',
+    ('virtualmoney-detail', 'patch'): lambda f: {'amount': '30.00'},
+    ('achievement-list', 'post'): 'AchievementSerializer',
+    ('achievement-detail', 'patch'): lambda f: {'title': 'Renamed'},
+    ('achievement-rule-list', 'post'): 'AchievementRuleSerializer',
+    ('achievement-rule-detail', 'patch'): lambda f: {'description': 'Scores over 60'},
+    ('batch', 'post'): 'BatchRequestSerializer',
+}
+
+
+class MissingEntry(Exception):
+    pass
+
+
+def missing(message):
+    def run():
+        raise MissingEntry(message)
+    return run
+
+
+def defined_in(module, base):
+    return [
+        cls for _, cls in inspect.getmembers(module, inspect.isclass)
+        if issubclass(cls, base) and cls.__module__ == module.__name__
+    ]
+
+
+def serializer_cases(fixture):
+    cases = []
+    for cls in defined_in(api_serializers, serializers.BaseSerializer):
+        payload = SERIALIZER_PAYLOADS.get(cls.__name__)
+        name = f"serializer/{cls.__name__}"
+        if payload is None:
+            cases.append(Case(f"{name}.validate", missing(f"{cls.__name__} has no entry in SERIALIZER_PAYLOADS")))
+            continue
+        if issubclass(cls, serializers.ModelSerializer):
+            model = cls.Meta.model
+            instance = model._default_manager.order_by('pk').first()
+            queryset = model._default_manager.order_by('pk')[:LIST_SIZE]
+            cases.append(Case(f"{name}.serialize", lambda cls=cls, instance=instance: cls(instance).data))
+            cases.append(Case(f"{name}.serialize_list", lambda cls=cls, queryset=queryset: cls(queryset, many=True).data))
+        data = payload(fixture)
+        cases.append(Case(f"{name}.validate", lambda cls=cls, data=data: validate(cls, data)))
+    return cases
+
+
+def validate(cls, data):
+    serializer = cls(data=data)
+    if not serializer.is_valid():
+        raise ValueError(f"invalid payload: {serializer.errors}")
+    return serializer.validated_data
+
+
+def filter_cases(fixture):
+    cases = []
+    for cls in defined_in(api_views, FilterSet):
+        params = FILTER_PARAMS.get(cls.__name__)
+        name = f"filter/{cls.__name__}"
+        if params is None:
+            cases.append(Case(name, missing(f"{cls.__name__} has no entry in FILTER_PARAMS")))
+            continue
+        queryset = cls._meta.model._default_manager.all()
+        cases.append(Case(name, lambda cls=cls, params=params, queryset=queryset: list(
+            cls(params, queryset=queryset).qs.order_by('pk')[:LIST_SIZE]
+        )))
+    return cases
+
+
+def view_cases(fixture):
+    factory = APIRequestFactory()
+    cases = []
+    for pattern in api_urls.urlpatterns:
+        view_class = getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+        if view_class is None:
+            continue
+        for method in HTTP_METHODS:
+            if not hasattr(view_class, method):
+                continue
+            name = f"view/{pattern.name}.{method}"
+            if pattern.name not in ROUTE_KWARGS:
+                cases.append(Case(name, missing(f"Route {pattern.name} has no entry in ROUTE_KWARGS")))
+                continue
+            kwargs = ROUTE_KWARGS[pattern.name](fixture)
+            query = {}
+            if 'format' in kwargs:
+                query['format'] = kwargs.pop('format')
+            body = None
+            if method in ('post', 'put', 'patch'):
+                builder = ROUTE_BODIES.get((pattern.name, method))
+                if builder is None:
+                    cases.append(Case(name, missing(f"{pattern.name} {method} has no entry in ROUTE_BODIES")))
+                    continue
+                body = (SERIALIZER_PAYLOADS[builder] if isinstance(builder, str) else builder)(fixture)
+            path = reverse(pattern.name, kwargs=kwargs)
+            cases.append(Case(
+                name,
+                lambda view=pattern.callback, method=method, path=path, kwargs=kwargs, query=query, body=body:
+                    call_view(factory, view, method, path, kwargs, query, body),
+                writes=method != 'get',
+            ))
+    return cases
+
+
+def call_view(factory, view, method, path, kwargs, query, body):
+    if method == 'get':
+        request = factory.get(path, query)
+    else:
+        request = getattr(factory, method)(path, body, format='json')
+    if iscoroutinefunction(view):
+        # api/async_views.py; run on a fresh event loop, as the test client does.
+        response = async_to_sync(view)(request, **kwargs)
+    else:
+        response = view(request, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.streaming:
+        b''.join(response.streaming_content)
+    if response.status_code >= 400:
+        raise ValueError(f"{method.upper()} {path} returned {response.status_code}: {response.content[:300]!r}")
+    return response
+
+
+def calibration_workload():
+    """
+    Fixed work of the kinds the cases do (building, sorting and encoding
+    small objects) that touches none of the project's code.
+    """
+    rows = [{'id': i, 'name': f"row {i * 7919 % 10007}", 'value': i * 0.5} for i in range(500)]
+    rows.sort(key=lambda row: row['name'])
+    return json.loads(json.dumps(rows))
+
+
+def collect_cases(fixture):
+    return (
+        [Case(CALIBRATION, calibration_workload)]
+        + serializer_cases(fixture) + filter_cases(fixture) + view_cases(fixture)
+    )
+
+
+def call(case):
+    if not case.writes:
+        return case.run()
+    with transaction.atomic():
+        result = case.run()
+        transaction.set_rollback(True)
+    return result
+
+
+def calibrate(case, min_time):
+    """Warm `case` up and return how many calls take at least `min_time`."""
+    call(case)  # fails early on a broken case
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call(case)
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def trace(case):
+    """Peak and retained traced memory of one call, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        call(case)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before, current - before
+
+
+def measure(cases, min_time=0.2, rounds=5, progress=None):
+    """
+    Time and trace every case; errors are recorded, not raised. Rounds are
+    interleaved: each round times every case once, and a case keeps its
+    best round. A stretch of machine noise then costs every case one round
+    instead of costing a few cases all of theirs.
+    """
+    numbers, errors = {}, {}
+
+    def attempt(case, step):
+        try:
+            return step()
+        except Exception as e:
+            errors[case.name] = f"{type(e).__name__}: {e}"
+
+    for case in cases:
+        numbers[case.name] = attempt(case, lambda: calibrate(case, min_time / rounds))
+    best = {case.name: float('inf') for case in cases}
+    for _ in range(rounds):
+        for case in cases:
+            if case.name in errors:
+                continue
+            number = numbers[case.name]
+
+            def timed():
+                gc.disable()  # as timeit does
+                try:
+                    start = time.perf_counter()
+                    for _ in range(number):
+                        call(case)
+                    return time.perf_counter() - start
+                finally:
+                    gc.enable()
+            elapsed = attempt(case, timed)
+            if elapsed is not None:
+                best[case.name] = min(best[case.name], elapsed)
+    results = []
+    for case in cases:
+        memory = None if case.name in errors else attempt(case, lambda: trace(case))
+        if case.name in errors:
+            result = Result(case.name, None, None, None, errors[case.name])
+        else:
+            result = Result(case.name, numbers[case.name] / best[case.name], *memory)
+        results.append(result)
+        if progress:
+            progress(result)
+    return results
+
+
+class Regression(NamedTuple):
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self):
+        return self.current / self.baseline - 1
+
+
+def speed_shift(results, baseline):
+    """
+    Ratio of the calibration case's current to baseline ops/sec: how much
+    faster (above 1) or slower the machine runs than when the baseline was
+    stored (another load, frequency scaling). 1.0 when either run lacks it.
+    """
+    current = next((result.ops_per_sec for result in results if result.name == CALIBRATION and not result.error), None)
+    stored = baseline.get(CALIBRATION, {}).get('ops_per_sec')
+    return current / stored if current and stored else 1.0
+
+
+def compare(results, baseline, threshold=0.25, min_bytes=8192):
+    """
+    Regressions of `results` against `baseline` ({name: {'ops_per_sec',
+    'peak_bytes'}}): throughput that fell by more than `threshold` once
+    scaled by the run's `speed_shift`, or peak allocations that grew by more
+    than `threshold` and `min_bytes`. Each case is judged on its own, so a
+    change that slows every case is flagged everywhere.
+    """
+    shift = speed_shift(results, baseline)
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None or result.error or result.name == CALIBRATION:
+            continue
+        old_ops = previous.get('ops_per_sec')
+        if old_ops and result.ops_per_sec < old_ops * shift * (1 - threshold):
+            regressions.append(Regression(result.name, 'ops_per_sec', old_ops, result.ops_per_sec))
+        old_peak = previous.get('peak_bytes')
+        if old_peak and result.peak_bytes > old_peak * (1 + threshold) and result.peak_bytes - old_peak > min_bytes:
+            regressions.append(Regression(result.name, 'peak_bytes', old_peak, result.peak_bytes))
+    return regressions
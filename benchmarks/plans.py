@@ -0,0 +1,195 @@
+"""
+Query plans of the API's read paths.
+
+`capture` calls every GET view routed in api/urls.py, as the micro
+benchmarks do, and records the SELECTs each one runs. List views are also
+called once per ordering they allow (both directions) and once with their
+FilterSet's parameters from micro.FILTER_PARAMS, so every composite index
+and search index the views depend on gets exercised.
+
+`explain` asks the database for the plan of each query and lists the
+tables it reads in full: `SCAN <table>` without an index on SQLite, a
+`Seq Scan` node on PostgreSQL. A scan that returns rows in the requested
+order and stops at the query's LIMIT does not count (SQLite walks rowid
+tables in primary key order that way), provided nothing but the
+soft-delete flag filters the table: most rows are active, so it reads
+about LIMIT rows. A scan that filters on anything else may read the whole
+table to find a few matches, and one that feeds a sort, hash or aggregate
+reads it all, so both count. `check` keeps the full scans of tables with
+at least `min_rows` rows that are not in ALLOWED_FULL_SCANS.
+"""
+import json
+import re
+from typing import List, NamedTuple, Optional
+
+from django.db import connection
+from django.urls import reverse
+from django_filters import FilterSet
+from rest_framework.test import APIRequestFactory
+
+from api import urls as api_urls
+
+from .micro import FILTER_PARAMS, ROUTE_KWARGS, call_view
+
+MIN_ROWS = 1000
+
+# Routes that read every row by design, with the reason.
+ALLOWED_FULL_SCANS = {
+    'investment-simulation-export': "streams the whole table",
+    'quizresult-export': "streams the whole table",
+    'virtualmoney-export': "streams the whole table",
+}
+
+# SQLite plan rows that scan a table without an index.
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\S+)(?: AS (\S+))?$')
+# Table aliases in Django's SQL: `"table" U0`, `"table" T3`.
+SQL_ALIAS = re.compile(r'"(\w+)" ([A-Z]\d+)\b')
+SQL_LIMIT = re.compile(r'\bLIMIT\b')
+SQL_WHERE = re.compile(r'\bWHERE\b(.*?)(?=\bORDER BY\b|\bGROUP BY\b|\bLIMIT\b|$)', re.S)
+# A filter on it alone does not stop a scan at the LIMIT from counting as bounded.
+SOFT_DELETE_COLUMN = 'is_active'
+# PostgreSQL nodes that read all of their input before returning a row.
+BLOCKING_NODES = {'Sort', 'Incremental Sort', 'Aggregate', 'Hash', 'Materialize', 'Unique', 'WindowAgg', 'SetOp'}
+
+
+class Query(NamedTuple):
+    route: str
+    variant: str
+    sql: str
+    params: tuple
+
+
+class Plan(NamedTuple):
+    query: Query
+    full_scans: List[str]  # tables read in full
+    detail: str
+
+
+class Finding(NamedTuple):
+    plan: Plan
+    table: str
+    rows: int
+    allowed: Optional[str]  # why the full scan is acceptable, if it is
+
+
+def view_class(pattern):
+    return getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+
+
+def variants(view):
+    """(name, query parameters) of each way a GET view is called."""
+    yield 'default', {}
+    for field in getattr(view, 'ordering_fields', ()):
+        for ordering in (field, f'-{field}'):
+            yield f'ordering={ordering}', {'ordering': ordering}
+    filterset_class = getattr(view, 'filterset_class', None)
+    if filterset_class is not None and filterset_class is not FilterSet:
+        params = FILTER_PARAMS.get(filterset_class.__name__)
+        if params:
+            yield 'filter', params
+
+
+def capture(fixture, progress=None):
+    """Every SELECT run by the GET views of api/urls.py, deduplicated."""
+    factory = APIRequestFactory()
+    queries, seen = [], set()
+    current = {}
+
+    def record(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT') and sql not in seen:
+            seen.add(sql)
+            queries.append(Query(current['route'], current['variant'], sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+    for pattern in api_urls.urlpatterns:
+        view = view_class(pattern)
+        if view is None or not hasattr(view, 'get') or pattern.name not in ROUTE_KWARGS:
+            continue
+        kwargs = ROUTE_KWARGS[pattern.name](fixture)
+        if 'format' in kwargs:
+            continue  # schema views run no queries
+        path = reverse(pattern.name, kwargs=kwargs)
+        for variant, query in variants(view):
+            current.update(route=pattern.name, variant=variant)
+            with connection.execute_wrapper(record):
+                call_view(factory, pattern.callback, 'get', path, kwargs, query, None)
+        if progress:
+            progress(pattern.name)
+    return queries
+
+
+def table_aliases(sql):
+    return {alias: table for table, alias in SQL_ALIAS.findall(sql)}
+
+
+def filtered_columns(sql, name):
+    """Columns of the table or alias `name` that the WHERE clauses of `sql` test."""
+    reference = re.compile(rf'(?:"{re.escape(name)}"|\b{re.escape(name)})\."(\w+)"')
+    return {column for clause in SQL_WHERE.findall(sql) for column in reference.findall(clause)}
+
+
+def explain(query):
+    """The Plan of `query` on the default database."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {query.sql}", query.params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return Plan(query, postgres_full_scans(plan[0]['Plan']), json.dumps(plan, indent=1))
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"EXPLAIN QUERY PLAN {query.sql}", query.params)
+            details = [row[-1] for row in cursor.fetchall()]
+            stops_at_limit = bool(SQL_LIMIT.search(query.sql)) and not any(
+                detail.startswith('USE TEMP B-TREE') for detail in details
+            )
+            aliases = table_aliases(query.sql)
+            scans = []
+            for detail in details:
+                match = SQLITE_FULL_SCAN.match(detail)
+                if not match:
+                    continue
+                name = match.group(2) or match.group(1)
+                if not stops_at_limit or filtered_columns(query.sql, name) - {SOFT_DELETE_COLUMN}:
+                    scans.append(aliases.get(name, name))
+            return Plan(query, scans, '\n'.join(details))
+    raise NotImplementedError(f"Query plans are not supported on {connection.vendor}")
+
+
+def postgres_full_scans(node, limited=False):
+    """
+    Relations of the Seq Scans under `node` that do not stop at a Limit, or
+    that filter on more than the soft-delete flag.
+    """
+    if node['Node Type'] == 'Limit':
+        limited = True
+    elif node['Node Type'] in BLOCKING_NODES:
+        limited = False
+    bounded = limited and re.sub(r'[()\s]', '', node.get('Filter', SOFT_DELETE_COLUMN)) == SOFT_DELETE_COLUMN
+    scans = [node['Relation Name']] if node['Node Type'] == 'Seq Scan' and not bounded else []
+    for child in node.get('Plans', ()):
+        scans += postgres_full_scans(child, limited)
+    return scans
+
+
+def row_counts(tables):
+    counts = {}
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def check(queries, min_rows=MIN_ROWS):
+    """Plans of `queries`, and a Finding per full scan of a table of at least `min_rows` rows."""
+    plans = [explain(query) for query in queries]
+    known_tables = set(connection.introspection.table_names())
+    counts = row_counts({table for plan in plans for table in plan.full_scans if table in known_tables})
+    findings = [
+        Finding(plan, table, counts[table], ALLOWED_FULL_SCANS.get(plan.query.route))
+        for plan in plans
+        for table in dict.fromkeys(plan.full_scans)
+        if counts.get(table, 0) >= min_rows
+    ]
+    return plans, findings
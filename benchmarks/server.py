@@ -0,0 +1,95 @@
+"""
+Seed a database and serve the project under gunicorn for benchmarks.
+
+`PROFILES` mirrors the deployment profiles: `wsgi` is the Procfile
+(sync workers), `asgi` is Procfile.asgi (uvicorn workers). Servers get the
+caller's environment plus the overrides given, so a benchmark can point
+them at a temporary database (DATABASE_URL) or slow their queries down
+(BENCHMARK_DB_LATENCY).
+"""
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PROFILES = {
+    'wsgi': ['investika.wsgi'],
+    'asgi': ['investika.asgi', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+class ServerError(Exception):
+    pass
+
+
+def environment(directory, database_url=None, **overrides):
+    """Environment for commands and servers that share a database under `directory`."""
+    return dict(
+        os.environ,
+        DATABASE_URL=database_url or f"sqlite:///{os.path.join(directory, 'benchmark.sqlite3')}",
+        METRICS_DIR=os.path.join(directory, 'metrics'),
+        **{name: str(value) for name, value in overrides.items()},
+    )
+
+
+def manage(env, *args):
+    process = subprocess.run(
+        [sys.executable, 'manage.py', *args], cwd=settings.BASE_DIR, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    if process.returncode:
+        raise ServerError(f"manage.py {args[0]} failed:\n{process.stdout.decode(errors='replace')}")
+
+
+def seed(env, users, seed=0, username_prefix=None, password=None):
+    """Migrate the database of `env` and fill it with generate_dataset."""
+    manage(env, 'migrate', '--verbosity', '0')
+    options = ['--users', str(users), '--seed', str(seed)]
+    if username_prefix is not None:
+        options += ['--username-prefix', username_prefix]
+    if password is not None:
+        options += ['--password', password]
+    manage(env, 'generate_dataset', *options)
+
+
+@contextmanager
+def serve(env, profile='wsgi', bind='127.0.0.1:8765', workers=4, log_path=os.devnull, timeout=60):
+    """Run gunicorn with `profile` until the block exits; yields the base URL."""
+    with open(log_path, 'wb') as log:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *PROFILES[profile], '--log-file', '-',
+             '--bind', bind, '--workers', str(workers)],
+            cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            base_url = f"http://{bind}"
+            wait_until_ready(server, base_url, log_path, timeout)
+            yield base_url
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+def wait_until_ready(server, base_url, log_path, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/markets/", timeout=5):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    tail = ''
+    if log_path != os.devnull:
+        with open(log_path, errors='replace') as log:
+            tail = log.read()[-4000:]
+    raise ServerError(f"gunicorn did not start serving {base_url}:\n{tail}")
@@ -0,0 +1,272 @@
+import asyncio
+import io
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from rest_framework.test import APITestCase
+
+from benchmarks.dataset import CHUNK_MODELS, DatasetConfig, DatasetGenerator
+from benchmarks.micro import (
+    CALIBRATION, FILTER_PARAMS, SERIALIZER_PAYLOADS, Case, Fixture, Result, calibration_workload, call, collect_cases, compare, measure,
+)
+from benchmarks.loadtest import Connection, Sample, Target, parse_mix, run_load, summarize
+from benchmarks.plans import ALLOWED_FULL_SCANS, Query, capture, check, explain, postgres_full_scans
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from search import indexes as search_indexes
+from users import stats
+from users.models import User, UserStats
+from versioning.versions import get_versions
+from virtualmoney.models import VirtualMoney, WalletBalance, WalletLedgerEntry
+
+
+class DatasetGeneratorTests(APITestCase):
+    def generate(self, **options):
+        config = DatasetConfig(**{'users': 120, 'markets': 4, 'quizzes': 10, 'chunk_size': 50, 'batch_size': 70, **options})
+        generator = DatasetGenerator(config)
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = generator.generate()
+        return counts
+
+    def test_counts_match_the_tables(self):
+        counts = self.generate()
+        self.assertEqual(counts['User'], 120)
+        self.assertEqual(User.objects.count(), 120)
+        self.assertEqual(counts['QuizResult'], QuizResult.objects.count())
+        self.assertEqual(counts['InvestmentSimulation'], InvestmentSimulation.objects.count())
+        self.assertEqual(counts['WalletLedgerEntry'], WalletLedgerEntry.objects.count())
+        self.assertGreaterEqual(VirtualMoney.objects.count(), 120)
+        self.assertEqual(WalletBalance.objects.count(), 120)
+
+    def test_rows_are_referentially_consistent(self):
+        self.generate()
+        self.assertFalse(QuizResult.objects.filter(user__isnull=True).exists())
+        self.assertFalse(InvestmentSimulation.objects.exclude(market_id__in=Market.objects.all()).exists())
+        user = User.objects.get(username='synthetic0')
+        self.assertTrue(user.check_password('synthetic-password'))
+        for simulation in InvestmentSimulation.objects.all():
+            self.assertEqual(simulation.outcome, 'Profit' if simulation.profit_loss >= 0 else 'Loss')
+            self.assertGreaterEqual(simulation.profit_loss, -simulation.amount_invested)
+
+    def test_balances_are_the_sum_of_the_ledger(self):
+        self.generate()
+        ledger = dict(WalletLedgerEntry.objects.values_list('user').annotate(total=Sum('amount')))
+        for balance in WalletBalance.objects.all():
+            self.assertEqual(balance.balance, ledger[balance.user_id])
+            self.assertGreaterEqual(balance.balance, Decimal('0'))
+
+    def test_user_stats_match_the_source_tables(self):
+        self.generate()
+        self.assertEqual(UserStats.objects.count(), 120)
+        self.assertEqual(stats.check(chunk_size=50), [])
+
+    def test_same_seed_same_data(self):
+        self.generate(username_prefix='a')
+        self.generate(username_prefix='b')
+        self.generate(username_prefix='c', seed=1)
+        def scores(prefix):
+            return list(QuizResult.objects.filter(user__username__startswith=prefix).order_by('id').values_list('score', 'money_earned'))
+        self.assertEqual(scores('a'), scores('b'))
+        self.assertNotEqual(scores('a'), scores('c'))
+
+    def test_indexes_are_rebuilt_as_they_were(self):
+        def schema():
+            with connection.cursor() as cursor:
+                return {
+                    model: connection.introspection.get_constraints(cursor, model._meta.db_table)
+                    for model in CHUNK_MODELS
+                }
+        before = schema()
+        self.generate()
+        self.assertEqual(schema(), before)
+        self.assertEqual(search_indexes.repair(connection), [])
+        self.assertEqual(search_indexes.contains(User.objects.all(), 'username', 'thetic11').count(), 11)
+
+    def test_table_versions_are_bumped(self):
+        before = get_versions(QuizResult, WalletLedgerEntry)
+        self.generate()
+        after = get_versions(QuizResult, WalletLedgerEntry)
+        self.assertTrue(all(new > old for old, new in zip(before, after)))
+
+
+class LoadTestTests(APITestCase):
+    target = Target(users=[(1, 'synthetic0')], password='secret', markets=[2], quizzes=[3])
+
+    def test_mix_overrides_default_weights(self):
+        weights = {route.name: route.weight for route in parse_mix('login=0, monte_carlo=2.5')}
+        self.assertNotIn('login', weights)
+        self.assertEqual(weights['monte_carlo'], 2.5)
+        self.assertEqual(weights['list_markets'], 50)
+        for spec in ('bogus=1', 'login=x', 'login=-1', ','.join(f'{name}=0' for name in weights) + ',login=0'):
+            with self.assertRaises(ValueError):
+                parse_mix(spec)
+
+    def test_summary_counts_errors_and_percentiles(self):
+        samples = [Sample('list_markets', 200, i / 1000) for i in range(1, 101)]
+        samples += [Sample('login', 401, 0.5), Sample('login', 0, 0.1)]
+        results = summarize(samples, duration=2.0)
+        markets = results['routes']['list_markets']
+        self.assertEqual(markets['throughput'], 50.0)
+        self.assertEqual(markets['error_rate'], 0.0)
+        self.assertAlmostEqual(markets['latency_ms']['p50'], 50.5)
+        self.assertAlmostEqual(markets['latency_ms']['p99'], 99.01)
+        self.assertEqual(results['routes']['login']['statuses'], {'0': 1, '401': 1})
+        self.assertEqual(results['total']['errors'], 2)
+        self.assertEqual(results['total']['requests'], 102)
+
+    def serve(self, handler):
+        """Run `handler(reader, writer)` as a local server for the duration of `run`."""
+        async def run(coroutine):
+            server = await asyncio.start_server(handler, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await coroutine(f'http://127.0.0.1:{port}')
+        return run
+
+    def test_client_keeps_alive_and_reads_bodies(self):
+        connections = []
+
+        async def handler(reader, writer):
+            connections.append(writer)
+            try:
+                while True:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                    length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+                    body = await reader.readexactly(length)
+                    if head.startswith(b'GET /chunked'):
+                        writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n')
+                    else:
+                        writer.write(b'HTTP/1.1 201 Created\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+                    await writer.drain()
+            except asyncio.IncompleteReadError:
+                writer.close()
+
+        async def requests(url):
+            connection = Connection('127.0.0.1', int(url.rsplit(':', 1)[1]))
+            try:
+                return [
+                    await connection.request('POST', '/echo', {'a': 1}),
+                    await connection.request('GET', '/chunked'),
+                ]
+            finally:
+                connection.close()
+
+        responses = asyncio.run(self.serve(handler)(requests))
+        self.assertEqual(responses, [(201, b'{"a": 1}'), (200, b'abcde')])
+        self.assertEqual(len(connections), 1)
+
+    def test_run_load_records_statuses_per_route(self):
+        async def handler(reader, writer):
+            head = await reader.readuntil(b'\r\n\r\n')
+            await reader.readexactly(int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0]))
+            status = b'401 Unauthorized' if head.startswith(b'POST /auth/login/') else b'200 OK'
+            writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}')
+            await writer.drain()
+            writer.close()
+
+        routes = parse_mix('login=1,list_markets=1,submit_quiz_result=0,grant_money=0,run_simulation=0')
+        samples = asyncio.run(self.serve(handler)(
+            lambda url: run_load(url, self.target, routes, concurrency=4, duration=0.3, seed=1)
+        ))
+        results = summarize(samples, duration=0.3)
+        self.assertEqual(set(results['routes']), {'login', 'list_markets'})
+        self.assertEqual(results['routes']['login']['error_rate'], 1.0)
+        self.assertEqual(results['routes']['list_markets']['statuses'], {'200': results['routes']['list_markets']['requests']})
+
+
+class MicrobenchTests(APITestCase):
+    def test_every_serializer_and_view_case_runs(self):
+        cases = collect_cases(Fixture(users=20))
+        names = {case.name for case in cases}
+        self.assertTrue(set(SERIALIZER_PAYLOADS) <= {name.split('/')[1].split('.')[0] for name in names})
+        self.assertIn('view/market-detail.put', names)
+        self.assertEqual({name for name in names if name.startswith('filter/')}, {f'filter/{name}' for name in FILTER_PARAMS})
+        failures = {}
+        for case in cases:
+            try:
+                call(case)
+            except Exception as e:
+                failures[case.name] = e
+        self.assertEqual(failures, {})
+
+    def test_writes_are_rolled_back(self):
+        fixture = Fixture(users=5)
+        case = next(case for case in collect_cases(fixture) if case.name == 'view/market-list.post')
+        count = Market.objects.count()
+        call(case)
+        self.assertEqual(Market.objects.count(), count)
+
+    def test_measure_records_speed_allocations_and_errors(self):
+        def broken():
+            raise ValueError("boom")
+        results = measure([Case('ok', lambda: [0] * 10_000), Case('broken', broken)], min_time=0.01, rounds=2)
+        ok, failed = results
+        self.assertGreater(ok.ops_per_sec, 0)
+        self.assertGreaterEqual(ok.peak_bytes, 80_000)
+        self.assertEqual(failed.error, 'ValueError: boom')
+
+    def test_compare_scales_by_the_calibration_case(self):
+        baseline = {name: {'ops_per_sec': 100.0, 'peak_bytes': 10_000} for name in [CALIBRATION, *'abcd']}
+        results = [Result(name, 100.0, 10_000, 0) for name in [CALIBRATION, *'abc']] + [Result('d', 60.0, 50_000, 0)]
+        self.assertEqual([(r.name, r.metric) for r in compare(results, baseline)], [('d', 'ops_per_sec'), ('d', 'peak_bytes')])
+        # Every case half as fast, calibration too: the machine, not the code.
+        machine = [result._replace(ops_per_sec=result.ops_per_sec / 2) for result in results[:4]]
+        self.assertEqual(compare(machine, baseline), [])
+        # Every case half as fast on the same machine: the code.
+        code = [results[0]] + machine[1:]
+        self.assertEqual([r.name for r in compare(code, baseline)], ['a', 'b', 'c'])
+
+    def test_calibration_case_is_collected(self):
+        cases = collect_cases(Fixture(users=5))
+        self.assertEqual(cases[0].name, CALIBRATION)
+        self.assertEqual(len(calibration_workload()), 500)
+
+
+class QueryPlanTests(APITestCase):
+    def query(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return Query('test', 'default', sql, params)
+
+    def test_full_scans_are_found(self):
+        self.assertEqual(explain(self.query(QuizResult.all_objects.order_by('money_earned'))).full_scans, ['quiz_results_quizresult'])
+        self.assertEqual(explain(self.query(QuizResult.objects.order_by('-score', '-id')[:20])).full_scans, [])
+        # Primary key order stops at the LIMIT, unless a filter may have to read every row to fill the page.
+        self.assertEqual(explain(self.query(QuizResult.all_objects.order_by('id')[:20])).full_scans, [])
+        self.assertEqual(explain(self.query(QuizResult.objects.order_by('id')[:20])).full_scans, [])
+        filtered = Achievement.all_objects.filter(description='needle').order_by('pk')[:5]
+        self.assertEqual(explain(self.query(filtered)).full_scans, ['achievements_achievement'])
+
+    def test_postgres_seq_scans_under_a_limit(self):
+        def plan(filter=None):
+            scan = {'Node Type': 'Seq Scan', 'Relation Name': 'achievements_achievement'}
+            if filter:
+                scan['Filter'] = filter
+            return {'Node Type': 'Limit', 'Plans': [scan]}
+        self.assertEqual(postgres_full_scans(plan()), [])
+        self.assertEqual(postgres_full_scans(plan('is_active')), [])
+        self.assertEqual(
+            postgres_full_scans(plan("(is_active AND ((description)::text = 'needle'::text))")),
+            ['achievements_achievement'],
+        )
+
+    def test_views_only_scan_tables_in_full_where_allowed(self):
+        queries = capture(Fixture(users=30))
+        variants = {(query.route, query.variant) for query in queries}
+        self.assertIn(('quizresult-list-create', 'ordering=-score'), variants)
+        self.assertIn(('investment-simulation-list', 'filter'), variants)
+        plans, findings = check(queries, min_rows=1)
+        self.assertEqual(len(plans), len(queries))
+        self.assertEqual([f for f in findings if f.allowed is None], [])
+        self.assertTrue({f.plan.query.route for f in findings} <= set(ALLOWED_FULL_SCANS))
+
+    def test_command_rolls_back_its_dataset(self):
+        count = User.all_objects.count()
+        # After ANALYZE the planner rightly scans tables of a few rows.
+        out = io.StringIO()
+        call_command('check_query_plans', users=30, min_rows=50, stdout=out)
+        self.assertIn('None of the', out.getvalue())
+        self.assertEqual(User.all_objects.count(), count)
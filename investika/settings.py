@@ -16,6 +16,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv, find_dotenv
 from datetime import timedelta
 import dj_database_url
@@ -73,6 +74,11 @@ INSTALLED_APPS = [
     'authlib',
     'achievements',
     'virtualmoney',
+    'leaderboard',
+    'versioning',
+    'search',
+    'metrics',
+    'benchmarks',
     'rest_framework_simplejwt.token_blacklist',
     'drf_yasg',
     'django_filters',
@@ -91,6 +97,7 @@ AUTHENTICATION_BACKENDS = [
 
 
 MIDDLEWARE = [
+   'metrics.middleware.MetricsMiddleware',
    'django.middleware.security.SecurityMiddleware',
    'django.contrib.sessions.middleware.SessionMiddleware',
    'django.middleware.common.CommonMiddleware',
@@ -280,6 +287,19 @@ REST_FRAMEWORK = {
    'DEFAULT_AUTHENTICATION_CLASSES': [
        'rest_framework_simplejwt.authentication.JWTAuthentication',
    ],
+   # orjson for JSON, MessagePack for `Accept: application/msgpack`
+   # (see api/renderers.py and api/parsers.py).
+   'DEFAULT_RENDERER_CLASSES': [
+       'api.renderers.ORJSONRenderer',
+       'api.renderers.MessagePackRenderer',
+       'rest_framework.renderers.BrowsableAPIRenderer',
+   ],
+   'DEFAULT_PARSER_CLASSES': [
+       'api.parsers.ORJSONParser',
+       'api.parsers.MessagePackParser',
+       'rest_framework.parsers.FormParser',
+       'rest_framework.parsers.MultiPartParser',
+   ],
 }
 
 
@@ -289,5 +309,59 @@ SIMPLE_JWT = {
 }
 
 
+# Simulation job queue (see investment_simulation/jobs.py)
+SIMULATION_JOB_MAX_PENDING_PER_USER = int(os.getenv('SIMULATION_JOB_MAX_PENDING_PER_USER', 3))
+SIMULATION_JOB_MAX_RUNNING_PER_USER = int(os.getenv('SIMULATION_JOB_MAX_RUNNING_PER_USER', 1))
+SIMULATION_JOB_STALE_AFTER = int(os.getenv('SIMULATION_JOB_STALE_AFTER', 60))  # seconds without a heartbeat
+SIMULATION_JOB_MAX_ATTEMPTS = 3
+
+# Workers in each server process's batch backtest pool (investment_simulation/backtest.py);
+# unset means one per core.
+BACKTEST_POOL_WORKERS = int(os.getenv('BACKTEST_POOL_WORKERS', 0)) or None
+
+
+# Caches. `shared` is the second tier of the detail cache (api/cache.py);
+# its table is created by the api app's migrations.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_shared_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+DETAIL_CACHE_MAX_ENTRIES = int(os.getenv('DETAIL_CACHE_MAX_ENTRIES', 1000))  # per process
+DETAIL_CACHE_TIMEOUT = int(os.getenv('DETAIL_CACHE_TIMEOUT', 300))  # seconds
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', 5))  # seconds to wait for another request's result
+SINGLE_FLIGHT_MAX_STALE = float(os.getenv('SINGLE_FLIGHT_MAX_STALE', 60))  # seconds a stale list may be served while it is rebuilt
+
+
+# Leaderboards (see leaderboard/boards.py)
+LEADERBOARD_SYNC_INTERVAL = float(os.getenv('LEADERBOARD_SYNC_INTERVAL', 1.0))  # seconds between pulls from the table
+
+
+
+
+
+
+# Streaming exports (see api/export.py)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))  # rows fetched and written per chunk
+
+
+# Batch endpoint (see api/batch.py)
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 4))  # threads running the GETs of a parallel batch
+
+
+# Request metrics (see metrics/collector.py). Every worker of a host must
+# share METRICS_DIR; /metrics sums the files found there.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'investika-metrics'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1.0))  # seconds between writes per worker
 
 
+# Benchmarks only (see benchmarks/latency.py): seconds every query waits, to
+# stand in for the network round trip to a remote database. Keep it 0.
+BENCHMARK_DB_LATENCY = float(os.getenv('BENCHMARK_DB_LATENCY', 0))
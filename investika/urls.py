@@ -19,10 +19,12 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path,include
+from metrics.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('authentication.urls')),
     path('api/', include('api.urls')),
+    path('metrics', metrics, name='metrics'),  # Prometheus scrape endpoint
 
 ]
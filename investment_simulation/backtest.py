@@ -0,0 +1,185 @@
+"""
+Vectorized backtesting of investment strategies over stored market prices.
+
+Daily closes are loaded from the market price store and aligned into a
+(bars x markets) matrix. Each strategy turns that matrix into an equity
+curve with whole-array NumPy operations (no per-bar Python loop):
+
+- `buy_and_hold`: invest everything on the first bar, split by `weights`.
+- `dca`: invest equal slices every `every` bars; uninvested money is cash.
+- `rebalance`: reset holdings to `weights` every `every` bars.
+
+Batches of runs are spread over a process pool so they use every core. The
+pool is started on first use and kept for the life of the server process,
+so a request never pays for starting (or waits on stopping) its workers.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+import numpy as np
+
+from market.timeseries import query_bars
+
+STRATEGIES = ('buy_and_hold', 'dca', 'rebalance')
+DEFAULT_EVERY = 21
+SECONDS_PER_YEAR = 365.25 * 86400
+
+
+class BacktestError(ValueError):
+    """Raised when a backtest cannot run on the requested data."""
+
+
+def load_closes(market_ids, start, end):
+    """
+    Return (timestamps, closes) for the days on which every market has a
+    price, with `closes` shaped (bars, len(market_ids)).
+    """
+    series = [query_bars(market_id, start, end, '1d') for market_id in market_ids]
+    timestamps = series[0]['timestamp']
+    for other in series[1:]:
+        timestamps = np.intersect1d(timestamps, other['timestamp'])
+    if len(timestamps) < 2:
+        raise BacktestError("Not enough price data in the requested range")
+    closes = np.column_stack([
+        s['close'][np.searchsorted(s['timestamp'], timestamps)] for s in series
+    ])
+    return timestamps, closes
+
+
+def normalize_weights(weights, n_markets):
+    if not weights:
+        return np.full(n_markets, 1.0 / n_markets)
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(weights) != n_markets or (weights < 0).any() or weights.sum() <= 0:
+        raise BacktestError("weights must be one non-negative number per market")
+    return weights / weights.sum()
+
+
+def buy_and_hold_equity(closes, amount, weights, every):
+    units = amount * weights / closes[0]
+    return closes @ units
+
+
+def dca_equity(closes, amount, weights, every):
+    n_bars = len(closes)
+    buy_at = np.arange(0, n_bars, every)
+    contribution = amount / len(buy_at)
+    units = np.zeros_like(closes)
+    units[buy_at] = contribution * weights / closes[buy_at]
+    invested = np.zeros(n_bars)
+    invested[buy_at] = contribution
+    cash = amount - np.cumsum(invested)
+    return (np.cumsum(units, axis=0) * closes).sum(axis=1) + cash
+
+
+def rebalance_equity(closes, amount, weights, every):
+    n_bars = len(closes)
+    rebalance_at = np.arange(0, n_bars, every)
+    # Portfolio growth over each holding period, then value at each rebalance.
+    growth = (closes[rebalance_at[1:]] / closes[rebalance_at[:-1]]) @ weights
+    value_at_rebalance = amount * np.concatenate([[1.0], np.cumprod(growth)])
+    period = np.searchsorted(rebalance_at, np.arange(n_bars), side='right') - 1
+    relative = closes / closes[rebalance_at[period]]
+    return value_at_rebalance[period] * (relative @ weights)
+
+
+EQUITY_FUNCTIONS = {
+    'buy_and_hold': buy_and_hold_equity,
+    'dca': dca_equity,
+    'rebalance': rebalance_equity,
+}
+
+
+def equity_statistics(timestamps, equity, amount):
+    years = (timestamps[-1] - timestamps[0]) / SECONDS_PER_YEAR
+    bars_per_year = (len(equity) - 1) / years if years > 0 else 0
+    returns = equity[1:] / equity[:-1] - 1
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    volatility = returns.std()
+    final_value = float(equity[-1])
+    return {
+        'final_value': round(final_value, 2),
+        'profit_loss': round(final_value - amount, 2),
+        'total_return': round(final_value / amount - 1, 6),
+        'annualized_return': round((final_value / amount) ** (1 / years) - 1, 6) if years > 0 else None,
+        'volatility': round(float(volatility * np.sqrt(bars_per_year)), 6),
+        'max_drawdown': round(float(drawdown.min()), 6),
+        'sharpe_ratio': round(float(returns.mean() / volatility * np.sqrt(bars_per_year)), 6) if volatility > 0 else None,
+    }, drawdown
+
+
+def run_backtest(timestamps, closes, strategy, amount, weights=None, every=DEFAULT_EVERY, include_curve=True):
+    """Backtest one strategy on aligned closes and return its statistics."""
+    if strategy not in EQUITY_FUNCTIONS:
+        raise BacktestError(f"Unknown strategy {strategy}")
+    amount = float(amount)
+    weights = normalize_weights(weights, closes.shape[1])
+    equity = EQUITY_FUNCTIONS[strategy](closes, amount, weights, every)
+    stats, drawdown = equity_statistics(timestamps, equity, amount)
+    result = {'strategy': strategy, 'amount_invested': round(amount, 2), 'bars': len(equity), **stats}
+    if include_curve:
+        result['equity_curve'] = [
+            {'timestamp': int(t), 'equity': round(e, 2), 'drawdown': round(d, 6)}
+            for t, e, d in zip(timestamps.tolist(), equity.tolist(), drawdown.tolist())
+        ]
+    return result
+
+
+def _run_task(task):
+    return run_backtest(*task)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _forget_pool():
+    global _pool
+    _pool = None
+
+
+# A forked server worker must not reuse its parent's pool.
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+def pool_workers():
+    return getattr(settings, 'BACKTEST_POOL_WORKERS', None) or os.cpu_count() or 1
+
+
+def shared_pool():
+    """The process pool batches of this process run on, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=pool_workers())
+        return _pool
+
+
+def discard_pool(pool):
+    """Drop a broken pool so the next batch starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_batch(tasks, max_workers=None):
+    """
+    Run many backtests. Each task is a tuple of `run_backtest` arguments. Runs
+    are spread over the shared process pool; a single run or a single worker
+    skips the pool.
+    """
+    max_workers = min(max_workers or pool_workers(), len(tasks))
+    if max_workers <= 1:
+        return [_run_task(task) for task in tasks]
+    pool = shared_pool()
+    try:
+        return list(pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (max_workers * 4))))
+    except BrokenProcessPool:
+        discard_pool(pool)
+        raise
@@ -0,0 +1,211 @@
+"""
+Database-backed simulation job queue.
+
+The API submits `SimulationJob` rows; the `run_simulation_worker` command
+claims them with a conditional UPDATE (so several workers can share one
+database without a broker), runs the computation in a process pool and
+stores the outcome as an `InvestmentSimulation`.
+
+Job kinds are registered in `JOB_KINDS`. `compute` receives only the JSON
+params and runs in a child process, so it must not touch the database;
+`persist` runs in the worker's main process and saves the result.
+"""
+import os
+import socket
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from virtualmoney.wallet import InsufficientFunds
+
+from .models import InvestmentSimulation, SimulationJob
+from .monte_carlo import run_monte_carlo
+
+
+class JobLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+class JobKind(NamedTuple):
+    compute: Callable[[dict], dict]
+    persist: Callable[[SimulationJob, dict], InvestmentSimulation]
+
+
+def compute_monte_carlo(params):
+    return run_monte_carlo(
+        params['amount_invested'],
+        params['risk_level'],
+        n_paths=params['paths'],
+        n_steps=params['steps'],
+        seed=params.get('seed'),
+    )
+
+
+def persist_monte_carlo(job, result):
+    return InvestmentSimulation.record(
+        job.params['market_id'], job.user_id, job.params['amount_invested'], result['expected_profit_loss'],
+        hypothetical=True,
+    )
+
+
+JOB_KINDS = {
+    SimulationJob.MONTE_CARLO: JobKind(compute=compute_monte_carlo, persist=persist_monte_carlo),
+}
+
+
+def max_pending_per_user():
+    return getattr(settings, 'SIMULATION_JOB_MAX_PENDING_PER_USER', 3)
+
+
+def max_running_per_user():
+    return getattr(settings, 'SIMULATION_JOB_MAX_RUNNING_PER_USER', 1)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def submit_job(user, kind, params):
+    """
+    Queue a job for `user`. The user row is locked while active jobs are
+    counted, so concurrent submissions cannot exceed the per-user limit.
+    """
+    with transaction.atomic():
+        get_user_model().all_objects.select_for_update().filter(pk=user.pk).first()
+        active = SimulationJob.objects.filter(user=user, status__in=SimulationJob.ACTIVE_STATUSES).count()
+        if active >= max_pending_per_user():
+            raise JobLimitExceeded(f"User {user.pk} already has {active} active simulation jobs")
+        return SimulationJob.objects.create(user=user, kind=kind, params=params)
+
+
+def busy_users():
+    """Users at their running limit, as of now."""
+    return set(
+        SimulationJob.objects.filter(status=SimulationJob.RUNNING)
+        .values('user_id')
+        .annotate(running=Count('id'))
+        .filter(running__gte=max_running_per_user())
+        .values_list('user_id', flat=True)
+    )
+
+
+def claim_next_job(worker):
+    """
+    Atomically move the oldest eligible queued job to RUNNING and return it,
+    or return None. Jobs of users already at their running limit are skipped
+    so one user's backlog cannot starve everyone else. The user's running
+    jobs are counted again under a lock on the user row, as submit_job
+    counts active ones, so two workers cannot both take the last slot.
+    """
+    busy = busy_users()
+    candidates = (
+        SimulationJob.objects.filter(status=SimulationJob.QUEUED)
+        .order_by('id')
+        .values_list('id', 'user_id')[:50]
+    )
+    for job_id, user_id in candidates:
+        if user_id in busy:
+            continue
+        with transaction.atomic():
+            get_user_model().all_objects.select_for_update().filter(pk=user_id).first()
+            running = SimulationJob.objects.filter(user_id=user_id, status=SimulationJob.RUNNING).count()
+            if running >= max_running_per_user():
+                busy.add(user_id)
+                continue
+            now = timezone.now()
+            claimed = SimulationJob.objects.filter(id=job_id, status=SimulationJob.QUEUED).update(
+                status=SimulationJob.RUNNING,
+                worker=worker,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                heartbeat_at=now,
+            )
+        if claimed:
+            return SimulationJob.objects.get(id=job_id)
+    return None
+
+
+def heartbeat(worker, job_ids):
+    if job_ids:
+        SimulationJob.objects.filter(id__in=job_ids, worker=worker, status=SimulationJob.RUNNING).update(
+            heartbeat_at=timezone.now()
+        )
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Requeue RUNNING jobs whose worker stopped sending heartbeats, failing the
+    ones that have used up their attempts. Returns the number requeued.
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, 'SIMULATION_JOB_STALE_AFTER', 60)
+    max_attempts = getattr(settings, 'SIMULATION_JOB_MAX_ATTEMPTS', 3)
+    stale = SimulationJob.objects.filter(
+        status=SimulationJob.RUNNING,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=stale_after),
+    )
+    stale.filter(attempts__gte=max_attempts).update(
+        status=SimulationJob.FAILED,
+        error='Worker stopped responding',
+        finished_at=timezone.now(),
+    )
+    return stale.filter(attempts__lt=max_attempts).update(status=SimulationJob.QUEUED, worker='')
+
+
+def release_job(job):
+    """Put a job the worker could not finish back on the queue."""
+    SimulationJob.objects.filter(id=job.id, status=SimulationJob.RUNNING).update(
+        status=SimulationJob.QUEUED, worker=''
+    )
+
+
+def execute_job(kind, params):
+    """Entry point run in the process pool."""
+    return JOB_KINDS[kind].compute(params)
+
+
+def owned(job):
+    """The job's row while it is still RUNNING under the worker that claimed it."""
+    return SimulationJob.objects.filter(id=job.id, status=SimulationJob.RUNNING, worker=job.worker)
+
+
+def complete_job(job, result):
+    """
+    Mark the job SUCCEEDED and persist its result, unless it was requeued
+    (stale heartbeat) and another worker owns it now: then the result is
+    discarded, so the simulation is recorded and paid for only once.
+    Returns whether the result was kept.
+    """
+    try:
+        with transaction.atomic():
+            if not owned(job).update(status=SimulationJob.SUCCEEDED, result=result, finished_at=timezone.now()):
+                return False
+            simulation = JOB_KINDS[job.kind].persist(job, result)
+            SimulationJob.objects.filter(id=job.id).update(simulation=simulation)
+            return True
+    except InsufficientFunds:
+        fail_job(job, 'Insufficient balance')
+        return False
+
+
+def fail_job(job, error):
+    owned(job).update(
+        status=SimulationJob.FAILED,
+        error=error,
+        finished_at=timezone.now(),
+    )
+
+
+def run_job_inline(job):
+    """Run a claimed job in the current process instead of the pool."""
+    try:
+        result = execute_job(job.kind, job.params)
+    except Exception as e:
+        fail_job(job, str(e))
+    else:
+        complete_job(job, result)
@@ -0,0 +1,42 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from investment_simulation.monte_carlo import run_monte_carlo
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the Monte Carlo engine on one core and fail if the median "
+        "run exceeds the latency budget (default: 10k paths x 252 steps in 100 ms)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paths', type=int, default=10_000)
+        parser.add_argument('--steps', type=int, default=252)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--risk-level', default='High')
+        parser.add_argument('--budget-ms', type=float, default=100.0)
+
+    def handle(self, *args, **options):
+        paths, steps = options['paths'], options['steps']
+        # Warm-up run so one-off allocation and import costs are not timed.
+        run_monte_carlo(1000, options['risk_level'], n_paths=paths, n_steps=steps, seed=0)
+
+        timings = []
+        for seed in range(options['repeat']):
+            start = time.perf_counter()
+            run_monte_carlo(1000, options['risk_level'], n_paths=paths, n_steps=steps, seed=seed)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        median = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{paths} paths x {steps} steps ({options['repeat']} runs): "
+            f"min {timings[0]:.1f} ms, median {median:.1f} ms, p95 {p95:.1f} ms"
+        )
+        if median > options['budget_ms']:
+            raise CommandError(f"Median {median:.1f} ms exceeds the {options['budget_ms']:.0f} ms budget")
+        self.stdout.write(self.style.SUCCESS(f"Within the {options['budget_ms']:.0f} ms budget"))
@@ -0,0 +1,92 @@
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from investment_simulation.jobs import (
+    claim_next_job, complete_job, execute_job, fail_job, heartbeat,
+    release_job, requeue_stale_jobs, worker_name,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued simulation jobs in a process pool. Needs no broker: jobs are "
+        "claimed from the database, and jobs left running by a stopped worker "
+        "are requeued once their heartbeat goes stale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processes = max(1, options['processes'])
+        poll_interval = options['poll_interval']
+        worker = worker_name()
+        self.stdout.write(f"Simulation worker {worker} started with {processes} processes")
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+
+        pool = ProcessPoolExecutor(max_workers=processes)
+        running = {}
+        last_reap = time.monotonic()
+        try:
+            while running or not self.stopping:
+                close_old_connections()
+                while not self.stopping and len(running) < processes:
+                    job = claim_next_job(worker)
+                    if job is None:
+                        break
+                    running[pool.submit(execute_job, job.kind, job.params)] = job
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                else:
+                    done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    broken = False
+                    for future in done:
+                        job = running.pop(future)
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            # A child died (e.g. killed by the OOM killer); retry the job.
+                            release_job(job)
+                            broken = True
+                        except Exception as e:
+                            fail_job(job, str(e))
+                            self.stderr.write(f"Job {job.id} failed: {e}")
+                        else:
+                            complete_job(job, result)
+                            self.stdout.write(f"Job {job.id} finished")
+                    if broken:
+                        for job in running.values():
+                            release_job(job)
+                        running.clear()
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = ProcessPoolExecutor(max_workers=processes)
+                    heartbeat(worker, [job.id for job in running.values()])
+
+                if time.monotonic() - last_reap > poll_interval * 10:
+                    requeue_stale_jobs()
+                    last_reap = time.monotonic()
+        finally:
+            pool.shutdown(wait=True)
+        self.stdout.write(f"Simulation worker {worker} stopped")
+
+    def stop(self, signum, frame):
+        # Finish the jobs in flight, but stop claiming new ones.
+        self.stopping = True
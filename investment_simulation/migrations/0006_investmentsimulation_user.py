@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-17 23:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("investment_simulation", "0005_rename_market_investmentsimulation_market_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="investmentsimulation",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                default=None,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("investment_simulation", "0007_simulationjob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="investmentsimulation",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["id"],
+                name="simulation_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investmentsimulation",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "id"],
+                name="simulation_active_user_idx",
+            ),
+        ),
+    ]
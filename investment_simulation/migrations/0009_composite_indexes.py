@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("investment_simulation", "0008_active_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="investmentsimulation",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["market_id", "id"],
+                name="simulation_active_market_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investmentsimulation",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["investment_date", "id"],
+                name="simulation_active_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investmentsimulation",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["amount_invested", "id"],
+                name="simulation_active_amount_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investmentsimulation",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["profit_loss", "id"],
+                name="simulation_active_profit_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("investment_simulation", "0009_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="investmentsimulation",
+            name="hypothetical",
+            field=models.BooleanField(default=False),
+        ),
+    ]
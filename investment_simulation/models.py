@@ -1,5 +1,8 @@
+from decimal import Decimal
 from django.db import models
+from django.conf import settings
 from market.models import Market
+from versioning.soft_delete import ACTIVE, SignalledActiveManager, SignalledSoftDeleteManager
 """
  The InvestmentSimulation model records details of simulated investments made by users.
  It stores information such as the market in which the investment is made, the amount invested,
@@ -9,14 +12,93 @@ from market.models import Market
 class InvestmentSimulation(models.Model):
     id = models.AutoField(primary_key=True, serialize=False)
     market_id = models.ForeignKey(Market, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, default=None)
     amount_invested = models.DecimalField(decimal_places=2, max_digits=10)
     investment_date = models.DateTimeField(auto_now_add=True)
     outcome = models.CharField(max_length=10)
     profit_loss = models.DecimalField(decimal_places=2, max_digits=10)
     is_active = models.BooleanField(default=True)
+    # Outcome of a server-side run (Monte Carlo job, backtest), not an
+    # investment: it is recorded but never moves the wallet.
+    hypothetical = models.BooleanField(default=False)
+    objects = SignalledActiveManager()
+    all_objects = SignalledSoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=ACTIVE, name='simulation_active_idx'),
+            models.Index(fields=['user', 'id'], condition=ACTIVE, name='simulation_active_user_idx'),
+            models.Index(fields=['market_id', 'id'], condition=ACTIVE, name='simulation_active_market_idx'),
+            models.Index(fields=['investment_date', 'id'], condition=ACTIVE, name='simulation_active_date_idx'),
+            models.Index(fields=['amount_invested', 'id'], condition=ACTIVE, name='simulation_active_amount_idx'),
+            models.Index(fields=['profit_loss', 'id'], condition=ACTIVE, name='simulation_active_profit_idx'),
+        ]
 
     def soft_delete(self):
         self.is_active = False
         self.save()
+
+    @classmethod
+    def record(cls, market_id, user_id, amount_invested, profit_loss, hypothetical=False):
+        """Save the outcome of a server-side simulation or backtest."""
+        profit_loss = Decimal(str(profit_loss)).quantize(Decimal('0.01'))
+        return cls.objects.create(
+            market_id_id=market_id,
+            user_id=user_id,
+            amount_invested=Decimal(str(amount_invested)),
+            outcome='Profit' if profit_loss >= 0 else 'Loss',
+            profit_loss=profit_loss,
+            hypothetical=hypothetical,
+        )
+
+    def __str__(self):
+        return str(self.simulation_id)
+
+class SimulationJob(models.Model):
+    """
+    A queued simulation run. Jobs are submitted by the API, claimed and run by
+    the `run_simulation_worker` management command, and keep a heartbeat while
+    running so jobs left behind by a crashed or restarted worker can be
+    requeued. A finished job links to the InvestmentSimulation it produced.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    MONTE_CARLO = 'monte_carlo'
+
+    KIND_CHOICES = [
+        (MONTE_CARLO, 'Monte Carlo'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='simulation_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=MONTE_CARLO)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    simulation = models.ForeignKey(InvestmentSimulation, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='simjob_status_id_idx'),
+            models.Index(fields=['user', 'status'], name='simjob_user_status_idx'),
+        ]
+
     def __str__(self):
-        return str(self.simulation_id)
\ No newline at end of file
+        return f"SimulationJob {self.id} ({self.status})"
@@ -1,8 +1,23 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.urls import reverse
 from market.models import Market
-from investment_simulation.models import InvestmentSimulation
+from investment_simulation.models import InvestmentSimulation, SimulationJob
+from investment_simulation.jobs import claim_next_job, complete_job, execute_job, requeue_stale_jobs, run_job_inline
+from investment_simulation.backtest import load_closes, run_backtest, run_batch, shared_pool
+from market.timeseries import ingest_bars
+from virtualmoney.models import VirtualMoney, WalletBalance, WalletLedgerEntry
+from investment_simulation.monte_carlo import (
+    CHUNK_CELLS, RISK_PROFILES, risk_profile, run_monte_carlo, simulate_terminal_values,
+)
 
 class InvestmentSimulationTests(APITestCase):
 
@@ -63,7 +78,7 @@ class InvestmentSimulationTests(APITestCase):
         """
         response = self.client.get(self.simulation_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Only 1 simulation exists
+        self.assertEqual(len(response.data['results']), 1)  # Only 1 simulation exists
 
     def test_get_investment_simulation_detail(self):
         """
@@ -126,3 +141,270 @@ class InvestmentSimulationTests(APITestCase):
         non_existent_id = 9999
         response = self.client.delete(reverse('investment-simulation-detail', args=[non_existent_id]))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MonteCarloTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.market = Market.objects.create(
+            market_name="Stocks",
+            risk_level="High",
+            description="High-risk stock market",
+            is_active=True
+        )
+        self.monte_carlo_url = reverse('investment-simulation-monte-carlo')
+
+    def test_risk_profile_is_case_insensitive_with_default(self):
+        self.assertEqual(risk_profile("HIGH"), RISK_PROFILES['high'])
+        self.assertEqual(risk_profile("unknown"), RISK_PROFILES['medium'])
+
+    def test_seeded_runs_are_reproducible(self):
+        first = run_monte_carlo(1000, "High", n_paths=2000, n_steps=50, seed=7)
+        second = run_monte_carlo(1000, "High", n_paths=2000, n_steps=50, seed=7)
+        self.assertEqual(first, second)
+
+    def test_chunked_runs_return_every_path(self):
+        terminal = simulate_terminal_values(CHUNK_CELLS // 10 + 3, 20, RISK_PROFILES['low'], seed=1)
+        self.assertEqual(terminal.shape, (CHUNK_CELLS // 10 + 3,))
+        self.assertTrue((terminal > 0).all())
+
+    def test_higher_risk_widens_distribution(self):
+        low = run_monte_carlo(1000, "Low", n_paths=5000, seed=3)['percentiles']
+        high = run_monte_carlo(1000, "Extreme", n_paths=5000, seed=3)['percentiles']
+        self.assertLess(low['p95'] - low['p5'], high['p95'] - high['p5'])
+
+    def test_run_monte_carlo_endpoint(self):
+        data = {"market_id": self.market.market_id, "amount_invested": 1000.00, "paths": 1000, "seed": 42}
+        response = self.client.post(self.monte_carlo_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['paths'], 1000)
+        self.assertEqual(response.data['steps'], 252)
+        percentiles = list(response.data['percentiles'].values())
+        self.assertEqual(percentiles, sorted(percentiles))
+        self.assertTrue(0 <= response.data['probability_of_loss'] <= 1)
+        self.assertFalse(InvestmentSimulation.objects.exists())
+
+    def test_run_monte_carlo_inactive_market(self):
+        self.market.soft_delete()
+        data = {"market_id": self.market.market_id, "amount_invested": 1000.00}
+        response = self.client.post(self.monte_carlo_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_run_monte_carlo_too_large(self):
+        data = {"market_id": self.market.market_id, "amount_invested": 1000.00, "paths": 100000, "steps": 2520}
+        response = self.client.post(self.monte_carlo_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SimulationJobTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.user = User.objects.create_user(username="investor", password="testpassword")
+        VirtualMoney.objects.create(user=self.user, amount=10000.00)
+        self.market = Market.objects.create(
+            market_name="Bonds",
+            risk_level="Low",
+            description="Low-risk bond market",
+            is_active=True
+        )
+        self.job_list_url = reverse('simulation-job-list')
+        self.job_data = {
+            "user": self.user.user_id,
+            "market_id": self.market.market_id,
+            "amount_invested": 1000.00,
+            "paths": 500,
+            "steps": 20,
+            "seed": 1,
+        }
+
+    def submit(self):
+        return self.client.post(self.job_list_url, self.job_data, format='json')
+
+    def test_submit_job_returns_immediately(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], SimulationJob.QUEUED)
+        self.assertEqual(response['Location'], reverse('simulation-job-detail', args=[response.data['id']]))
+        self.assertFalse(InvestmentSimulation.objects.exists())
+
+    def test_submit_job_invalid(self):
+        self.job_data['amount_invested'] = ""
+        response = self.submit()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SIMULATION_JOB_MAX_PENDING_PER_USER=2)
+    def test_submit_job_limited_per_user(self):
+        self.assertEqual(self.submit().status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.submit().status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.submit().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_job_result_is_persisted_as_simulation(self):
+        job_id = self.submit().data['id']
+        run_job_inline(claim_next_job("test-worker"))
+        response = self.client.get(reverse('simulation-job-detail', args=[job_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], SimulationJob.SUCCEEDED)
+        simulation = InvestmentSimulation.objects.get(id=response.data['simulation'])
+        self.assertEqual(simulation.user, self.user)
+        self.assertEqual(float(simulation.profit_loss), response.data['result']['expected_profit_loss'])
+
+    def test_job_result_leaves_the_wallet_alone(self):
+        balance = WalletBalance.objects.get(user=self.user).balance
+        self.submit()
+        run_job_inline(claim_next_job("test-worker"))
+        simulation = InvestmentSimulation.objects.get()
+        self.assertTrue(simulation.hypothetical)
+        self.assertEqual(WalletBalance.objects.get(user=self.user).balance, balance)
+        self.assertFalse(WalletLedgerEntry.objects.filter(reference_id=simulation.pk, source=WalletLedgerEntry.INVESTMENT_STAKE).exists())
+
+    def test_claim_respects_running_limit_per_user(self):
+        other = get_user_model().objects.create_user(username="other", password="testpassword")
+        self.submit()
+        self.submit()
+        SimulationJob.objects.create(user=other, params={})
+        first = claim_next_job("test-worker")
+        second = claim_next_job("test-worker")
+        self.assertEqual(first.user, self.user)
+        self.assertEqual(second.user, other)
+        self.assertIsNone(claim_next_job("test-worker"))
+
+    def test_claim_rechecks_the_running_limit(self):
+        self.submit()
+        self.submit()
+        claim_next_job("first-worker")
+        # A worker whose busy snapshot predates the first claim.
+        with mock.patch('investment_simulation.jobs.busy_users', return_value=set()):
+            self.assertIsNone(claim_next_job("second-worker"))
+        self.assertEqual(SimulationJob.objects.filter(status=SimulationJob.RUNNING).count(), 1)
+
+    def test_stale_running_jobs_are_requeued(self):
+        self.submit()
+        job = claim_next_job("dead-worker")
+        SimulationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale_jobs(stale_after=60), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SimulationJob.QUEUED)
+        self.assertEqual(claim_next_job("new-worker").id, job.id)
+
+    def test_requeued_job_is_completed_once(self):
+        self.submit()
+        stale = claim_next_job("dead-worker")
+        SimulationJob.objects.filter(id=stale.id).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+        requeue_stale_jobs(stale_after=60)
+        current = claim_next_job("new-worker")
+        result = execute_job(current.kind, current.params)
+        self.assertTrue(complete_job(current, result))
+        self.assertFalse(complete_job(stale, result))
+        self.assertEqual(InvestmentSimulation.objects.count(), 1)
+        job = SimulationJob.objects.get(id=current.id)
+        self.assertEqual(job.status, SimulationJob.SUCCEEDED)
+        self.assertEqual(job.worker, "new-worker")
+        self.assertEqual(job.simulation, InvestmentSimulation.objects.get())
+
+    def test_get_nonexistent_job(self):
+        response = self.client.get(reverse('simulation-job-detail', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_worker_command_drains_queue(self):
+        job_id = self.submit().data['id']
+        call_command('run_simulation_worker', processes=1, poll_interval=0.05, once=True, stdout=StringIO())
+        job = SimulationJob.objects.get(id=job_id)
+        self.assertEqual(job.status, SimulationJob.SUCCEEDED)
+        self.assertIsNotNone(job.simulation)
+
+
+class BacktestTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.stocks = Market.objects.create(market_name="Stocks", risk_level="High", description="Stocks")
+        self.bonds = Market.objects.create(market_name="Bonds", risk_level="Low", description="Bonds")
+        self.start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        days = [self.start + timedelta(days=i) for i in range(100)]
+        ingest_bars(self.stocks.market_id, [(day.isoformat(), p, p, p, p, 1) for day, p in zip(days, np.linspace(100, 200, 100))])
+        ingest_bars(self.bonds.market_id, [(day.isoformat(), 50, 50, 50, 50, 1) for day in days])
+        self.data = {
+            "market_ids": [self.stocks.market_id],
+            "strategy": "buy_and_hold",
+            "amount_invested": 1000.00,
+            "start": self.start.isoformat(),
+            "end": (self.start + timedelta(days=100)).isoformat(),
+        }
+
+    def test_buy_and_hold_tracks_price(self):
+        closes = np.array([[10.0], [12.0], [9.0]])
+        result = run_backtest(np.array([0, 86400, 172800]), closes, 'buy_and_hold', 100)
+        self.assertEqual([point['equity'] for point in result['equity_curve']], [100, 120, 90])
+        self.assertAlmostEqual(result['max_drawdown'], -0.25)
+
+    def test_dca_at_constant_price_keeps_value(self):
+        closes = np.full((10, 1), 5.0)
+        result = run_backtest(np.arange(10) * 86400, closes, 'dca', 100, every=3)
+        self.assertEqual({point['equity'] for point in result['equity_curve']}, {100})
+
+    def test_rebalance_matches_loop_reference(self):
+        rng = np.random.default_rng(0)
+        closes = np.exp(np.cumsum(rng.normal(0, 0.02, (60, 2)), axis=0))
+        weights = [0.7, 0.3]
+        result = run_backtest(np.arange(60) * 86400, closes, 'rebalance', 1000, weights, every=7)
+        value, units, expected = 1000.0, None, []
+        for i, row in enumerate(closes):
+            if i % 7 == 0:
+                value = row @ units if units is not None else value
+                units = value * np.array(weights) / row
+            expected.append(row @ units)
+        actual = [point['equity'] for point in result['equity_curve']]
+        self.assertTrue(np.allclose(actual, np.round(expected, 2)))
+
+    def test_batch_in_pool_matches_sequential(self):
+        timestamps, closes = load_closes([self.stocks.market_id, self.bonds.market_id], self.start, self.start + timedelta(days=100))
+        tasks = [(timestamps, closes, strategy, 1000, None, 10, False) for strategy in ('buy_and_hold', 'dca', 'rebalance')]
+        self.assertEqual(run_batch(tasks, max_workers=2), run_batch(tasks, max_workers=1))
+
+    def test_batches_share_one_pool(self):
+        timestamps, closes = load_closes([self.stocks.market_id], self.start, self.start + timedelta(days=100))
+        tasks = [(timestamps, closes, strategy, 1000, None, 10, False) for strategy in ('buy_and_hold', 'dca')]
+        run_batch(tasks, max_workers=2)
+        pool = shared_pool()
+        run_batch(tasks, max_workers=2)
+        self.assertIs(shared_pool(), pool)
+
+    def test_backtest_endpoint_saves_simulation(self):
+        response = self.client.post(reverse('investment-simulation-backtest'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['bars'], 100)
+        self.assertAlmostEqual(response.data['total_return'], 1.0)
+        simulation = InvestmentSimulation.objects.get(id=response.data['simulation'])
+        self.assertEqual(simulation.market_id, self.stocks)
+        self.assertEqual(simulation.outcome, "Profit")
+        self.assertEqual(float(simulation.profit_loss), 1000.00)
+
+    def test_backtest_leaves_the_wallet_alone(self):
+        user = get_user_model().objects.create_user(username="backtester", password="testpassword")
+        VirtualMoney.objects.create(user=user, amount=100.00)
+        self.data['user'] = user.user_id
+        response = self.client.post(reverse('investment-simulation-backtest'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(InvestmentSimulation.objects.get(id=response.data['simulation']).hypothetical)
+        self.assertEqual(WalletBalance.objects.get(user=user).balance, 100)
+
+    def test_backtest_without_price_data(self):
+        self.data['start'] = "2010-01-01T00:00:00Z"
+        self.data['end'] = "2010-02-01T00:00:00Z"
+        response = self.client.post(reverse('investment-simulation-backtest'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backtest_batch_runs_strategies_by_markets(self):
+        data = {
+            "strategies": [{"strategy": "buy_and_hold"}, {"strategy": "dca", "every": 5}],
+            "markets": [[self.stocks.market_id], [self.bonds.market_id], [self.stocks.market_id, self.bonds.market_id]],
+            "amount_invested": 1000.00,
+            "start": self.data['start'],
+            "end": self.data['end'],
+        }
+        response = self.client.post(reverse('investment-simulation-backtest-batch'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(InvestmentSimulation.objects.filter(hypothetical=True).count(), 6)
+        self.assertNotIn('equity_curve', response.data['results'][0])
+        self.assertEqual(InvestmentSimulation.objects.count(), 6)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LeaderboardConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'leaderboard'
+
+    def ready(self):
+        # Keep leaderboard entries in step with quiz results and wallet postings.
+        from . import signals  # noqa: F401
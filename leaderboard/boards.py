@@ -0,0 +1,231 @@
+"""
+Leaderboards ranked by total quiz score, total quiz money earned or wallet
+balance, globally and per quiz.
+
+`LeaderboardEntry` rows are the source of truth and are moved with `F()`
+updates as results and wallet postings arrive, stamped with the next
+`LeaderboardClock` sequence. Each process keeps the boards it serves in a
+`RankedList`, ordered by (-value, user_id), and pulls only the rows
+stamped after the sequence it last read, at most once per
+LEADERBOARD_SYNC_INTERVAL; a new clock generation (after `rebuild`) makes
+it reload the board in full. Top-k, rank and neighbour lookups are then
+O(log n + k) with no sorting. A board lists the users whose total on it
+is not zero.
+"""
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from quiz_results.models import QuizResult
+from virtualmoney.models import WalletBalance
+
+from .models import LeaderboardClock, LeaderboardEntry
+from .ranking import RankedList
+
+SCORE = 'score'
+MONEY_EARNED = 'money_earned'
+BALANCE = 'balance'
+METRICS = (SCORE, MONEY_EARNED, BALANCE)
+QUIZ_METRICS = (SCORE, MONEY_EARNED)
+
+CLOCK_ID = 1
+REBUILD_CHUNK_SIZE = 2000
+
+
+def board_key(metric, quiz_id=None):
+    if metric not in METRICS:
+        raise ValueError(f"Unknown leaderboard metric {metric}")
+    if quiz_id is None:
+        return metric
+    if metric not in QUIZ_METRICS:
+        raise ValueError(f"There is no per-quiz {metric} leaderboard")
+    return f"quiz:{quiz_id}:{metric}"
+
+
+def result_amounts(quiz_id, score, money_earned):
+    """What one quiz result adds to each board it appears on."""
+    score, money_earned = Decimal(score), Decimal(money_earned)
+    return {
+        SCORE: score,
+        MONEY_EARNED: money_earned,
+        board_key(SCORE, quiz_id): score,
+        board_key(MONEY_EARNED, quiz_id): money_earned,
+    }
+
+
+def sync_interval():
+    return getattr(settings, 'LEADERBOARD_SYNC_INTERVAL', 1.0)
+
+
+def read_clock():
+    """The (sequence, generation) of the last committed leaderboard write."""
+    return LeaderboardClock.objects.filter(pk=CLOCK_ID).values_list('sequence', 'generation').first() or (0, 0)
+
+
+def advance_clock(new_generation=False):
+    """
+    Advance the clock and return its (sequence, generation) for the writes
+    of the current transaction. The clock row stays locked until commit.
+    """
+    changes = {'sequence': F('sequence') + 1}
+    if new_generation:
+        changes['generation'] = F('generation') + 1
+    clock = LeaderboardClock.objects.filter(pk=CLOCK_ID)
+    if not clock.update(**changes):
+        LeaderboardClock.objects.get_or_create(pk=CLOCK_ID)
+        clock.update(**changes)
+    return clock.values_list('sequence', 'generation').get()
+
+
+class Board:
+    """One leaderboard as held in this process."""
+
+    def __init__(self, key):
+        self.key = key
+        self.lock = threading.Lock()
+        self.values = {}
+        self.ranked = RankedList()
+        self.sequence = None
+        self.generation = None
+        self.checked_at = 0.0
+
+    def __len__(self):
+        return len(self.ranked)
+
+    def _set(self, user_id, value, active):
+        old = self.values.pop(user_id, None)
+        if old is not None:
+            self.ranked.remove((-old, user_id))
+        if active and value:
+            self.values[user_id] = value
+            self.ranked.add((-value, user_id))
+
+    def sync(self, force=False):
+        if not force and self.sequence is not None and time.monotonic() - self.checked_at < sync_interval():
+            return
+        with self.lock:
+            # Read the clock first: every entry stamped at or below it has
+            # committed, so the rows read next include all of them.
+            sequence, generation = read_clock()
+            rows = LeaderboardEntry.objects.filter(board=self.key)
+            if generation != self.generation:
+                rows = rows.filter(is_active=True).exclude(value=0).values_list('user_id', 'value')
+                self.values = dict(rows)
+                self.ranked = RankedList((-value, user_id) for user_id, value in self.values.items())
+            else:
+                rows = rows.filter(sequence__gt=self.sequence)
+                for user_id, value, active in rows.values_list('user_id', 'value', 'is_active'):
+                    self._set(user_id, value, active)
+            self.sequence, self.generation = sequence, generation
+            self.checked_at = time.monotonic()
+
+    def _row(self, position, key):
+        value, user_id = key
+        return {'rank': position + 1, 'user_id': user_id, 'value': -value}
+
+    def top(self, limit):
+        return [self._row(i, key) for i, key in enumerate(self.ranked.islice(0, limit))]
+
+    def position(self, user_id):
+        value = self.values.get(user_id)
+        if value is None:
+            return None
+        return self.ranked.index((-value, user_id))
+
+    def around(self, position, radius):
+        start = max(position - radius, 0)
+        return [self._row(start + i, key) for i, key in enumerate(self.ranked.islice(start, position + radius + 1))]
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def get_board(key):
+    """Return this process's copy of a board, synced if it is due."""
+    board = _boards.get(key)
+    if board is None:
+        with _boards_lock:
+            board = _boards.setdefault(key, Board(key))
+    board.sync()
+    return board
+
+
+def mark_stale(keys):
+    """Make the next read of these boards sync, e.g. after a local write."""
+    for key in keys:
+        board = _boards.get(key)
+        if board is not None:
+            board.checked_at = 0.0
+
+
+def reset_boards():
+    with _boards_lock:
+        _boards.clear()
+
+
+def apply_deltas(user_id, deltas):
+    """Move `user_id`'s entries by `deltas`, a {board key: amount} mapping."""
+    deltas = {key: amount for key, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    with transaction.atomic():
+        sequence, _ = advance_clock()
+        for key, amount in deltas.items():
+            entries = LeaderboardEntry.objects.filter(board=key, user_id=user_id)
+            updated = entries.update(value=F('value') + amount, sequence=sequence, is_active=True)
+            if not updated:
+                _, created = LeaderboardEntry.objects.get_or_create(
+                    board=key, user_id=user_id, defaults={'value': amount, 'sequence': sequence}
+                )
+                if not created:
+                    entries.update(value=F('value') + amount, sequence=sequence, is_active=True)
+    mark_stale(deltas)
+
+
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recompute every board from active quiz results and wallet balances,
+    reading them in chunks. Entries of users whose total is now zero, or who
+    no longer appear on a board, are deactivated, and every process reloads
+    its boards on its next sync. Returns the number of entries written.
+
+    The clock is advanced first and stays locked until the rebuild commits,
+    so writers wait to move entries until then: no delta can be counted in
+    the totals and then overwritten, or committed in between and lost.
+    """
+    with transaction.atomic():
+        sequence, _ = advance_clock(new_generation=True)
+        totals = defaultdict(Decimal)
+        results = (
+            QuizResult.objects.order_by('pk')
+            .values_list('user_id', 'quiz_id', 'score', 'money_earned')
+            .iterator(chunk_size=chunk_size)
+        )
+        for user_id, quiz_id, score, money_earned in results:
+            for key, amount in result_amounts(quiz_id, score, money_earned).items():
+                totals[key, user_id] += amount
+        for user_id, balance in WalletBalance.objects.values_list('user_id', 'balance').iterator(chunk_size=chunk_size):
+            totals[BALANCE, user_id] = balance
+
+        entries = [
+            LeaderboardEntry(board=key, user_id=user_id, value=value, sequence=sequence)
+            for (key, user_id), value in totals.items()
+            if value
+        ]
+        for i in range(0, len(entries), chunk_size):
+            LeaderboardEntry.objects.bulk_create(
+                entries[i:i + chunk_size],
+                update_conflicts=True,
+                unique_fields=['board', 'user'],
+                update_fields=['value', 'sequence', 'is_active'],
+            )
+        LeaderboardEntry.objects.filter(sequence__lt=sequence, is_active=True).update(
+            value=0, is_active=False, sequence=sequence
+        )
+    return len(entries)
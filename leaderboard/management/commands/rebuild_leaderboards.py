@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from leaderboard.boards import REBUILD_CHUNK_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every leaderboard from active quiz results and wallet "
+        "balances. Run after deploying leaderboards or after bulk changes "
+        "that bypass model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=REBUILD_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        count = rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt leaderboards with {count} entries"))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-18 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("leaderboard", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardClock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequence", models.BigIntegerField(default=0)),
+                ("generation", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="leaderboardentry",
+            name="leaderboard_board_updated_idx",
+        ),
+        migrations.RemoveField(
+            model_name="leaderboardentry",
+            name="updated_at",
+        ),
+        migrations.AddField(
+            model_name="leaderboardentry",
+            name="sequence",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="leaderboardentry",
+            index=models.Index(
+                fields=["board", "sequence"], name="leaderboard_board_seq_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+from django.conf import settings
+
+
+class LeaderboardEntry(models.Model):
+    """
+    One user's total on one leaderboard. `board` is a key such as "score",
+    "balance" or "quiz:7:money_earned" (see leaderboard/boards.py). Rows are
+    moved incrementally as results and wallet postings arrive; `sequence`
+    (see LeaderboardClock) lets every process pull just the rows that
+    changed since it last looked.
+    """
+    board = models.CharField(max_length=64)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sequence = models.BigIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'user'], name='unique_leaderboard_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['board', 'sequence'], name='leaderboard_board_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.board} entry for User {self.user_id}: {self.value}"
+
+
+class LeaderboardClock(models.Model):
+    """
+    Single row that orders leaderboard writes. A writer advances `sequence`
+    before it moves any entry and stamps the entries with the new value; the
+    UPDATE keeps the row locked until the writer commits, so sequences commit
+    in increasing order and a process that has read sequence n can see every
+    entry stamped n or lower. `rebuild` also advances `generation`, which
+    makes every process reload its boards in full.
+    """
+    sequence = models.BigIntegerField(default=0)
+    generation = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Leaderboard clock at {self.sequence} (generation {self.generation})"
@@ -0,0 +1,123 @@
+"""
+In-process order-statistics list for leaderboards.
+
+`RankedList` keeps keys sorted in buckets of a few hundred items and a
+Fenwick tree over the bucket sizes. Finding an item's position, or the
+item at a position, is a binary search over bucket maxima, a Fenwick
+prefix walk and a bisect inside one bucket, so it is O(log n) and never
+sorts the whole board.
+"""
+from bisect import bisect_left, insort
+
+LOAD = 256
+
+
+class RankedList:
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self._buckets = [keys[i:i + LOAD] for i in range(0, len(keys), LOAD)]
+        self._rebuild()
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def _rebuild(self):
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._tree = [0] * (len(self._buckets) + 1)
+        for i, bucket in enumerate(self._buckets):
+            self._tree_add(i, len(bucket))
+        self._len = sum(len(bucket) for bucket in self._buckets)
+
+    def _tree_add(self, i, delta):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _tree_prefix(self, i):
+        """Number of items in the buckets before bucket `i`."""
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _tree_find(self, index):
+        """Return (bucket, offset) holding the item at `index`."""
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= index:
+                pos = nxt
+                index -= self._tree[nxt]
+            step >>= 1
+        return pos, index
+
+    def add(self, key):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._rebuild()
+            return
+        i = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * LOAD:
+            self._buckets[i:i + 1] = [bucket[:LOAD], bucket[LOAD:]]
+            self._rebuild()
+        else:
+            self._tree_add(i, 1)
+
+    def remove(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            raise KeyError(key)
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            raise KeyError(key)
+        del bucket[j]
+        self._len -= 1
+        if not bucket:
+            del self._buckets[i]
+            self._rebuild()
+        else:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+
+    def index(self, key):
+        """Zero-based position of `key`, which must be present."""
+        i = bisect_left(self._maxes, key)
+        if i < len(self._buckets):
+            bucket = self._buckets[i]
+            j = bisect_left(bucket, key)
+            if j < len(bucket) and bucket[j] == key:
+                return self._tree_prefix(i) + j
+        raise KeyError(key)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        i, j = self._tree_find(index)
+        return self._buckets[i][j]
+
+    def islice(self, start, stop):
+        """Yield the items at positions [start, stop)."""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return
+        i, j = self._tree_find(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = self._buckets[i][j:j + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            i, j = i + 1, 0
@@ -0,0 +1,52 @@
+"""
+Signal receivers that move leaderboard entries as quiz results and wallet
+postings are saved. Quiz results follow the same before/after pattern as
+the wallet ledger, so edits, reassignments and soft deletes only post the
+difference. `QuerySet.update()` and `bulk_create()` bypass signals; run
+`rebuild_leaderboards` after bulk changes.
+"""
+from django.db.models.signals import post_save, pre_save
+
+from quiz_results.models import QuizResult
+from virtualmoney.models import WalletLedgerEntry
+
+from .boards import BALANCE, apply_deltas, result_amounts
+
+
+def quiz_result_contributions(result):
+    if result is None or not result.is_active:
+        return None, {}
+    return result.user_id, result_amounts(result.quiz_id, result.score, result.money_earned)
+
+
+def remember_quiz_result(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if not instance._state.adding and instance.pk is not None:
+        previous = QuizResult._base_manager.filter(pk=instance.pk).first()
+    instance._leaderboard_before = quiz_result_contributions(previous)
+
+
+def post_quiz_result(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    after = quiz_result_contributions(instance)
+    changes = {}
+    for sign, (user_id, amounts) in ((-1, getattr(instance, '_leaderboard_before', (None, {}))), (1, after)):
+        for key, amount in amounts.items():
+            user_changes = changes.setdefault(user_id, {})
+            user_changes[key] = user_changes.get(key, 0) + sign * amount
+    for user_id, deltas in changes.items():
+        apply_deltas(user_id, deltas)
+    instance._leaderboard_before = after
+
+
+def post_wallet_entry(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_deltas(instance.user_id, {BALANCE: instance.amount})
+
+
+pre_save.connect(remember_quiz_result, sender=QuizResult, dispatch_uid='leaderboard_pre_save_quiz_result')
+post_save.connect(post_quiz_result, sender=QuizResult, dispatch_uid='leaderboard_post_save_quiz_result')
+post_save.connect(post_wallet_entry, sender=WalletLedgerEntry, dispatch_uid='leaderboard_post_save_wallet_entry')
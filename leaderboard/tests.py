@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from leaderboard.boards import apply_deltas, get_board, read_clock, rebuild, reset_boards
+from leaderboard.models import LeaderboardEntry
+from leaderboard.ranking import RankedList
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from users.models import User
+from virtualmoney.models import VirtualMoney
+
+
+class RankedListTests(APITestCase):
+    def test_rank_and_select_match_sorted_order(self):
+        keys = [(-(i * 7919 % 1000), i) for i in range(2000)]
+        ranked = RankedList(keys[:1000])
+        for key in keys[1000:]:
+            ranked.add(key)
+        for key in keys[::3]:
+            ranked.remove(key)
+        expected = sorted(set(keys) - set(keys[::3]))
+        self.assertEqual(list(ranked), expected)
+        self.assertEqual(ranked[500], expected[500])
+        self.assertEqual(ranked.index(expected[777]), 777)
+        self.assertEqual(list(ranked.islice(10, 15)), expected[10:15])
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        reset_boards()
+        self.addCleanup(reset_boards)
+        self.quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        self.other_quiz = Quiz.objects.create(quiz_text="Other quiz text")
+        self.users = [User.objects.create_user(username=f"player{i}", password="testpassword") for i in range(5)]
+        for i, user in enumerate(self.users):
+            QuizResult.objects.create(user=user, quiz=self.quiz, score=10 * (i + 1), money_earned=i)
+        QuizResult.objects.create(user=self.users[0], quiz=self.other_quiz, score=100, money_earned=0)
+
+    def test_top_k(self):
+        response = self.client.get(reverse('leaderboard', args=['score']), {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(
+            [(row['rank'], row['username'], row['value']) for row in response.data['results']],
+            [(1, 'player0', '110.00'), (2, 'player4', '50.00')],
+        )
+
+    def test_per_quiz_board(self):
+        response = self.client.get(reverse('leaderboard', args=['score']), {'quiz': self.quiz.pk})
+        self.assertEqual(response.data['board'], f"quiz:{self.quiz.pk}:score")
+        self.assertEqual(response.data['results'][0]['username'], 'player4')
+        self.assertEqual(response.data['results'][-1]['username'], 'player0')
+
+    def test_my_rank_and_neighbors(self):
+        user = self.users[2]
+        response = self.client.get(reverse('leaderboard-rank', args=['score', user.user_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['rank'], response.data['value']), (4, '30.00'))
+
+        response = self.client.get(reverse('leaderboard-neighbors', args=['score', user.user_id]), {'radius': 1})
+        self.assertEqual([row['rank'] for row in response.data['results']], [3, 4, 5])
+
+    def test_updates_are_incremental(self):
+        self.client.get(reverse('leaderboard', args=['score']))
+        result = QuizResult.objects.create(user=self.users[1], quiz=self.quiz, score=500)
+        response = self.client.get(reverse('leaderboard-rank', args=['score', self.users[1].user_id]))
+        self.assertEqual((response.data['rank'], response.data['value']), (1, '520.00'))
+
+        result.soft_delete()
+        response = self.client.get(reverse('leaderboard-rank', args=['score', self.users[1].user_id]))
+        self.assertEqual(response.data['value'], '20.00')
+
+    def test_balance_board_follows_wallet(self):
+        VirtualMoney.objects.create(user=self.users[3], amount=1000)
+        response = self.client.get(reverse('leaderboard', args=['balance']), {'limit': 1})
+        self.assertEqual(response.data['results'][0]['username'], 'player3')
+        self.assertEqual(response.data['results'][0]['value'], '1003.00')
+
+    def test_rebuild_matches_incremental_totals(self):
+        expected = dict(LeaderboardEntry.objects.exclude(value=0).values_list('id', 'value'))
+        LeaderboardEntry.objects.update(value=0)
+        LeaderboardEntry.objects.create(board='score', user=User.objects.create_user(username="ghost", password="x"), value=Decimal('1'))
+        call_command('rebuild_leaderboards', '--chunk-size', '2', stdout=open('/dev/null', 'w'))
+        self.assertEqual(dict(LeaderboardEntry.objects.filter(is_active=True).values_list('id', 'value')), expected)
+
+    def test_sync_reads_entries_stamped_after_its_clock(self):
+        board = get_board('score')
+        sequence, _ = read_clock()
+        self.assertEqual(board.sequence, sequence)
+        apply_deltas(self.users[1].user_id, {'score': Decimal('500')})
+        self.assertEqual(LeaderboardEntry.objects.get(board='score', user=self.users[1]).sequence, sequence + 1)
+        board.sync(force=True)
+        self.assertEqual(board.top(1)[0]['user_id'], self.users[1].user_id)
+        self.assertEqual(board.sequence, sequence + 1)
+
+    def test_rebuild_starts_a_generation_every_process_reloads(self):
+        ghost = User.objects.create_user(username="ghost", password="x")
+        LeaderboardEntry.objects.create(board='score', user=ghost, value=Decimal('999'))
+        board = get_board('score')
+        self.assertEqual(board.top(1)[0]['user_id'], ghost.user_id)
+        generation = board.generation
+        rebuild()
+        board.sync(force=True)
+        self.assertEqual(board.generation, generation + 1)
+        self.assertIsNone(board.position(ghost.user_id))
+        self.assertEqual(board.top(1)[0]['user_id'], self.users[0].user_id)
+
+    def test_user_not_on_board(self):
+        user = User.objects.create_user(username="newcomer", password="testpassword")
+        response = self.client.get(reverse('leaderboard-rank', args=['score', user.user_id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_metric(self):
+        response = self.client.get(reverse('leaderboard', args=['wins']))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('leaderboard', args=['balance']), {'quiz': self.quiz.pk})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
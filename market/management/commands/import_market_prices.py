@@ -0,0 +1,55 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from market.models import Market
+from market.timeseries import INGEST_BATCH_DAYS, ingest_bars
+
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class Command(BaseCommand):
+    help = (
+        "Import OHLCV bars for a market from a CSV file (with a header row) or "
+        "an NDJSON file, one bar per line with timestamp, open, high, low, "
+        "close and volume. Use '-' to read from stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--market', type=int, required=True, help="market_id to import into")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-days', type=int, default=INGEST_BATCH_DAYS)
+
+    def handle(self, *args, **options):
+        try:
+            market = Market.objects.get(market_id=options['market'])
+        except Market.DoesNotExist:
+            raise CommandError(f"Market with ID {options['market']} not found")
+
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        source = sys.stdin if path == '-' else open(path, newline='')
+        try:
+            rows = self.read_csv(source) if file_format == 'csv' else self.read_ndjson(source)
+            with transaction.atomic():
+                count = ingest_bars(market.market_id, rows, batch_days=options['batch_days'])
+        except (KeyError, ValueError) as e:
+            raise CommandError(f"Invalid price data: {e}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stdout.write(self.style.SUCCESS(f"Imported {count} bars into {market}"))
+
+    def read_csv(self, source):
+        for record in csv.DictReader(source):
+            yield tuple(record[field] for field in FIELDS)
+
+    def read_ndjson(self, source):
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                yield tuple(record[field] for field in FIELDS)
@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-17 23:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MarketPriceChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("bar_count", models.PositiveIntegerField()),
+                ("open", models.FloatField()),
+                ("high", models.FloatField()),
+                ("low", models.FloatField()),
+                ("close", models.FloatField()),
+                ("volume", models.FloatField()),
+                ("bars", models.BinaryField()),
+                (
+                    "market",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_chunks",
+                        to="market.market",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="marketpricechunk",
+            constraint=models.UniqueConstraint(
+                fields=("market", "date"), name="unique_market_price_chunk"
+            ),
+        ),
+    ]
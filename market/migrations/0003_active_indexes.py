@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0002_market_price_chunk"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="market",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["market_id"],
+                name="market_active_idx",
+            ),
+        ),
+    ]
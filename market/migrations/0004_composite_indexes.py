@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0003_active_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="market",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["market_name", "market_id"],
+                name="market_active_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="market",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["risk_level", "market_id"],
+                name="market_active_risk_idx",
+            ),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 
 # Create your models here.
 from django.db import models
+from versioning.soft_delete import ACTIVE, ActiveManager, SoftDeleteManager
 
 
 
@@ -17,9 +18,45 @@ class Market(models.Model):
     description = models.TextField()
     
     is_active = models.BooleanField(default=True)
+    objects = ActiveManager()
+    all_objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['market_id'], condition=ACTIVE, name='market_active_idx'),
+            models.Index(fields=['market_name', 'market_id'], condition=ACTIVE, name='market_active_name_idx'),
+            models.Index(fields=['risk_level', 'market_id'], condition=ACTIVE, name='market_active_risk_idx'),
+        ]
+
     def soft_delete(self):
         self.is_active = False
         self.save()
     
     def __str__(self):
-        return self.market_name
\ No newline at end of file
+        return self.market_name
+
+class MarketPriceChunk(models.Model):
+    """
+    One UTC day of OHLCV bars for a market, stored compactly: `bars` holds the
+    day's bars as a zlib-compressed packed array (see market/timeseries.py)
+    and the summary columns hold the day's own OHLCV bar, so daily queries
+    never need to decode `bars`. The (market, date) unique constraint is the
+    index used by range queries.
+    """
+    market = models.ForeignKey(Market, on_delete=models.CASCADE, related_name='price_chunks')
+    date = models.DateField()
+    bar_count = models.PositiveIntegerField()
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    volume = models.FloatField()
+    bars = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['market', 'date'], name='unique_market_price_chunk'),
+        ]
+
+    def __str__(self):
+        return f"{self.market} prices on {self.date}"
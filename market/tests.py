@@ -1,7 +1,15 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+import numpy as np
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.urls import reverse
-from market.models import Market
+from market.models import Market, MarketPriceChunk
+from market.timeseries import BAR_DTYPE, decode_bars, encode_bars, ingest_bars, parse_timestamp
 
 class MarketTests(APITestCase):
 
@@ -51,7 +59,7 @@ class MarketTests(APITestCase):
         """
         response = self.client.get(self.market_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Only 1 active market exists
+        self.assertEqual(len(response.data['results']), 1)  # Only 1 active market exists
 
     def test_get_market_detail(self):
         """
@@ -114,3 +122,108 @@ class MarketTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+
+
+class MarketPriceTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.market = Market.objects.create(
+            market_name="Stocks",
+            risk_level="High",
+            description="High-risk stock market",
+            is_active=True
+        )
+        self.prices_url = reverse('market-prices', args=[self.market.market_id])
+        # Two days of one-minute bars starting 2024-01-01T00:00:00Z, closing at 100 + minute index.
+        self.start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.rows = [
+            ((self.start + timedelta(minutes=i)).isoformat(), 100 + i, 101 + i, 99 + i, 100 + i, 1)
+            for i in range(2 * 24 * 60)
+        ]
+
+    def import_file(self, name, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            with open(path, 'w') as handle:
+                handle.write(content)
+            call_command('import_market_prices', path, market=self.market.market_id, stdout=StringIO())
+
+    def test_encode_decode_roundtrip(self):
+        bars = np.array([(60, 1.0, 2.0, 0.5, 1.5, 10.0), (120, 1.5, 2.5, 1.0, 2.0, 5.0)], dtype=BAR_DTYPE)
+        self.assertTrue(np.array_equal(decode_bars(encode_bars(bars)), bars))
+
+    def test_parse_timestamp_formats(self):
+        for value in ['2024-01-01T00:00:00Z', '2024-01-01T01:00:00+01:00', '2024-01-01', 1704067200, '1704067200000']:
+            with self.subTest(value=value):
+                self.assertEqual(parse_timestamp(value), self.start)
+        with self.assertRaises(ValueError):
+            parse_timestamp('yesterday')
+
+    def test_ingest_stores_one_chunk_per_day(self):
+        ingest_bars(self.market.market_id, self.rows)
+        chunks = MarketPriceChunk.objects.filter(market=self.market).order_by('date')
+        self.assertEqual(chunks.count(), 2)
+        self.assertEqual(chunks[0].bar_count, 1440)
+        self.assertEqual(chunks[0].open, 100)
+        self.assertEqual(chunks[0].close, 100 + 1439)
+        self.assertEqual(chunks[0].volume, 1440)
+
+    def test_ingest_merges_with_stored_bars(self):
+        ingest_bars(self.market.market_id, self.rows[:10])
+        ingest_bars(self.market.market_id, [(self.rows[5][0], 1, 1, 1, 42, 1)] + self.rows[10:20])
+        chunk = MarketPriceChunk.objects.get(market=self.market)
+        bars = decode_bars(chunk.bars)
+        self.assertEqual(chunk.bar_count, 20)
+        self.assertEqual(bars['close'][5], 42)
+        self.assertTrue((np.diff(bars['t']) > 0).all())
+
+    def test_import_csv_and_ndjson_commands(self):
+        csv_content = "timestamp,open,high,low,close,volume\n" + "".join(
+            ",".join(map(str, row)) + "\n" for row in self.rows[:60]
+        )
+        self.import_file("prices.csv", csv_content)
+        ndjson_content = "".join(
+            json.dumps(dict(zip(['timestamp', 'open', 'high', 'low', 'close', 'volume'], row))) + "\n"
+            for row in self.rows[60:120]
+        )
+        self.import_file("prices.ndjson", ndjson_content)
+        self.assertEqual(MarketPriceChunk.objects.get(market=self.market).bar_count, 120)
+
+    def test_get_prices_downsampled_hourly(self):
+        ingest_bars(self.market.market_id, self.rows)
+        response = self.client.get(self.prices_url, {
+            'start': self.start.isoformat(),
+            'end': (self.start + timedelta(hours=3)).isoformat(),
+            'interval': '1h',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bars = response.data['bars']
+        self.assertEqual(len(bars), 3)
+        self.assertEqual(bars[1]['timestamp'], int(self.start.timestamp()) + 3600)
+        self.assertEqual(bars[1]['open'], 160)
+        self.assertEqual(bars[1]['close'], 219)
+        self.assertEqual(bars[1]['high'], 220)
+        self.assertEqual(bars[1]['low'], 159)
+        self.assertEqual(bars[1]['volume'], 60)
+
+    def test_get_prices_daily_uses_chunk_summaries(self):
+        ingest_bars(self.market.market_id, self.rows)
+        response = self.client.get(self.prices_url, {
+            'start': self.start.isoformat(),
+            'end': (self.start + timedelta(days=2)).isoformat(),
+            'interval': '1d',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([bar['close'] for bar in response.data['bars']], [100 + 1439, 100 + 2879])
+
+    def test_get_prices_invalid_interval(self):
+        response = self.client.get(self.prices_url, {'interval': '2m'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_prices_range_too_large(self):
+        response = self.client.get(self.prices_url, {'start': '2020-01-01', 'end': '2024-01-01', 'interval': '1m'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_prices_nonexistent_market(self):
+        response = self.client.get(reverse('market-prices', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,203 @@
+"""
+Compact OHLCV time-series storage for markets.
+
+Bars are grouped into one `MarketPriceChunk` per market and UTC day. A
+chunk's bars are a NumPy structured array (`BAR_DTYPE`, 44 bytes per bar)
+compressed with zlib, so a year of one-minute bars for one market is a
+few hundred rows rather than hundreds of thousands. Range queries decode
+only the chunks they touch and downsample with vectorized reductions;
+daily queries are answered from the chunk summary columns alone.
+"""
+import zlib
+from datetime import datetime, time, timezone as dt_timezone
+
+import numpy as np
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import MarketPriceChunk
+
+# `t` is the bar's offset in seconds from the start of its UTC day.
+BAR_DTYPE = np.dtype([
+    ('t', '<u4'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+BAR_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+SECONDS_PER_DAY = 86400
+
+INTERVALS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': SECONDS_PER_DAY,
+}
+MAX_BARS_PER_QUERY = 5000
+INGEST_BATCH_DAYS = 1000
+
+
+def encode_bars(bars):
+    return zlib.compress(np.ascontiguousarray(bars, dtype=BAR_DTYPE).tobytes(), 6)
+
+
+def decode_bars(blob):
+    return np.frombuffer(zlib.decompress(bytes(blob)), dtype=BAR_DTYPE)
+
+
+def merge_bars(existing, new):
+    """
+    Merge two bar arrays of the same day, sorted by time. Where both contain a
+    bar for the same second the one from `new` wins.
+    """
+    combined = np.concatenate([new, existing]) if len(existing) else new
+    # np.unique keeps the first occurrence, i.e. the bar from `new`.
+    _, first = np.unique(combined['t'], return_index=True)
+    return combined[first]
+
+
+def summarize(bars):
+    return {
+        'bar_count': len(bars),
+        'open': float(bars['open'][0]),
+        'high': float(bars['high'].max()),
+        'low': float(bars['low'].min()),
+        'close': float(bars['close'][-1]),
+        'volume': float(bars['volume'].sum()),
+    }
+
+
+def to_utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc)
+
+
+def parse_timestamp(value):
+    """Accept epoch seconds, epoch milliseconds or an ISO 8601 string."""
+    if isinstance(value, (int, float)) or str(value).replace('.', '', 1).isdigit():
+        seconds = float(value)
+        if seconds > 1e11:
+            seconds /= 1000
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+    # Not datetime.fromisoformat: before Python 3.11 it rejects a trailing "Z".
+    text = str(value).strip()
+    moment = parse_datetime(text)
+    if moment is None:
+        day = parse_date(text)
+        if day is None:
+            raise ValueError(f"Invalid timestamp: {text!r}")
+        moment = datetime.combine(day, time.min)
+    return to_utc(moment)
+
+
+def day_start(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def ingest_bars(market_id, rows, batch_days=INGEST_BATCH_DAYS):
+    """
+    Store an iterable of (timestamp, open, high, low, close, volume) rows for
+    one market. Rows are grouped by day and written with `bulk_create` in
+    batches of `batch_days` chunks, merging with any chunks already stored.
+    Returns the number of rows read.
+    """
+    pending = {}
+    count = 0
+    for timestamp, *values in rows:
+        moment = parse_timestamp(timestamp)
+        day = moment.date()
+        offset = int((moment - day_start(day)).total_seconds())
+        pending.setdefault(day, []).append((offset, *map(float, values)))
+        count += 1
+        if len(pending) >= batch_days:
+            _write_days(market_id, pending)
+            pending = {}
+    if pending:
+        _write_days(market_id, pending)
+    return count
+
+
+def _write_days(market_id, pending):
+    existing = {
+        chunk.date: decode_bars(chunk.bars)
+        for chunk in MarketPriceChunk.objects.filter(market_id=market_id, date__in=list(pending))
+    }
+    chunks = []
+    for day, rows in pending.items():
+        # Later rows for the same second replace earlier ones.
+        bars = merge_bars(np.empty(0, dtype=BAR_DTYPE), np.array(rows[::-1], dtype=BAR_DTYPE))
+        if day in existing:
+            bars = merge_bars(existing[day], bars)
+        chunks.append(MarketPriceChunk(market_id=market_id, date=day, bars=encode_bars(bars), **summarize(bars)))
+    MarketPriceChunk.objects.bulk_create(
+        chunks,
+        update_conflicts=True,
+        unique_fields=['market', 'date'],
+        update_fields=['bar_count', 'open', 'high', 'low', 'close', 'volume', 'bars'],
+    )
+
+
+def query_bars(market_id, start, end, interval):
+    """
+    Return bars of `interval` (a key of INTERVALS) with start time in
+    [start, end), as a dict of NumPy arrays keyed like BAR_DTYPE with `t`
+    replaced by `timestamp` (epoch seconds). Daily bars come straight from
+    the chunk summaries, at whole-day granularity.
+    """
+    start, end = to_utc(start), to_utc(end)
+    step = INTERVALS[interval]
+    chunks = MarketPriceChunk.objects.filter(market_id=market_id, date__gte=start.date(), date__lte=end.date()).order_by('date')
+
+    if step == SECONDS_PER_DAY:
+        rows = [row for row in chunks.values_list('date', 'open', 'high', 'low', 'close', 'volume') if day_start(row[0]) < end]
+        columns = list(zip(*rows)) or [[]] * 6
+        return {
+            'timestamp': np.array([day_start(day).timestamp() for day in columns[0]], dtype=np.int64),
+            'open': np.array(columns[1], dtype=np.float64),
+            'high': np.array(columns[2], dtype=np.float64),
+            'low': np.array(columns[3], dtype=np.float64),
+            'close': np.array(columns[4], dtype=np.float64),
+            'volume': np.array(columns[5], dtype=np.float64),
+        }
+
+    parts = []
+    for day, blob in chunks.values_list('date', 'bars'):
+        bars = decode_bars(blob)
+        parts.append((int(day_start(day).timestamp()) + bars['t'].astype(np.int64), bars))
+    if not parts:
+        return empty_series()
+
+    timestamps = np.concatenate([ts for ts, _ in parts])
+    bars = np.concatenate([b for _, b in parts])
+    keep = (timestamps >= start.timestamp()) & (timestamps < end.timestamp())
+    timestamps, bars = timestamps[keep], bars[keep]
+    return downsample(timestamps, bars, step)
+
+
+def empty_series():
+    return {name: np.empty(0) for name in BAR_COLUMNS}
+
+
+def downsample(timestamps, bars, step):
+    """Aggregate time-sorted bars into buckets of `step` seconds."""
+    buckets = timestamps // step
+    if len(buckets) == 0:
+        return empty_series()
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return {
+        'timestamp': buckets[starts] * step,
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+
+
+def expected_bar_count(start, end, interval):
+    return int((to_utc(end) - to_utc(start)).total_seconds() // INTERVALS[interval]) + 1
@@ -0,0 +1,192 @@
+"""
+Per-process request metrics, aggregated across gunicorn workers through
+files.
+
+Each process keeps its counters and histograms in memory. At most once per
+`METRICS_FLUSH_INTERVAL` seconds, and when it exits, it writes them to
+`<METRICS_DIR>/<pid>.json`. The /metrics view sums its own live values
+with every other process's file. Files of exited workers are kept, so
+counters never go backwards. A new worker that reuses a pid starts from
+that pid's file.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTERS = {
+    'http_requests_total': "Requests by URL name, method and status.",
+    'http_request_db_duration_seconds_total': "Time spent in database queries.",
+    'http_request_db_queries_total': "Database queries executed.",
+    'http_response_size_bytes_total': "Response body bytes sent.",
+}
+HISTOGRAMS = {
+    'http_request_duration_seconds': "Wall time from the first middleware to the response.",
+}
+
+
+def _labels(mapping):
+    return tuple(sorted(mapping.items()))
+
+
+class Collector:
+    def __init__(self, directory, flush_interval=1.0, buckets=LATENCY_BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._pid = None
+        self._last_flush = 0.0
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'{os.getpid()}.json')
+
+    def _ensure_process(self):
+        # Runs under the lock. A forked worker must not report the values it
+        # inherited from its parent.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self.counters, self.histograms = self._read(self.path)
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self._ensure_process()
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, labels, seconds, db_seconds, queries, size):
+        """Record one request."""
+        request_labels = _labels(labels)
+        view_labels = _labels({k: v for k, v in labels.items() if k != 'status'})
+        with self._lock:
+            self._ensure_process()
+            counters = self.counters
+            for name, series_labels, amount in (
+                ('http_requests_total', request_labels, 1),
+                ('http_request_db_duration_seconds_total', view_labels, db_seconds),
+                ('http_request_db_queries_total', view_labels, queries),
+                ('http_response_size_bytes_total', view_labels, size),
+            ):
+                series = counters.setdefault(name, {})
+                series[series_labels] = series.get(series_labels, 0) + amount
+            histogram = self.histograms.setdefault('http_request_duration_seconds', {})
+            entry = histogram.get(view_labels)
+            if entry is None:
+                entry = histogram[view_labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect_left(self.buckets, seconds)] += 1
+            entry[1] += seconds
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            # Nothing to write for a process that never recorded anything.
+            if self._pid == os.getpid():
+                self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        payload = {
+            'counters': {name: [[dict(labels), value] for labels, value in series.items()]
+                         for name, series in self.counters.items()},
+            'histograms': {name: [[dict(labels), counts, total] for labels, (counts, total) in series.items()]
+                           for name, series in self.histograms.items()},
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.path)
+
+    def _read(self, path):
+        counters, histograms = {}, {}
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return counters, histograms
+        for name, series in payload.get('counters', {}).items():
+            counters[name] = {_labels(labels): value for labels, value in series}
+        for name, series in payload.get('histograms', {}).items():
+            if all(len(counts) == len(self.buckets) + 1 for _, counts, _ in series):
+                histograms[name] = {_labels(labels): [counts, total] for labels, counts, total in series}
+        return counters, histograms
+
+    def collect(self):
+        """Sum this process's live values with every other process's file."""
+        with self._lock:
+            self._ensure_process()
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {name: {labels: [list(counts), total] for labels, (counts, total) in series.items()}
+                          for name, series in self.histograms.items()}
+        own = f'{os.getpid()}.json'
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json') and name != own]
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            other_counters, other_histograms = self._read(os.path.join(self.directory, name))
+            for metric, series in other_counters.items():
+                merged = counters.setdefault(metric, {})
+                for labels, value in series.items():
+                    merged[labels] = merged.get(labels, 0) + value
+            for metric, series in other_histograms.items():
+                merged = histograms.setdefault(metric, {})
+                for labels, (counts, total) in series.items():
+                    entry = merged.setdefault(labels, [[0] * len(counts), 0.0])
+                    entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                    entry[1] += total
+        return counters, histograms
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, help_text in COUNTERS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in sorted(counters.get(name, {}).items()):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for name, help_text in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, (counts, total) in sorted(histograms.get(name, {}).items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, '+Inf'), counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+collector = Collector(
+    getattr(settings, 'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'investika-metrics')),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0),
+)
+atexit.register(collector.flush)
@@ -0,0 +1,115 @@
+import multiprocessing
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from rest_framework.test import APITestCase
+
+from market.models import Market
+from metrics.collector import Collector
+from metrics.middleware import MetricsMiddleware
+
+
+class CollectorTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.collector = Collector(self.directory, flush_interval=3600)
+        self.labels = {'view': 'market-list', 'method': 'GET', 'status': '200'}
+
+    def test_latency_buckets_are_cumulative(self):
+        for seconds in (0.001, 0.03, 0.03, 20):
+            self.collector.observe(self.labels, seconds, 0.0, 1, 10)
+        text = self.collector.render()
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",view="market-list",le="0.005"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",view="market-list",le="0.05"} 3', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",view="market-list",le="10.0"} 3', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",view="market-list",le="+Inf"} 4', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",view="market-list"} 4', text)
+        self.assertIn('http_request_db_queries_total{method="GET",view="market-list"} 4', text)
+        self.assertIn('http_requests_total{method="GET",status="200",view="market-list"} 4', text)
+
+    def test_workers_are_summed(self):
+        def worker():
+            self.collector.observe(self.labels, 0.01, 0.002, 3, 100)
+            self.collector.flush()
+
+        self.collector.observe(self.labels, 0.01, 0.002, 3, 100)
+        process = multiprocessing.get_context('fork').Process(target=worker)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        text = self.collector.render()
+        self.assertIn('http_requests_total{method="GET",status="200",view="market-list"} 2', text)
+        self.assertIn('http_response_size_bytes_total{method="GET",view="market-list"} 200', text)
+
+    def test_reused_pid_continues_from_its_file(self):
+        self.collector.observe(self.labels, 0.01, 0.0, 1, 10)
+        self.collector.flush()
+        restarted = Collector(self.directory)
+        restarted.observe(self.labels, 0.01, 0.0, 1, 10)
+        self.assertIn('http_requests_total{method="GET",status="200",view="market-list"} 2', restarted.render())
+
+    def test_label_values_are_escaped(self):
+        self.collector.observe({'view': 'a"b\\c', 'method': 'GET', 'status': '200'}, 0.01, 0.0, 0, 0)
+        self.assertIn('view="a\\"b\\\\c"', self.collector.render())
+
+
+class MiddlewareTests(APITestCase):
+    def setUp(self):
+        self.collector = Collector(tempfile.mkdtemp(), flush_interval=3600)
+        for target in ('metrics.middleware.collector', 'metrics.views.collector'):
+            patcher = mock.patch(target, self.collector)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_requests_are_recorded_by_url_name(self):
+        Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        self.client.get(reverse('market-list'))
+        self.client.get('/api/no-such-page/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('http_requests_total{method="GET",status="200",view="market-list"} 1', text)
+        self.assertIn('http_requests_total{method="GET",status="404",view="<unresolved>"} 1', text)
+        counters, _ = self.collector.collect()
+        queries = counters['http_request_db_queries_total']
+        self.assertGreater(queries[(('method', 'GET'), ('view', 'market-list'))], 0)
+
+    def test_streamed_response_size_is_counted(self):
+        response = self.client.get(reverse('quizresult-export'))
+        size = len(b''.join(response.streaming_content))
+        counters, _ = self.collector.collect()
+        sizes = counters['http_response_size_bytes_total']
+        self.assertEqual(sizes[(('method', 'GET'), ('view', 'quizresult-export'))], size)
+
+    def test_runs_natively_under_async_handlers(self):
+        request = RequestFactory().get(reverse('market-list'))
+        request.resolver_match = resolve(request.path)
+
+        async def plain(request):
+            return HttpResponse(b'12345')
+
+        async def chunks():
+            for chunk in (b'abc', b'de'):
+                yield chunk
+
+        middleware = MetricsMiddleware(plain)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(async_to_sync(middleware)(request).content, b'12345')
+
+        async def streamed(request):
+            return StreamingHttpResponse(chunks())
+
+        response = async_to_sync(MetricsMiddleware(streamed))(request)
+
+        async def consume():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(async_to_sync(consume)(), b'abcde')
+        counters, _ = self.collector.collect()
+        self.assertEqual(counters['http_requests_total'][(('method', 'GET'), ('status', '200'), ('view', 'market-list'))], 2)
+        self.assertEqual(counters['http_response_size_bytes_total'][(('method', 'GET'), ('view', 'market-list'))], 10)
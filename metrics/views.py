@@ -0,0 +1,10 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .collector import collector
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint, summed over every worker of this host."""
+    return HttpResponse(collector.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "quiz_results",
+            "0009_remove_quizresult_completed_on_alter_quizresult_id_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quizresult",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["id"],
+                name="quizresult_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quizresult",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "id"],
+                name="quizresult_active_user_idx",
+            ),
+        ),
+    ]
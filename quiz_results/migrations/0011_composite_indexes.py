@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_results", "0010_active_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quizresult",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["score", "id"],
+                name="quizresult_active_score_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quizresult",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["money_earned", "id"],
+                name="quizresult_active_money_idx",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ from quizzes.models import Quiz
 from users.models import User
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from versioning.soft_delete import ACTIVE, SignalledActiveManager, SignalledSoftDeleteManager
 
 
 """
@@ -20,6 +21,16 @@ class QuizResult(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
     money_earned = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)  # Example field
+    objects = SignalledActiveManager()
+    all_objects = SignalledSoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=ACTIVE, name='quizresult_active_idx'),
+            models.Index(fields=['user', 'id'], condition=ACTIVE, name='quizresult_active_user_idx'),
+            models.Index(fields=['score', 'id'], condition=ACTIVE, name='quizresult_active_score_idx'),
+            models.Index(fields=['money_earned', 'id'], condition=ACTIVE, name='quizresult_active_money_idx'),
+        ]
 
     def soft_delete(self):
         """Mark this quiz result as inactive (soft delete)."""
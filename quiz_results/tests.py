@@ -64,7 +64,7 @@ class QuizResultTests(APITestCase):
     def test_get_quiz_result_list(self):
         response = self.client.get(self.quiz_result_list_create_url)
         self.assertEqual(response.status_code, 200)
-        self.assertGreater(len(response.data), 0)
+        self.assertGreater(len(response.data['results']), 0)
 
     def test_soft_delete_quiz_result(self):
         self.quiz_result.is_active = False
@@ -1,4 +1,5 @@
 from django.db import models
+from versioning.soft_delete import ACTIVE, ActiveManager, SoftDeleteManager
 
 """
 Define the Quiz model, representing a quiz entity in the database
@@ -14,6 +15,13 @@ class Quiz(models.Model):
     id = models.AutoField(primary_key=True)
     quiz_text = models.TextField()
     is_active = models.BooleanField(default=True)
+    objects = ActiveManager()
+    all_objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=ACTIVE, name='quiz_active_idx'),
+        ]
 
     
     def soft_delete(self):
@@ -32,7 +32,7 @@ class QuizTests(APITestCase):
     def test_get_all_quizzes(self):
         response = self.client.get(self.quiz_list_create_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_get_quiz_detail(self):
         response = self.client.get(self.quiz_detail_url)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        # Put back the search triggers of tables a migration rebuilt.
+        from .signals import repair_search_indexes
+        post_migrate.connect(repair_search_indexes, sender=self)
@@ -0,0 +1,17 @@
+from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+
+from .indexes import contains
+
+
+class ContainsFilter(filters.CharFilter):
+    """Case-insensitive substring filter (`icontains`) served by the search index."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('lookup_expr', 'icontains')
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return contains(qs, self.field_name, value)
@@ -0,0 +1,174 @@
+"""
+Substring search indexes for the API's `icontains` filters.
+
+A b-tree cannot serve `UPPER(x) LIKE '%...%'`, so every substring filter
+read its table in full. Each field in SEARCH_FIELDS gets a trigram index
+instead:
+
+- PostgreSQL: a pg_trgm GIN index on `UPPER(column)`, the expression
+  Django's `icontains` compares, so the planner uses it for the lookup
+  as it stands.
+- SQLite: an external-content FTS5 table with the trigram tokenizer, kept
+  in step with the table by triggers. `contains` narrows the lookup to
+  the rows holding the term's trigrams and rechecks them with
+  `icontains`, so it returns exactly the rows of the plain lookup.
+
+Terms shorter than a trigram, and databases without either index, fall
+back to the plain lookup. Triggers fire on every write, `update()`,
+`bulk_create()` and raw SQL included, so there is nothing to rebuild
+after bulk changes. SQLite drops a table's triggers when a migration
+rebuilds the table; `repair` runs after every migrate and puts them back.
+"""
+import functools
+import sqlite3
+from typing import NamedTuple
+
+from django.apps import apps as global_apps
+from django.db import connections
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import RawSQL
+
+TRIGRAM = 3
+
+
+class SearchField(NamedTuple):
+    model: str  # app_label.ModelName
+    field: str
+
+
+SEARCH_FIELDS = [
+    SearchField('users.User', 'username'),
+    SearchField('market.Market', 'market_name'),
+]
+
+
+def index_name(model, column):
+    return f'search_{model._meta.db_table}_{column}'
+
+
+def indexed(model, field):
+    return SearchField(model._meta.label, field.name) in SEARCH_FIELDS
+
+
+@functools.lru_cache(maxsize=None)
+def sqlite_has_trigram():
+    """Whether SQLite was built with FTS5 and its trigram tokenizer (3.34+)."""
+    if sqlite3.sqlite_version_info < (3, 34):
+        return False
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute("CREATE VIRTUAL TABLE probe USING fts5(text, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def uses_fts(connection):
+    return connection.vendor == 'sqlite' and sqlite_has_trigram()
+
+
+def resolved_fields(apps):
+    for search_field in SEARCH_FIELDS:
+        model = apps.get_model(search_field.model)
+        yield model, model._meta.get_field(search_field.field).column
+
+
+def sqlite_triggers(model, column):
+    """{trigger name: CREATE TRIGGER statement} keeping the FTS table of `column` in step."""
+    name = index_name(model, column)
+    table, pk = model._meta.db_table, model._meta.pk.column
+    delete = f'INSERT INTO "{name}"("{name}", rowid, "{column}") VALUES (\'delete\', old."{pk}", old."{column}");'
+    insert = f'INSERT INTO "{name}"(rowid, "{column}") VALUES (new."{pk}", new."{column}");'
+    return {
+        f'{name}_insert': f'CREATE TRIGGER IF NOT EXISTS "{name}_insert" AFTER INSERT ON "{table}" BEGIN {insert} END',
+        f'{name}_delete': f'CREATE TRIGGER IF NOT EXISTS "{name}_delete" AFTER DELETE ON "{table}" BEGIN {delete} END',
+        f'{name}_update': (
+            f'CREATE TRIGGER IF NOT EXISTS "{name}_update" AFTER UPDATE OF "{column}", "{pk}" ON "{table}" '
+            f'BEGIN {delete} {insert} END'
+        ),
+    }
+
+
+def install(connection, apps=global_apps):
+    """Create the search index of every field in SEARCH_FIELDS and fill it from the table."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for model, column in resolved_fields(apps):
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{index_name(model, column)}_trgm" ON "{model._meta.db_table}" '
+                    f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+                )
+        elif uses_fts(connection):
+            for model, column in resolved_fields(apps):
+                name = index_name(model, column)
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS "{name}" USING fts5("{column}", '
+                    f"content='{model._meta.db_table}', content_rowid='{model._meta.pk.column}', tokenize='trigram')"
+                )
+                for statement in sqlite_triggers(model, column).values():
+                    cursor.execute(statement)
+                cursor.execute(f'INSERT INTO "{name}"("{name}") VALUES (\'rebuild\')')
+
+
+def uninstall(connection, apps=global_apps):
+    with connection.cursor() as cursor:
+        for model, column in resolved_fields(apps):
+            name = index_name(model, column)
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS "{name}_trgm"')
+            elif connection.vendor == 'sqlite':
+                for trigger in sqlite_triggers(model, column):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS "{trigger}"')
+                cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+
+def repair(connection, apps=global_apps):
+    """
+    Recreate the triggers of installed SQLite search indexes that lost
+    any, and rebuild those indexes; returns their names.
+    """
+    if not uses_fts(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = set(cursor.fetchall())
+        repaired = []
+        for model, column in resolved_fields(apps):
+            name = index_name(model, column)
+            triggers = sqlite_triggers(model, column)
+            if ('table', name) not in existing or all(('trigger', trigger) in existing for trigger in triggers):
+                continue
+            for statement in triggers.values():
+                cursor.execute(statement)
+            cursor.execute(f'INSERT INTO "{name}"("{name}") VALUES (\'rebuild\')')
+            repaired.append(name)
+    return repaired
+
+
+def phrase(term):
+    """An FTS5 query matching `term` as a substring: one quoted phrase."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def contains(queryset, path, term):
+    """
+    `queryset.filter(<path>__icontains=term)`, served by the search index
+    of the field `path` ends at when there is one.
+    """
+    lookup = {f'{path}__icontains': term}
+    *relations, name = path.split(LOOKUP_SEP)
+    model = queryset.model
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    if len(term) < TRIGRAM or not indexed(model, field) or not uses_fts(connections[queryset.db]):
+        return queryset.filter(**lookup)
+    table = index_name(model, field.column)
+    matches = model._base_manager.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [phrase(term)]),
+        **{f'{name}__icontains': term},
+    ).values('pk')
+    return queryset.filter(**{LOOKUP_SEP.join([*relations, 'in']) if relations else 'pk__in': matches})
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from search.indexes import install
+
+
+class Command(BaseCommand):
+    help = (
+        "Create any missing substring search index and, on SQLite, refill the "
+        "FTS tables from their tables. Triggers keep the indexes current; run "
+        "this after restoring a database dump or loading rows without them."
+    )
+
+    def handle(self, *args, **options):
+        install(connection)
+        self.stdout.write(self.style.SUCCESS("Rebuilt the search indexes"))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from search.indexes import install, uninstall
+
+
+def install_search_indexes(apps, schema_editor):
+    install(schema_editor.connection, apps)
+
+
+def uninstall_search_indexes(apps, schema_editor):
+    uninstall(schema_editor.connection, apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_composite_indexes'),
+        ('market', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_indexes, uninstall_search_indexes),
+    ]
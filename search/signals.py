@@ -0,0 +1,12 @@
+import logging
+
+from django.db import connections
+
+from .indexes import repair
+
+logger = logging.getLogger(__name__)
+
+
+def repair_search_indexes(sender, using, apps, **kwargs):
+    for name in repair(connections[using], apps):
+        logger.info(f"Recreated the triggers of search index {name} and rebuilt it")
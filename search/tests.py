@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from search.indexes import contains, index_name, repair, sqlite_triggers, uses_fts
+from users.models import User
+
+USERNAMES = ['Alice', 'malice', 'bob', 'Roberta', 'o"brien', 'ÉLODIE', 'al%ce']
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.users = {name: User.objects.create_user(username=name, password='!') for name in USERNAMES}
+
+    def search(self, term, queryset=None):
+        queryset = User.objects.all() if queryset is None else queryset
+        return sorted(contains(queryset, 'username', term).values_list('username', flat=True))
+
+    def test_matches_the_icontains_lookup(self):
+        for term in ['ali', 'ALICE', 'bert', 'o"b', 'al%c', 'al_ce', 'b', 'xyz', 'élodie']:
+            with self.subTest(term=term):
+                expected = sorted(User.objects.filter(username__icontains=term).values_list('username', flat=True))
+                self.assertEqual(self.search(term), expected)
+
+    def test_terms_of_a_trigram_or_more_use_the_index(self):
+        if not uses_fts(connection):
+            self.skipTest("SQLite without the FTS5 trigram tokenizer")
+        table = index_name(User, 'username')
+        self.assertIn(table, str(contains(User.objects.all(), 'username', 'ali').query))
+        self.assertNotIn(table, str(contains(User.objects.all(), 'username', 'al').query))
+
+    def test_index_follows_every_write(self):
+        User.objects.filter(username='bob').update(username='bobby-tables')
+        self.users['Alice'].username = 'alicia'
+        self.users['Alice'].save()
+        self.users['Roberta'].delete()
+        User.objects.bulk_create([User(username='tablesaw', password='!')])
+        self.assertEqual(self.search('tables'), ['bobby-tables', 'tablesaw'])
+        self.assertEqual(self.search('alic'), ['alicia', 'malice'])
+        self.assertEqual(self.search('bert'), [])
+
+    def test_keeps_the_queryset_filters(self):
+        User.objects.filter(username='malice').soft_delete()
+        self.assertEqual(self.search('alice'), ['Alice'])
+        self.assertEqual(self.search('alice', User.all_objects.all()), ['Alice', 'malice'])
+
+    def test_follows_relations(self):
+        quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        for name in ('Alice', 'bob'):
+            QuizResult.objects.create(user=self.users[name], quiz=quiz, score=80, money_earned='1.00')
+        results = contains(QuizResult.objects.all(), 'user__username', 'LIC')
+        self.assertEqual([result.user_id for result in results], [self.users['Alice'].pk])
+
+    def test_unindexed_fields_fall_back_to_icontains(self):
+        Market.objects.create(market_name='Bonds', risk_level='Low', description='Government debt')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(contains(Market.objects.all(), 'description', 'DEBT').count(), 1)
+        self.assertNotIn('search_', queries[0]['sql'])
+
+    def test_repair_recreates_dropped_triggers(self):
+        if not uses_fts(connection):
+            self.skipTest("SQLite without the FTS5 trigram tokenizer")
+        self.assertEqual(repair(connection), [])
+        # What a migration that rebuilds the table leaves behind.
+        with connection.cursor() as cursor:
+            for trigger in sqlite_triggers(User, 'username'):
+                cursor.execute(f'DROP TRIGGER "{trigger}"')
+        User.objects.create_user(username='carol', password='!')
+        self.assertEqual(repair(connection), [index_name(User, 'username')])
+        self.assertEqual(self.search('arol'), ['carol'])
+        User.objects.create_user(username='caroline', password='!')
+        self.assertEqual(self.search('arol'), ['carol', 'caroline'])
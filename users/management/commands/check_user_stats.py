@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.stats import CHECK_CHUNK_SIZE, check
+
+MAX_REPORTED = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's dashboard stats from quiz results, achievements "
+        "and investment simulations, a chunk of users at a time, and report the "
+        "stats rows that drifted. Use --repair to rewrite them; run it after bulk "
+        "changes that bypass model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHECK_CHUNK_SIZE, help="Users recomputed per transaction.")
+        parser.add_argument('--repair', action='store_true', help="Rewrite the rows that drifted.")
+
+    def handle(self, *args, **options):
+        progress = None
+        if options['verbosity'] > 1:
+            progress = lambda checked: self.stdout.write(f"Checked {checked} users")
+        drifts = check(chunk_size=options['chunk_size'], repair=options['repair'], progress=progress)
+        users = sorted({drift.user_id for drift in drifts})
+        for drift in drifts[:MAX_REPORTED]:
+            self.stdout.write(f"User {drift.user_id} {drift.field}: stored {drift.stored}, actual {drift.actual}")
+        if len(drifts) > MAX_REPORTED:
+            self.stdout.write(f"... and {len(drifts) - MAX_REPORTED} more")
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("Every user's stats match their rows"))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f"Repaired the stats of {len(users)} users"))
+        else:
+            raise CommandError(f"The stats of {len(users)} users drifted; rerun with --repair to fix them")
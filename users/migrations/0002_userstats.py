@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 00:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("quizzes_taken", models.IntegerField(default=0)),
+                ("score_total", models.BigIntegerField(default=0)),
+                (
+                    "money_earned",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("achievements", models.IntegerField(default=0)),
+                ("active_simulations", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+
+BATCH_SIZE = 5000
+
+
+def backfill_user_stats(apps, schema_editor):
+    """Materialize every user's stats row from their active results, achievements and simulations."""
+    UserStats = apps.get_model('users', 'UserStats')
+    QuizResult = apps.get_model('quiz_results', 'QuizResult')
+    Achievement = apps.get_model('achievements', 'Achievement')
+    InvestmentSimulation = apps.get_model('investment_simulation', 'InvestmentSimulation')
+
+    stats = {}
+    results = (
+        QuizResult.objects.filter(is_active=True).values('user_id')
+        .annotate(quizzes_taken=Count('id'), score_total=Sum('score'), money_earned=Sum('money_earned'))
+        .order_by()
+    )
+    for row in results.iterator():
+        stats.setdefault(row.pop('user_id'), {}).update(row)
+    for model, field in ((Achievement, 'achievements'), (InvestmentSimulation, 'active_simulations')):
+        counts = model.objects.filter(is_active=True).values_list('user_id').annotate(count=Count('pk')).order_by()
+        for user_id, count in counts.iterator():
+            if user_id is not None:
+                stats.setdefault(user_id, {})[field] = count
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id, **row) for user_id, row in stats.items()],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def clear_user_stats(apps, schema_editor):
+    apps.get_model('users', 'UserStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userstats'),
+        ('quiz_results', '0009_remove_quizresult_completed_on_alter_quizresult_id_and_more'),
+        ('achievements', '0005_achievement_rules'),
+        ('investment_simulation', '0007_simulationjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_stats, clear_user_stats),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from versioning.soft_delete import ACTIVE, ActiveManagerMixin, SoftDeleteManager, SoftDeleteQuerySet
 
 # Choices for gender and avatar
 GENDER_CHOICES = [
@@ -14,7 +15,7 @@ AVATAR_CHOICES = [
     ('AuroraBreath', 'AuroraBreath'),
 ]
 
-class UserManager(BaseUserManager):
+class UserManager(ActiveManagerMixin, BaseUserManager.from_queryset(SoftDeleteQuerySet)):
     def create_user(self, username, password=None, **extra_fields):
         if not username:
             raise ValueError('The Username field must be set')
@@ -42,9 +43,40 @@ class User(AbstractBaseUser):
     is_superuser = models.BooleanField(default=False)
 
     objects = UserManager()
+    all_objects = SoftDeleteManager()
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id'], condition=ACTIVE, name='user_active_idx'),
+            models.Index(fields=['created_at', 'user_id'], condition=ACTIVE, name='user_active_created_idx'),
+        ]
+
     def __str__(self):
         return self.username
+
+
+class UserStats(models.Model):
+    """
+    Dashboard counters of a user over their active rows: quiz results (with
+    the score total behind the average and the money earned), achievements
+    and investment simulations. Only ever moved with `F()` updates by
+    users/stats.py as those rows are saved, so the dashboard reads one row
+    instead of aggregating four tables.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    quizzes_taken = models.IntegerField(default=0)
+    score_total = models.BigIntegerField(default=0)
+    money_earned = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    achievements = models.IntegerField(default=0)
+    active_simulations = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def average_score(self):
+        return round(self.score_total / self.quizzes_taken, 2) if self.quizzes_taken else None
+
+    def __str__(self):
+        return f"Stats of User {self.user_id}"
@@ -0,0 +1,30 @@
+"""
+Signal receivers that keep `UserStats` in step with quiz results,
+achievements and investment simulations, with the same before/after
+pattern as the wallet ledger (see users/stats.py).
+"""
+from django.db.models.signals import post_save, pre_save
+
+from .stats import STAT_CONTRIBUTIONS, post_changes
+
+
+def remember_stats_contribution(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if not instance._state.adding and instance.pk is not None:
+        previous = sender._base_manager.filter(pk=instance.pk).first()
+    instance._stats_before = STAT_CONTRIBUTIONS[sender](previous)
+
+
+def post_stats_contribution(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    after = STAT_CONTRIBUTIONS[sender](instance)
+    post_changes(getattr(instance, '_stats_before', (None, {})), after)
+    instance._stats_before = after
+
+
+for model in STAT_CONTRIBUTIONS:
+    pre_save.connect(remember_stats_contribution, sender=model, dispatch_uid=f'stats_pre_save_{model.__name__}')
+    post_save.connect(post_stats_contribution, sender=model, dispatch_uid=f'stats_post_save_{model.__name__}')
@@ -0,0 +1,158 @@
+"""
+Per-user dashboard counters (`UserStats`).
+
+Each counted model declares what one of its rows contributes to its
+owner's stats; inactive rows contribute nothing. The receivers in
+users/signals.py post the difference between a row's contribution before
+and after each save, so creates, edits, reassignments and soft deletes
+(is_active=False) all go through `apply_deltas`, which moves the stats
+row with `F()` expressions. `QuerySet.update()`, `bulk_create()` and hard
+deletes bypass signals; run `check_user_stats --repair` after them.
+
+`check` recomputes the stats of every user from the source tables, a chunk
+of users at a time, and reports (or repairs) the rows that drifted.
+Writes that race a repair can make it miss by one; rerun the check to
+confirm.
+"""
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from quiz_results.models import QuizResult
+from virtualmoney.wallet import to_amount
+
+from .models import User, UserStats
+
+CHECK_CHUNK_SIZE = 2000
+STAT_FIELDS = ('quizzes_taken', 'score_total', 'money_earned', 'achievements', 'active_simulations')
+
+
+def quiz_result_stats(result):
+    if result is None or not result.is_active:
+        return None, {}
+    return result.user_id, {
+        'quizzes_taken': 1,
+        'score_total': result.score,
+        'money_earned': to_amount(result.money_earned),
+    }
+
+
+def achievement_stats(achievement):
+    if achievement is None or not achievement.is_active:
+        return None, {}
+    return achievement.user_id_id, {'achievements': 1}
+
+
+def simulation_stats(simulation):
+    if simulation is None or not simulation.is_active:
+        return None, {}
+    return simulation.user_id, {'active_simulations': 1}
+
+
+STAT_CONTRIBUTIONS = {
+    QuizResult: quiz_result_stats,
+    Achievement: achievement_stats,
+    InvestmentSimulation: simulation_stats,
+}
+
+
+def apply_deltas(user_id, deltas):
+    """Move the stats row of `user_id` by `deltas` ({field: amount}), creating it if needed."""
+    updates = {field: F(field) + amount for field, amount in deltas.items() if amount}
+    if user_id is None or not updates:
+        return
+    with transaction.atomic():
+        rows = UserStats.objects.filter(user_id=user_id)
+        if not rows.update(**updates, updated_at=timezone.now()):
+            UserStats.objects.get_or_create(user_id=user_id)
+            rows.update(**updates, updated_at=timezone.now())
+
+
+def post_changes(before, after):
+    """Apply the difference between two (user_id, {field: amount}) snapshots."""
+    changes = {}
+    for sign, (user_id, amounts) in ((-1, before), (1, after)):
+        for field, amount in amounts.items():
+            user_changes = changes.setdefault(user_id, {})
+            user_changes[field] = user_changes.get(field, 0) + sign * amount
+    for user_id, deltas in changes.items():
+        apply_deltas(user_id, deltas)
+
+
+class Drift(NamedTuple):
+    user_id: int
+    field: str
+    stored: object
+    actual: object
+
+
+def empty_stats():
+    return {field: Decimal('0.00') if field == 'money_earned' else 0 for field in STAT_FIELDS}
+
+
+def actual_stats(user_ids):
+    """{user_id: stats} recomputed from the source tables for `user_ids`, in ascending order."""
+    first, last = user_ids[0], user_ids[-1]
+    stats = {user_id: empty_stats() for user_id in user_ids}
+    results = (
+        QuizResult.objects.filter(user_id__gte=first, user_id__lte=last)
+        .values('user_id')
+        .annotate(quizzes_taken=Count('id'), score_total=Sum('score'), money_earned=Sum('money_earned'))
+        .order_by()
+    )
+    for row in results:
+        stats[row['user_id']].update(
+            quizzes_taken=row['quizzes_taken'], score_total=row['score_total'],
+            money_earned=to_amount(row['money_earned']),
+        )
+    for model, field in ((Achievement, 'achievements'), (InvestmentSimulation, 'active_simulations')):
+        counts = (
+            model.objects.filter(user_id__gte=first, user_id__lte=last)
+            .values_list('user_id').annotate(count=Count('pk')).order_by()
+        )
+        for user_id, count in counts:
+            stats[user_id][field] = count
+    return stats
+
+
+def check(chunk_size=CHECK_CHUNK_SIZE, repair=False, progress=None):
+    """
+    Compare every user's stats row with stats recomputed from the source
+    tables, `chunk_size` users at a time, and return the `Drift`s found.
+    With `repair`, drifted rows are rewritten in the chunk's transaction.
+    `progress(users_checked)` is called after each chunk.
+    """
+    drifts = []
+    checked = 0
+    last = 0
+    while True:
+        user_ids = list(User.all_objects.filter(user_id__gt=last).order_by('user_id').values_list('user_id', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        first, last = user_ids[0], user_ids[-1]
+        with transaction.atomic():
+            actual = actual_stats(user_ids)
+            stored = {
+                row.pop('user_id'): row
+                for row in UserStats.objects.filter(user_id__gte=first, user_id__lte=last).values('user_id', *STAT_FIELDS)
+            }
+            drifted = []
+            for user_id, stats in actual.items():
+                row = stored.get(user_id, empty_stats())
+                fields = [field for field in STAT_FIELDS if row[field] != stats[field]]
+                drifts += [Drift(user_id, field, row[field], stats[field]) for field in fields]
+                if fields:
+                    drifted.append(UserStats(user_id=user_id, updated_at=timezone.now(), **stats))
+            if repair and drifted:
+                UserStats.objects.bulk_create(
+                    drifted, update_conflicts=True, unique_fields=['user'], update_fields=[*STAT_FIELDS, 'updated_at'],
+                )
+        checked += len(user_ids)
+        if progress:
+            progress(checked)
+    return drifts
@@ -1,7 +1,18 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
-from .models import User
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from . import stats
+from .models import User, UserStats
 
 class UserTests(APITestCase):
 
@@ -40,7 +51,7 @@ class UserTests(APITestCase):
     def test_get_all_users(self):
         response = self.client.get(self.user_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # Two users are created
+        self.assertEqual(len(response.data['results']), 2)  # Two users are created
 
     def test_get_user_detail(self):
         response = self.client.get(self.user_detail_url)
@@ -67,6 +78,14 @@ class UserTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(User.objects.count(), 3)  # Two existing users plus the new one
 
+    def test_register_username_of_deleted_user(self):
+        self.user.is_active = False
+        self.user.save()
+        data = {"username": "testuser", "password": "newpassword123", "email": "again@example.com"}
+        response = self.client.post(self.register_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', response.data)
+
     def test_register_new_user_invalid(self):
         data = {
             "username": "",  # Invalid empty username
@@ -110,3 +129,82 @@ class UserTests(APITestCase):
         nonexistent_user_url = reverse('user-detail', args=[9999])
         response = self.client.delete(nonexistent_user_url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UserStatsTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='statsuser', password='testpassword')
+        self.other = User.objects.create_user(username='otheruser', password='testpassword')
+        self.quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        self.stats_url = reverse('user-stats', args=[self.user.user_id])
+
+    def stats_of(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_counters_follow_saves_and_soft_deletes(self):
+        result = QuizResult.objects.create(user=self.user, quiz=self.quiz, score=80, money_earned=8)
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=60, money_earned=6)
+        Achievement.objects.create(
+            user_id=self.user, title="First Steps", description="Took a quiz", criteria="One quiz",
+            date_achieved=date.today(), reward_type="Badge",
+        )
+        simulation = InvestmentSimulation.objects.create(
+            user=self.user, market_id=self.market, amount_invested=10, profit_loss=1, outcome='Profit',
+        )
+        row = self.stats_of(self.user)
+        self.assertEqual((row.quizzes_taken, row.score_total, row.money_earned), (2, 140, Decimal('14.00')))
+        self.assertEqual((row.achievements, row.active_simulations), (1, 1))
+        self.assertEqual(row.average_score, 70.0)
+
+        result.score = 90
+        result.save()
+        simulation.soft_delete()
+        row = self.stats_of(self.user)
+        self.assertEqual((row.quizzes_taken, row.score_total, row.active_simulations), (2, 150, 0))
+
+        result.user = self.other
+        result.save()
+        self.assertEqual(self.stats_of(self.user).score_total, 60)
+        self.assertEqual(self.stats_of(self.other).score_total, 90)
+        self.assertEqual(stats.check(), [])
+
+    def test_check_finds_and_repairs_drift(self):
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=80, money_earned=8)
+        QuizResult.objects.filter(user=self.user).update(score=50)  # bypasses the signals
+        drifts = stats.check(chunk_size=1)
+        self.assertEqual(drifts, [stats.Drift(self.user.user_id, 'score_total', 80, 50)])
+        stats.check(chunk_size=1, repair=True)
+        self.assertEqual(self.stats_of(self.user).score_total, 50)
+        self.assertEqual(stats.check(), [])
+
+    def test_check_command(self):
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=80, money_earned=8)
+        QuizResult.objects.filter(user=self.user).update(is_active=False)
+        with self.assertRaises(CommandError):
+            call_command('check_user_stats', stdout=open('/dev/null', 'w'))
+        call_command('check_user_stats', '--repair', '--chunk-size', '1', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.stats_of(self.user).quizzes_taken, 0)
+        call_command('check_user_stats', stdout=open('/dev/null', 'w'))
+
+    def test_get_user_stats(self):
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=75, money_earned=7.5)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'statsuser')
+        self.assertEqual(response.data['quizzes_taken'], 1)
+        self.assertEqual(response.data['average_score'], 75.0)
+        self.assertEqual(response.data['money_earned'], '7.50')
+
+    def test_get_stats_of_user_without_activity(self):
+        response = self.client.get(reverse('user-stats', args=[self.other.user_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quizzes_taken'], 0)
+        self.assertIsNone(response.data['average_score'])
+        self.assertEqual(response.data['balance'], '0.00')
+
+    def test_get_stats_nonexistent_user(self):
+        response = self.client.get(reverse('user-stats', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
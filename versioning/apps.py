@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class VersioningConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'versioning'
+
+    def ready(self):
+        # Bump table versions whenever a versioned model is saved or deleted.
+        from . import signals  # noqa: F401
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class TableVersion(models.Model):
+    """
+    A counter per versioned table, bumped after every committed write to it.
+    Reading it is a primary-key lookup, so views can tell whether a table
+    changed without querying the table itself.
+    """
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
@@ -0,0 +1,20 @@
+"""
+Connect save and delete receivers to every model with a VersionedQuerySet
+manager. Soft deletes are saves, so they bump the version too.
+"""
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .versions import bump_version, is_versioned, table_label
+
+
+def table_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version(sender)
+
+
+for model in apps.get_models():
+    if is_versioned(model):
+        label = table_label(model)
+        post_save.connect(table_changed, sender=model, dispatch_uid=f'version_post_save_{label}')
+        post_delete.connect(table_changed, sender=model, dispatch_uid=f'version_post_delete_{label}')
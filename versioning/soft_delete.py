@@ -0,0 +1,85 @@
+"""
+Soft deletion for models with an `is_active` flag.
+
+A model opts in with two managers, declared in this order:
+
+    objects = ActiveManager()
+    all_objects = SoftDeleteManager()
+
+`objects`, the default manager, only sees rows with is_active=True, so
+views, serializer lookups and reverse relations skip soft-deleted rows
+without filtering by hand. `all_objects` sees every row; use it to find
+or restore soft-deleted rows, and for uniqueness checks that must see
+them. Related-object access (`result.quiz`), `refresh_from_db()` and
+deletion cascades go through the base manager and are unaffected.
+
+Both managers return `SoftDeleteQuerySet`s, a `VersionedQuerySet` whose
+`soft_delete()` and `restore()` flip the flag of every matching row with
+one UPDATE, bumping the table version like any other bulk write. Being
+bulk writes they skip the save signals. Models whose saves move the
+wallet ledger, user stats or leaderboards declare `SignalledActiveManager`
+and `SignalledSoftDeleteManager` instead, whose querysets refuse both
+operations: soft delete those rows one at a time with the model's
+`soft_delete()`.
+"""
+from django.db import NotSupportedError, models
+
+from .versions import VersionedQuerySet
+
+# Partial index condition for the lookups of live rows.
+ACTIVE = models.Q(is_active=True)
+
+
+class SoftDeleteQuerySet(VersionedQuerySet):
+    def soft_delete(self):
+        """Mark the matching active rows inactive; returns how many changed."""
+        return self.filter(is_active=True).update(is_active=False)
+
+    soft_delete.alters_data = True
+
+    def restore(self):
+        """Mark the matching inactive rows active; returns how many changed."""
+        return self.filter(is_active=False).update(is_active=True)
+
+    restore.alters_data = True
+
+
+class SignalledSoftDeleteQuerySet(SoftDeleteQuerySet):
+    """For models whose save signals post to the ledger, stats or leaderboards."""
+
+    def soft_delete(self):
+        raise NotSupportedError(
+            f"{self.model.__name__} rows move the wallet ledger, user stats or leaderboards; "
+            f"soft delete them one at a time with {self.model.__name__}.soft_delete()"
+        )
+
+    soft_delete.alters_data = True
+
+    def restore(self):
+        raise NotSupportedError(
+            f"{self.model.__name__} rows move the wallet ledger, user stats or leaderboards; "
+            f"restore them one at a time by setting is_active and calling save()"
+        )
+
+    restore.alters_data = True
+
+
+class ActiveManagerMixin:
+    """Limits a manager to active rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
+SoftDeleteManager = models.Manager.from_queryset(SoftDeleteQuerySet, 'SoftDeleteManager')
+
+
+class ActiveManager(ActiveManagerMixin, SoftDeleteManager):
+    pass
+
+
+SignalledSoftDeleteManager = models.Manager.from_queryset(SignalledSoftDeleteQuerySet, 'SignalledSoftDeleteManager')
+
+
+class SignalledActiveManager(ActiveManagerMixin, SignalledSoftDeleteManager):
+    pass
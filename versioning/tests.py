@@ -0,0 +1,77 @@
+from django.db import NotSupportedError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from versioning.versions import get_versions
+from virtualmoney.models import VirtualMoney
+
+
+class TableVersionTests(TestCase):
+    def test_writes_bump_only_their_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.objects.bulk_create([Market(market_name="Stocks", risk_level="High", description="Stocks")])
+        self.assertEqual(get_versions(Market, Quiz), [1, 0])
+
+    def test_rolled_back_write_does_not_bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Market.objects.create(market_name="Stocks", risk_level="High", description="Stocks")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(get_versions(Market), [0])
+
+    def test_update_of_no_rows_does_not_bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Market.objects.filter(market_name="Missing").update(is_active=False)
+        self.assertEqual(get_versions(Market), [0])
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.open, self.closed = Market.objects.bulk_create([
+            Market(market_name="Stocks", risk_level="High", description="Stocks"),
+            Market(market_name="Bonds", risk_level="Low", description="Bonds", is_active=False),
+        ])
+
+    def test_default_manager_sees_only_active_rows(self):
+        self.assertEqual(list(Market.objects.values_list('market_name', flat=True)), ["Stocks"])
+        self.assertEqual(Market.all_objects.count(), 2)
+        self.assertIs(Market._default_manager, Market.objects)
+
+    def updates_of(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "market_market"')]
+
+    def test_bulk_soft_delete_and_restore_are_one_update(self):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Market.objects.soft_delete(), 1)
+        self.assertEqual(len(self.updates_of(queries)), 1)
+        self.assertEqual(get_versions(Market), [1])
+        self.assertFalse(Market.objects.exists())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Market.all_objects.filter(market_name="Bonds").restore(), 1)
+        self.assertEqual(len(self.updates_of(queries)), 1)
+        self.assertEqual(list(Market.objects.values_list('market_name', flat=True)), ["Bonds"])
+
+    def test_ledger_rows_refuse_bulk_soft_delete(self):
+        for model in (QuizResult, VirtualMoney, InvestmentSimulation, Achievement):
+            with self.subTest(model=model.__name__):
+                with self.assertRaises(NotSupportedError):
+                    model.objects.soft_delete()
+                with self.assertRaises(NotSupportedError):
+                    model.all_objects.restore()
+
+    def test_active_lookups_use_the_partial_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Query plans are checked on SQLite")
+        sql, params = Market.objects.filter(market_id__gt=0).order_by('market_id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('market_active_idx', plan)
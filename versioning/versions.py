@@ -0,0 +1,77 @@
+"""
+Per-table version counters.
+
+A model opts in by using a `VersionedQuerySet` manager. Saves and deletes
+bump its counter through signals; `update()` (which `bulk_update()` goes
+through) and `bulk_create()` on its querysets bump it directly. Bumps run
+after the surrounding transaction commits, so a counter never moves for a
+write that rolled back, and the hot counter row is never locked for the
+length of a caller's transaction.
+"""
+from django.db import models, transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from .models import TableVersion
+
+
+# Sent with sender=<model> when a queryset writes rows without per-row signals.
+bulk_write = Signal()
+
+
+def table_label(model):
+    return model._meta.label_lower
+
+
+def is_versioned(model):
+    return issubclass(model._default_manager._queryset_class, VersionedQuerySet)
+
+
+def increment(label):
+    versions = TableVersion.objects.filter(table=label)
+    if not versions.update(version=F('version') + 1):
+        _, created = TableVersion.objects.get_or_create(table=label, defaults={'version': 1})
+        if not created:
+            versions.update(version=F('version') + 1)
+
+
+def bump_version(model):
+    label = table_label(model)
+    transaction.on_commit(lambda: increment(label))
+
+
+def get_versions(*models):
+    """Return the current version of each model's table, in order."""
+    labels = [table_label(model) for model in models]
+    versions = dict(TableVersion.objects.filter(table__in=labels).values_list('table', 'version'))
+    return [versions.get(label, 0) for label in labels]
+
+
+async def aget_versions(*models):
+    """`get_versions` for async views."""
+    labels = [table_label(model) for model in models]
+    versions = {
+        table: version
+        async for table, version in TableVersion.objects.filter(table__in=labels).values_list('table', 'version')
+    }
+    return [versions.get(label, 0) for label in labels]
+
+
+class VersionedQuerySet(models.QuerySet):
+    """QuerySet whose bulk writes bump the table version."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_version(self.model)
+            bulk_write.send(sender=self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            bump_version(self.model)
+            bulk_write.send(sender=self.model)
+        return created
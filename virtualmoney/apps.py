@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VirtualmoneyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'virtualmoney'
+
+    def ready(self):
+        # Connect the ledger receivers for grants, payouts, stakes and rewards.
+        from . import signals  # noqa: F401
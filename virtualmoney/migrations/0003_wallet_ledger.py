@@ -0,0 +1,78 @@
+# Generated by Django 4.2 on 2026-10-17 23:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("virtualmoney", "0002_rename_user_id_virtualmoney_user_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WalletBalance",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="wallet",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="WalletLedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("grant", "Grant"),
+                            ("quiz_payout", "Quiz Payout"),
+                            ("investment_stake", "Investment Stake"),
+                            ("investment_return", "Investment Return"),
+                            ("achievement_reward", "Achievement Reward"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("reference_id", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wallet_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="walletledgerentry",
+            index=models.Index(fields=["user", "id"], name="wallet_entry_user_id_idx"),
+        ),
+    ]
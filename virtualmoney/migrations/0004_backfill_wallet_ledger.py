@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Sum
+
+BATCH_SIZE = 5000
+
+
+def backfill_wallet_ledger(apps, schema_editor):
+    """
+    Post one ledger entry per existing active grant and quiz payout, then
+    materialize each user's balance from those entries.
+    """
+    VirtualMoney = apps.get_model('virtualmoney', 'VirtualMoney')
+    QuizResult = apps.get_model('quiz_results', 'QuizResult')
+    WalletLedgerEntry = apps.get_model('virtualmoney', 'WalletLedgerEntry')
+    WalletBalance = apps.get_model('virtualmoney', 'WalletBalance')
+
+    sources = [
+        ('grant', VirtualMoney.objects.filter(is_active=True, user__isnull=False).values_list('id', 'user_id', 'amount')),
+        ('quiz_payout', QuizResult.objects.filter(is_active=True).exclude(money_earned=0).values_list('id', 'user_id', 'money_earned')),
+    ]
+    for source, rows in sources:
+        batch = []
+        for reference_id, user_id, amount in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(WalletLedgerEntry(user_id=user_id, amount=amount, source=source, reference_id=reference_id))
+            if len(batch) >= BATCH_SIZE:
+                WalletLedgerEntry.objects.bulk_create(batch)
+                batch = []
+        WalletLedgerEntry.objects.bulk_create(batch)
+
+    totals = WalletLedgerEntry.objects.values('user_id').annotate(total=Sum('amount')).order_by()
+    WalletBalance.objects.bulk_create(
+        [WalletBalance(user_id=row['user_id'], balance=row['total']) for row in totals.iterator()],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def clear_wallet_ledger(apps, schema_editor):
+    apps.get_model('virtualmoney', 'WalletBalance').objects.all().delete()
+    apps.get_model('virtualmoney', 'WalletLedgerEntry').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('virtualmoney', '0003_wallet_ledger'),
+        ('quiz_results', '0009_remove_quizresult_completed_on_alter_quizresult_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_wallet_ledger, clear_wallet_ledger),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("virtualmoney", "0005_active_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="virtualmoney",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["amount", "id"],
+                name="virtualmoney_active_amount_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="virtualmoney",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["date_granted", "id"],
+                name="virtualmoney_active_date_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from versioning.soft_delete import ACTIVE, SignalledActiveManager, SignalledSoftDeleteManager
 
 class VirtualMoney(models.Model):
     """
@@ -14,6 +15,16 @@ class VirtualMoney(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date_granted = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)  # Add an active flag for soft deletion
+    objects = SignalledActiveManager()
+    all_objects = SignalledSoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=ACTIVE, name='virtualmoney_active_idx'),
+            models.Index(fields=['user', 'id'], condition=ACTIVE, name='virtualmoney_active_user_idx'),
+            models.Index(fields=['amount', 'id'], condition=ACTIVE, name='virtualmoney_active_amount_idx'),
+            models.Index(fields=['date_granted', 'id'], condition=ACTIVE, name='virtualmoney_active_date_idx'),
+        ]
     
     def soft_delete(self):
         self.is_active = False
@@ -21,3 +32,60 @@ class VirtualMoney(models.Model):
   
     def __str__(self):
         return f"Virtual Money - {self.amount}"
+
+
+class WalletLedgerEntry(models.Model):
+    """
+    Append-only record of every credit (positive amount) and debit (negative
+    amount) applied to a user's wallet. Rows are never updated or deleted;
+    corrections are posted as new, offsetting entries.
+    """
+    GRANT = 'grant'
+    QUIZ_PAYOUT = 'quiz_payout'
+    INVESTMENT_STAKE = 'investment_stake'
+    INVESTMENT_RETURN = 'investment_return'
+    ACHIEVEMENT_REWARD = 'achievement_reward'
+
+    SOURCE_CHOICES = [
+        (GRANT, 'Grant'),
+        (QUIZ_PAYOUT, 'Quiz Payout'),
+        (INVESTMENT_STAKE, 'Investment Stake'),
+        (INVESTMENT_RETURN, 'Investment Return'),
+        (ACHIEVEMENT_REWARD, 'Achievement Reward'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='wallet_entries')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    source = models.CharField(max_length=30, choices=SOURCE_CHOICES)
+    reference_id = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='wallet_entry_user_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Wallet ledger entries are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Wallet ledger entries are append-only")
+
+    def __str__(self):
+        return f"{self.get_source_display()} {self.amount} for User {self.user_id}"
+
+
+class WalletBalance(models.Model):
+    """
+    Materialized running total of a user's ledger entries. It is only ever
+    changed with an `F()` update in the same transaction as the entry that
+    caused it, so reading a balance is a single primary-key lookup.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='wallet')
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Wallet of User {self.user_id} - {self.balance}"
@@ -0,0 +1,104 @@
+"""
+Signal receivers that keep the wallet ledger in step with the rows that
+move money: virtual money grants, quiz payouts, investment stakes and
+"Extra Virtual Money" achievement rewards. Hypothetical simulations
+(Monte Carlo jobs, backtests) move nothing.
+
+Each model declares what it contributes to its owner's wallet. On save we
+post only the difference between the previous and the new contribution,
+so creates, edits and soft deletes (is_active=False) all reconcile
+through the same path. `QuerySet.update()` and `bulk_create()` bypass
+signals and therefore bypass the ledger.
+"""
+from django.db.models.signals import post_save, pre_save
+
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from quiz_results.models import QuizResult
+
+from .models import VirtualMoney, WalletLedgerEntry
+from .wallet import post_entry, to_amount
+
+
+def grant_contributions(grant):
+    amount = grant.amount if grant.is_active else 0
+    return grant.user_id, {WalletLedgerEntry.GRANT: to_amount(amount)}
+
+
+def quiz_result_contributions(result):
+    amount = result.money_earned if result.is_active else 0
+    return result.user_id, {WalletLedgerEntry.QUIZ_PAYOUT: to_amount(amount)}
+
+
+def simulation_contributions(simulation):
+    stake = returned = to_amount(0)
+    if simulation.is_active and not simulation.hypothetical:
+        stake = to_amount(simulation.amount_invested)
+        returned = stake + to_amount(simulation.profit_loss)
+    return simulation.user_id, {
+        WalletLedgerEntry.INVESTMENT_STAKE: -stake,
+        WalletLedgerEntry.INVESTMENT_RETURN: returned,
+    }
+
+
+def achievement_contributions(achievement):
+    rewarded = achievement.is_active and achievement.reward_type == 'Extra Virtual Money'
+    amount = achievement.reward_amount if rewarded else 0
+    return achievement.user_id_id, {WalletLedgerEntry.ACHIEVEMENT_REWARD: to_amount(amount)}
+
+
+WALLET_CONTRIBUTIONS = {
+    VirtualMoney: grant_contributions,
+    QuizResult: quiz_result_contributions,
+    InvestmentSimulation: simulation_contributions,
+    Achievement: achievement_contributions,
+}
+
+
+def post_changes(reference_id, before, after):
+    """
+    Post the difference between two (user_id, {source: amount}) snapshots.
+    Only a new stake is required to be covered by the current balance;
+    corrections and reversals are allowed to overdraw the wallet.
+    """
+    old_user, old_amounts = before
+    new_user, new_amounts = after
+    if old_user != new_user:
+        if old_user is not None:
+            for source, amount in old_amounts.items():
+                post_entry(old_user, -amount, source, reference_id)
+        old_amounts = {}
+    if new_user is None:
+        return
+    # Debits first, so a stake is checked before its return is credited.
+    deltas = sorted(
+        ((source, amount - old_amounts.get(source, 0)) for source, amount in new_amounts.items()),
+        key=lambda item: item[1],
+    )
+    for source, delta in deltas:
+        allow_overdraft = source != WalletLedgerEntry.INVESTMENT_STAKE
+        post_entry(new_user, delta, source, reference_id, allow_overdraft=allow_overdraft)
+
+
+def remember_wallet_contribution(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    contributions = WALLET_CONTRIBUTIONS[sender]
+    previous = None
+    if not instance._state.adding and instance.pk is not None:
+        previous = sender._base_manager.filter(pk=instance.pk).first()
+    instance._wallet_before = contributions(previous) if previous else (None, {})
+
+
+def post_wallet_contribution(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    contributions = WALLET_CONTRIBUTIONS[sender]
+    before = getattr(instance, '_wallet_before', (None, {}))
+    post_changes(instance.pk, before, contributions(instance))
+    instance._wallet_before = contributions(instance)
+
+
+for model in WALLET_CONTRIBUTIONS:
+    pre_save.connect(remember_wallet_contribution, sender=model, dispatch_uid=f'wallet_pre_save_{model.__name__}')
+    post_save.connect(post_wallet_contribution, sender=model, dispatch_uid=f'wallet_post_save_{model.__name__}')
@@ -1,8 +1,19 @@
+from unittest import mock
+
+from django.db import DatabaseError
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from .models import VirtualMoney
+from datetime import date
+from decimal import Decimal
+from achievements.models import Achievement
+from investment_simulation.models import InvestmentSimulation
+from market.models import Market
+from quiz_results.models import QuizResult
+from quizzes.models import Quiz
+from .models import VirtualMoney, WalletLedgerEntry
+from .wallet import get_balance
 
 class VirtualMoneyTests(APITestCase):
 
@@ -54,7 +65,17 @@ class VirtualMoneyTests(APITestCase):
         """
         response = self.client.get(self.virtual_money_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Only 1 active instance
+        self.assertEqual(len(response.data['results']), 1)  # Only 1 active instance
+
+    def test_soft_deleted_virtual_money_is_hidden(self):
+        """
+        Test that soft deleted instances are left out of the list and detail (unhappy path).
+        """
+        self.virtual_money.soft_delete()
+        response = self.client.get(self.virtual_money_list_url)
+        self.assertEqual(len(response.data['results']), 0)
+        response = self.client.get(self.virtual_money_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_virtual_money_detail(self):
         """
@@ -111,3 +132,130 @@ class VirtualMoneyTests(APITestCase):
         non_existent_id = 9999
         response = self.client.delete(reverse('virtualmoney-detail', args=[non_existent_id]))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class WalletLedgerTests(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.user = User.objects.create_user(username="walletuser", password="testpassword")
+        self.market = Market.objects.create(market_name="Stocks", risk_level="High", description="Stock market")
+        self.quiz = Quiz.objects.create(quiz_text="Sample quiz text")
+        self.balance_url = reverse('wallet-balance', args=[self.user.user_id])
+
+    def balance(self):
+        return get_balance(self.user.user_id)
+
+    def test_grant_credits_wallet(self):
+        VirtualMoney.objects.create(user=self.user, amount=100.00)
+        self.assertEqual(self.balance(), Decimal('100.00'))
+        entry = WalletLedgerEntry.objects.get(user=self.user)
+        self.assertEqual(entry.source, WalletLedgerEntry.GRANT)
+
+    def test_patch_posts_only_the_difference(self):
+        grant = VirtualMoney.objects.create(user=self.user, amount=100.00)
+        response = self.client.patch(reverse('virtualmoney-detail', args=[grant.id]), {"amount": 250.00}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.balance(), Decimal('250.00'))
+        amounts = list(WalletLedgerEntry.objects.order_by('id').values_list('amount', flat=True))
+        self.assertEqual(amounts, [Decimal('100.00'), Decimal('150.00')])
+
+    def test_soft_delete_reverses_grant(self):
+        grant = VirtualMoney.objects.create(user=self.user, amount=100.00)
+        self.client.delete(reverse('virtualmoney-detail', args=[grant.id]))
+        self.assertEqual(self.balance(), Decimal('0.00'))
+        self.assertEqual(WalletLedgerEntry.objects.filter(user=self.user).count(), 2)
+
+    def test_quiz_payout_and_achievement_reward_are_credited(self):
+        QuizResult.objects.create(user=self.user, quiz=self.quiz, score=90, money_earned=40.00)
+        Achievement.objects.create(
+            user_id=self.user, title="Saver", description="Saved money", criteria="Save",
+            reward_type="Extra Virtual Money", reward_amount=60.00, date_achieved=date(2024, 1, 1),
+        )
+        Achievement.objects.create(
+            user_id=self.user, title="Badge", description="A badge", criteria="Play",
+            reward_type="Badge", reward_amount=500.00, date_achieved=date(2024, 1, 1),
+        )
+        self.assertEqual(self.balance(), Decimal('100.00'))
+
+    def test_simulation_debits_stake_and_credits_return(self):
+        VirtualMoney.objects.create(user=self.user, amount=1000.00)
+        data = {
+            "market_id": self.market.market_id,
+            "user": self.user.user_id,
+            "amount_invested": 400.00,
+            "outcome": "Loss",
+            "profit_loss": -100.00,
+        }
+        response = self.client.post(reverse('investment-simulation-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.balance(), Decimal('900.00'))
+        sources = list(WalletLedgerEntry.objects.order_by('id').values_list('source', flat=True))
+        self.assertEqual(sources, [
+            WalletLedgerEntry.GRANT, WalletLedgerEntry.INVESTMENT_STAKE, WalletLedgerEntry.INVESTMENT_RETURN,
+        ])
+
+    def test_simulation_stake_requires_funds(self):
+        VirtualMoney.objects.create(user=self.user, amount=100.00)
+        data = {
+            "market_id": self.market.market_id,
+            "user": self.user.user_id,
+            "amount_invested": 400.00,
+            "outcome": "Profit",
+            "profit_loss": 50.00,
+        }
+        response = self.client.post(reverse('investment-simulation-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.balance(), Decimal('100.00'))
+        self.assertFalse(InvestmentSimulation.objects.exists())
+
+    def test_ledger_entries_are_append_only(self):
+        VirtualMoney.objects.create(user=self.user, amount=100.00)
+        entry = WalletLedgerEntry.objects.get()
+        entry.amount = 1
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_get_wallet_balance(self):
+        VirtualMoney.objects.create(user=self.user, amount=75.50)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.balance_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['balance'], "75.50")
+
+    def test_failed_posting_rolls_back_the_row(self):
+        requests = [
+            ('virtualmoney-list', {"user": self.user.user_id, "amount": 100.00}),
+            ('quizresult-list-create', {"user": self.user.user_id, "quiz": self.quiz.id, "score": 90, "money_earned": 5.00}),
+            ('achievement-list', {
+                "user_id": self.user.user_id, "title": "Saver", "description": "Saved money",
+                "criteria": "Save money", "date_achieved": "2024-01-01",
+                "reward_type": "Extra Virtual Money", "reward_amount": 10.00,
+            }),
+        ]
+        for name, data in requests:
+            with self.subTest(route=name), self.assertRaises(DatabaseError), \
+                    mock.patch('virtualmoney.signals.post_entry', side_effect=DatabaseError("posting failed")):
+                self.client.post(reverse(name), data, format='json')
+        self.assertFalse(VirtualMoney.all_objects.exists())
+        self.assertFalse(QuizResult.all_objects.exists())
+        self.assertFalse(Achievement.all_objects.exists())
+
+    def test_get_wallet_balance_without_entries(self):
+        response = self.client.get(self.balance_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['balance'], "0.00")
+
+    def test_get_wallet_balance_nonexistent_user(self):
+        response = self.client.get(reverse('wallet-balance', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_wallet_ledger(self):
+        VirtualMoney.objects.create(user=self.user, amount=10.00)
+        VirtualMoney.objects.create(user=self.user, amount=20.00)
+        response = self.client.get(reverse('wallet-ledger', args=[self.user.user_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['amount'] for row in response.data['results']], ["10.00", "20.00"])
@@ -0,0 +1,74 @@
+"""
+Wallet service: the only code path that writes to the ledger.
+
+Every posting appends one `WalletLedgerEntry` and moves the matching
+`WalletBalance` row with an `F()` expression inside the same transaction,
+so balances never need to be re-aggregated from history.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import WalletBalance, WalletLedgerEntry
+
+CENT = Decimal('0.01')
+
+
+class InsufficientFunds(Exception):
+    """Raised when a debit would take a wallet below zero."""
+
+
+def to_amount(value):
+    """Normalise ints, floats and strings to a 2-decimal `Decimal`."""
+    if value is None:
+        return Decimal('0.00')
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT)
+
+
+def _apply(user_id, amount, allow_overdraft):
+    balances = WalletBalance.objects.filter(user_id=user_id)
+    if amount < 0 and not allow_overdraft:
+        balances = balances.filter(balance__gte=-amount)
+    return balances.update(balance=F('balance') + amount, updated_at=timezone.now())
+
+
+def post_entry(user_id, amount, source, reference_id=None, allow_overdraft=True):
+    """
+    Append a ledger entry for `user_id` and move their balance by `amount`
+    (positive for credits, negative for debits). Returns the new entry, or
+    None when the amount is zero. Raises `InsufficientFunds` if the debit is
+    not allowed to overdraw the wallet and the balance is too low.
+    """
+    amount = to_amount(amount)
+    if not amount:
+        return None
+    with transaction.atomic():
+        if not _apply(user_id, amount, allow_overdraft):
+            # First posting for this user: create the balance row and retry.
+            WalletBalance.objects.get_or_create(user_id=user_id)
+            if not _apply(user_id, amount, allow_overdraft):
+                raise InsufficientFunds(f"Insufficient balance for User {user_id}")
+        return WalletLedgerEntry.objects.create(
+            user_id=user_id,
+            amount=amount,
+            source=source,
+            reference_id=reference_id,
+        )
+
+
+def credit(user_id, amount, source, reference_id=None):
+    return post_entry(user_id, abs(to_amount(amount)), source, reference_id)
+
+
+def debit(user_id, amount, source, reference_id=None, allow_overdraft=False):
+    return post_entry(user_id, -abs(to_amount(amount)), source, reference_id, allow_overdraft)
+
+
+def get_balance(user_id):
+    """Return the user's balance with a single-row lookup."""
+    balance = WalletBalance.objects.filter(user_id=user_id).values_list('balance', flat=True).first()
+    return to_amount(balance)